@@ -1,396 +1,42 @@
+import os  # Used to read the sensor source configuration from the environment
 import sys  # Import sys to handle system-specific parameters and functions
+import threading  # Used to pre-import the training windows in the background
+import time  # Used to timestamp recording file names
 from PyQt6.QtWidgets import (  # Import necessary widgets from PyQt6
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QHBoxLayout,
-    QFormLayout, QLabel, QTabWidget, QLineEdit, QComboBox, QGridLayout
+    QFormLayout, QLabel, QLineEdit, QComboBox, QFileDialog
 )
 from PyQt6.QtGui import QIcon   # Used for window icons (if any)
-from PyQt6.QtCore import Qt, QTimer  # Core elements like Qt identifiers and Timer
-import pyqtgraph as pg  # For creating scientific graphics
-import numpy as np  # For numerical operations
-
-# Define a class for the second window, intended for simple training scenarios
-class Window2(QMainWindow):  
-    def __init__(self, fullname="", personal_id="", occupation="", difficulty=""):
-        super().__init__()  # Initialize the superclass
-        self.setWindowTitle('Simple training')  # Set the window title
-        self.window2_main_layout = QVBoxLayout()  # Vertical layout for widgets
-        self.tabs = QTabWidget()  # Tab widget for multiple plots or views
-        self.create_force_tab()  # Method to create a tab with a force plot
-        self.tabs.addTab(self.force_tab, 'Force')  # Add the force tab to the tab widget
-        self.window2_main_layout.addWidget(self.tabs)
-
-        # Method to display user information
-        self.display_input_info(fullname, personal_id, occupation, difficulty)
-
-        # Buttons to start and stop the simulation
-        self.start_button = QPushButton('Start')
-        self.start_button.clicked.connect(self.start_plot)
-        self.stop_button = QPushButton('Stop')
-        self.stop_button.clicked.connect(self.stop_plot)
-        self.window2_main_layout.addWidget(self.start_button)
-        self.window2_main_layout.addWidget(self.stop_button)
-
-        # Timer to update plots periodically
-        self.plot_timer = QTimer()
-        self.plot_timer.timeout.connect(self.update_plots)
-
-        # Set up the central widget and layout
-        w2 = QWidget()
-        w2.setLayout(self.window2_main_layout)
-        self.setCentralWidget(w2)
-
-        self.data_index = 0  # Index to manage the data progression in plots
-        
-        # Light indicator for visual feedback
-        self.light_indicator = QLabel()
-        self.light_indicator.setFixedSize(60, 60)
-        self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        self.window2_main_layout.addWidget(self.light_indicator)
-
-    # Display static user information
-    def display_input_info(self, fullname, personal_id, occupation, difficulty):
-        info_label = QLabel(f"Full Name: {fullname}\n"
-                            f"Personal ID: {personal_id}\n"
-                            f"Occupation: {occupation}\n"
-                            f"Difficulty: {difficulty}")
-        self.window2_main_layout.addWidget(info_label)
-
-    # Create a tab with a force plot
-    def create_force_tab(self):
-        self.force_tab = QWidget()
-        layout = QVBoxLayout()
-        self.force_plot_widget = pg.PlotWidget()
-        self.force_plot_widget.setTitle('Force vs. Time')
-        self.force_plot_widget.setLabel('left', 'Force', units='N')
-        self.force_plot_widget.setLabel('bottom', 'Time', units='s')
-        layout.addWidget(self.force_plot_widget)
-        self.force_tab.setLayout(layout)
-        self.force_plot_widget.addLine(y=0.5, pen='g')  # Horizontal threshold line
-        
-    # Start the data plot updating process
-    def start_plot(self):
-        if not self.plot_timer.isActive():
-            self.plot_timer.start(100)  # Update every 100 milliseconds
-
-    # Stop the data plot updating process
-    def stop_plot(self):
-        if self.plot_timer.isActive():
-            self.plot_timer.stop()
-
-    # Method to update the plot data
-    def update_plots(self):
-        x = np.linspace(0, 10, 100)
-        y = np.sin(x + self.data_index / 10.0)  # Simulated sine wave data
-        
-        # Dynamically update the plot
-        if hasattr(self, 'force_data_line'):
-            self.force_plot_widget.removeItem(self.force_data_line)
-        self.force_data_line = self.force_plot_widget.plot(x, y, pen='r')
-        
-        # Adjust the light indicator based on data values
-        current_tab = self.tabs.currentWidget()
-        if current_tab == self.force_tab and y[-1] > 0.5:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        else:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: green;")
-        self.data_index += 1
-        
-       
-# Define a class for an intermediate training window
-class Window3(QMainWindow):
-    def __init__(self, fullname="", personal_id="", occupation="", difficulty=""):
-        super().__init__()
-        self.setWindowTitle('Intermediate Training')
-        self.window3_main_layout = QVBoxLayout()
-        self.tabs = QTabWidget()
-        
-        # Create tabs for different types of data visualization
-        self.create_force_tab()
-        self.create_angular_displacement_tab()
-        self.create_combined_tab()
-        
-        # Add tabs to the tab widget
-        self.tabs.addTab(self.force_tab, 'Force')
-        self.tabs.addTab(self.angular_tab, 'Angular Displacement')
-        self.tabs.addTab(self.combined_tab, 'Combined View')
-        self.window3_main_layout.addWidget(self.tabs)
-
-        # Display user information at the top of the window
-        self.display_input_info(fullname, personal_id, occupation, difficulty)
-
-        # Start and stop buttons for the data updates
-        self.start_button = QPushButton('Start')
-        self.start_button.clicked.connect(self.start_plot)
-        self.stop_button = QPushButton('Stop')
-        self.stop_button.clicked.connect(self.stop_plot)
-        self.window3_main_layout.addWidget(self.start_button)
-        self.window3_main_layout.addWidget(self.stop_button)
-
-        # Timer for periodic updates of the plots
-        self.plot_timer = QTimer()
-        self.plot_timer.timeout.connect(self.update_plots)
-
-        # Setting up the layout and widgets
-        w3 = QWidget()
-        w3.setLayout(self.window3_main_layout)
-        self.setCentralWidget(w3)
-
-        self.data_index = 0  # Index for controlling the simulation's data flow
-        self.plot_data = {}  # Store references to plotted data for updates
-
-        # Visual indicator (light) for threshold crossing alerts
-        self.light_indicator = QLabel()
-        self.light_indicator.setFixedSize(60, 60)
-        self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        self.window3_main_layout.addWidget(self.light_indicator)
-
-    # Display static user information in a consistent format
-    def display_input_info(self, fullname, personal_id, occupation, difficulty):
-        info_label = QLabel(f"Full Name: {fullname}\n"
-                            f"Personal ID: {personal_id}\n"
-                            f"Occupation: {occupation}\n"
-                            f"Difficulty: {difficulty}")
-        self.window3_main_layout.addWidget(info_label)
-
-    # Simplified example of creating a plot tab for force data
-    def create_force_tab(self):
-        self.force_tab = QWidget()
-        layout = QVBoxLayout()
-        self.force_plot_widget = pg.PlotWidget()
-        self.force_plot_widget.setTitle('Force vs. Time')
-        self.force_plot_widget.setLabel('left', 'Force', units='N')
-        self.force_plot_widget.setLabel('bottom', 'Time', units='s')
-        layout.addWidget(self.force_plot_widget)
-        self.force_tab.setLayout(layout)
-        self.force_plot_widget.addLine(y=0.5, pen='g')  # Threshold line
-
-    # Creating tab and plot for angular displacement data
-    def create_angular_displacement_tab(self):
-        self.angular_tab = QWidget()
-        layout = QVBoxLayout()
-        self.angular_plot_widget = pg.PlotWidget()
-        self.angular_plot_widget.setTitle('Angular Displacement vs. Time')
-        self.angular_plot_widget.setLabel('left', 'Angular Displacement', units='deg')
-        self.angular_plot_widget.setLabel('bottom', 'Time', units='s')
-        layout.addWidget(self.angular_plot_widget)
-        self.angular_tab.setLayout(layout)
-        self.angular_plot_widget.addLine(y=0.5, pen='g')  # Threshold line
-
-    # Creating a combined view that includes both force and angular displacement in a grid layout
-    def create_combined_tab(self):
-        self.combined_tab = QWidget()
-        grid_layout = QGridLayout()
-        self.combined_force_plot_widget = pg.PlotWidget()
-        self.combined_force_plot_widget.setTitle('Force vs. Time')
-        self.combined_angular_plot_widget = pg.PlotWidget()
-        self.combined_angular_plot_widget.setTitle('Angular Displacement vs. Time')
-        grid_layout.addWidget(self.combined_force_plot_widget, 0, 0)
-        grid_layout.addWidget(self.combined_angular_plot_widget, 0, 1)
-        self.combined_tab.setLayout(grid_layout)
-        # Adding threshold lines for the combined view plots
-        self.combined_force_plot_widget.addLine(y=0.5, pen='g')
-        self.combined_angular_plot_widget.addLine(y=0.5, pen='g')
-
-    # Function to start data plotting
-    def start_plot(self):
-        if not self.plot_timer.isActive():
-            self.plot_timer.start(100)  # Update every 100 milliseconds
-
-    # Function to stop data plotting
-    def stop_plot(self):
-        if self.plot_timer.isActive():
-            self.plot_timer.stop()
-
-    # Update data plots periodically based on the timer
-    def update_plots(self):
-        x = np.linspace(0, 10, 100)
-        y_force = np.sin(x + self.data_index / 10.0)  # Dynamic data for force graph
-        y_angular = np.cos(x + self.data_index / 10.0)  # Dynamic data for angular displacement graph
-
-        # Dynamically update both individual and combined view plots
-        if hasattr(self, 'force_data_line'):
-            self.force_plot_widget.removeItem(self.force_data_line)
-            self.combined_force_plot_widget.removeItem(self.force_data_line_combined)
-        self.force_data_line = self.force_plot_widget.plot(x, y_force, pen='r')
-        self.force_data_line_combined = self.combined_force_plot_widget.plot(x, y_force, pen='r')
-
-        if hasattr(self, 'angular_data_line'):
-            self.angular_plot_widget.removeItem(self.angular_data_line)
-            self.combined_angular_plot_widget.removeItem(self.angular_data_line_combined)
-        self.angular_data_line = self.angular_plot_widget.plot(x, y_angular, pen='b')
-        self.angular_data_line_combined = self.combined_angular_plot_widget.plot(x, y_angular, pen='b')
-
-        # Update light indicator based on the current tab and the last data point
-        current_tab = self.tabs.currentWidget()
-        if current_tab == self.force_tab and y_force[-1] > 0.5:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        elif current_tab == self.angular_tab and y_angular[-1] > 0.5:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        else:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: green;")
-
-        self.data_index += 1
-        
+from PyQt6.QtCore import Qt  # Core elements like Qt identifiers
+# pyqtgraph, NumPy and the data pipeline are imported lazily, see training_windows()
+
+SENSOR_SOURCE = os.environ.get('BABY_TRAINER_SOURCE')  # e.g. tcp://127.0.0.1:9000?rate=1000, unset for simulation
+RECORDINGS_DIR = os.environ.get('BABY_TRAINER_RECORDINGS',
+                                os.path.join(os.path.expanduser('~'), 'BabyTrainerRecordings'))
+REPLAY_SPEEDS = {'1x': 1.0, '10x': 10.0, 'Max': None}  # Playback speeds offered for recorded sessions
+PREWARM = os.environ.get('BABY_TRAINER_PREWARM', '1') != '0'  # Import the training windows while the form is open
+RESULTS_PATH = os.environ.get('BABY_TRAINER_RESULTS', os.path.join(RECORDINGS_DIR, 'results.sqlite'))  # Scores
+
+
+# Import the training windows (and with them pyqtgraph and NumPy) on first use
+def training_windows():
+    import babytrainer.training_windows
+    return babytrainer.training_windows
+
+
+# Start importing the training windows on a background thread so they are ready by the time they are needed
+def prewarm_training_windows():
+    if PREWARM and 'babytrainer.training_windows' not in sys.modules:
+        threading.Thread(target=training_windows, name='prewarm', daemon=True).start()
+
+
+# Window2, Window3 and Window4 stay reachable as attributes of this module, imported on first access
+def __getattr__(name):
+    if name in ('Window2', 'Window3', 'Window4', 'SAMPLE_RATE', 'WINDOW_SECONDS', 'PLOT_INTERVAL_MS'):
+        return getattr(training_windows(), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
-class Window4(QMainWindow): 
-    # Initialize the Advanced Training window with personal details as arguments
-    def __init__(self, fullname="", personal_id="", occupation="", difficulty=""):
-        super().__init__()
-        self.setWindowTitle('Advanced Training')
-        self.window4_main_layout = QVBoxLayout()
-
-        # Tabs to organize different types of data visualization
-        self.tabs = QTabWidget()
-        self.create_force_tab()
-        self.create_pressure_tab()
-        self.create_angular_displacement_tab()
-        self.create_combined_tab()
-        self.tabs.addTab(self.combined_tab, 'Combined View')
-        self.tabs.addTab(self.force_tab, 'Force')
-        self.tabs.addTab(self.pressure_tab, 'Pressure')
-        self.tabs.addTab(self.angular_tab, 'Angular Displacement')
-
-        self.window4_main_layout.addWidget(self.tabs)
-
-        # Display personal and training details
-        self.display_input_info(fullname, personal_id, occupation, difficulty)
-
-        # Control buttons for starting and stopping the training
-        self.start_button = QPushButton('Start')
-        self.start_button.clicked.connect(self.start_plot)
-        self.stop_button = QPushButton('Stop')
-        self.stop_button.clicked.connect(self.stop_plot)
-        self.window4_main_layout.addWidget(self.start_button)
-        self.window4_main_layout.addWidget(self.stop_button)
-
-        # Timer to handle real-time updates to the plots
-        self.plot_timer = QTimer()
-        self.plot_timer.timeout.connect(self.update_plots)
-
-        # Setup the main layout
-        w4 = QWidget()
-        w4.setLayout(self.window4_main_layout)
-        self.setCentralWidget(w4)
-
-        self.data_index = 0  # Index to manage the simulation's progression
-
-        # Light indicator for threshold breaches
-        self.light_indicator = QLabel()
-        self.light_indicator.setFixedSize(60, 60)
-        self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        self.window4_main_layout.addWidget(self.light_indicator)
-
-    # Display static user information clearly
-    def display_input_info(self, fullname, personal_id, occupation, difficulty):
-        info_label = QLabel(f"Full Name: {fullname}\n"
-                            f"Personal ID: {personal_id}\n"
-                            f"Occupation: {occupation}\n"
-                            f"Difficulty: {difficulty}")
-        self.window4_main_layout.addWidget(info_label)
-
-    # Create tabs for different metrics (force, pressure, etc.)
-    def create_force_tab(self):
-        self.force_tab = QWidget()
-        layout = QVBoxLayout()
-        self.force_plot_widget = pg.PlotWidget()
-        self.force_plot_widget.setTitle('Force vs. Time')
-        self.force_plot_widget.setLabel('left', 'Force', units='N')
-        self.force_plot_widget.setLabel('bottom', 'Time', units='s')
-        layout.addWidget(self.force_plot_widget)
-        self.force_tab.setLayout(layout)
-        self.force_plot_widget.addLine(y=0.5, pen='g')  # Threshold line for visualization
-
-    def create_pressure_tab(self):
-        self.pressure_tab = QWidget()
-        layout = QVBoxLayout()
-        self.pressure_plot_widget = pg.PlotWidget()
-        self.pressure_plot_widget.setTitle('Pressure vs. Time')
-        self.pressure_plot_widget.setLabel('left', 'Pressure', units='Pa')
-        self.pressure_plot_widget.setLabel('bottom', 'Time', units='s')
-        layout.addWidget(self.pressure_plot_widget)
-        self.pressure_tab.setLayout(layout)
-        self.pressure_plot_widget.addLine(y=100, pen='b')  # Pressure threshold
-
-    def create_angular_displacement_tab(self):
-        self.angular_tab = QWidget()
-        layout = QVBoxLayout()
-        self.angular_plot_widget = pg.PlotWidget()
-        self.angular_plot_widget.setTitle('Angular Displacement vs. Time')
-        self.angular_plot_widget.setLabel('left', 'Angular Displacement', units='deg')
-        self.angular_plot_widget.setLabel('bottom', 'Time', units='s')
-        layout.addWidget(self.angular_plot_widget)
-        self.angular_tab.setLayout(layout)
-        self.angular_plot_widget.addLine(y=0.5, pen='g')  # Angular displacement threshold
-
-    # Combined tab showing all metrics together for comparison
-    def create_combined_tab(self):
-        self.combined_tab = QWidget()
-        grid_layout = QGridLayout()
-        self.combined_force_plot_widget = pg.PlotWidget()
-        self.combined_force_plot_widget.setTitle('Force vs. Time')
-        self.combined_pressure_plot_widget = pg.PlotWidget()
-        self.combined_pressure_plot_widget.setTitle('Pressure vs. Time')
-        self.combined_angular_plot_widget = pg.PlotWidget()
-        self.combined_angular_plot_widget.setTitle('Angular Displacement vs. Time')
-        grid_layout.addWidget(self.combined_force_plot_widget, 0, 0)
-        grid_layout.addWidget(self.combined_pressure_plot_widget, 0, 1)
-        grid_layout.addWidget(self.combined_angular_plot_widget, 1, 0)
-        self.combined_tab.setLayout(grid_layout)
-
-    # Methods to start and stop the real-time data plot updates
-    def start_plot(self):
-        if not self.plot_timer.isActive():
-            self.plot_timer.start(100)  # Timer interval in milliseconds
-
-    def stop_plot(self):
-        if self.plot_timer.isActive():
-            self.plot_timer.stop()
-
-    # Update the plots based on the timer; manage data and visuals
-    def update_plots(self):
-        x = np.linspace(0, 10, 100)
-        y_force = np.sin(x + self.data_index / 10.0) * 0.4 + 0.5
-        y_pressure = np.cos(x + self.data_index / 10.0) * 80 + 100
-        y_angular = np.sin(x + self.data_index / 10.0) * 0.4 + 0.5
-
-        # Update all plots; check and update light based on threshold values
-        self.force_plot_widget.plot(x, y_force, clear=True, pen='r')
-        self.pressure_plot_widget.plot(x, y_pressure, clear=True, pen='b')
-        self.angular_plot_widget.plot(x, y_angular, clear=True, pen='g')
-
-        current_tab = self.tabs.currentWidget()
-        if current_tab == self.force_tab and y_force[-1] > 0.5:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        elif current_tab == self.pressure_tab and y_pressure[-1] > 100:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        elif current_tab == self.angular_tab and y_angular[-1] > 0.5:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
-        else:
-            self.light_indicator.setStyleSheet("border-radius: 10px; background-color: green;")
-
-        self.data_index += 1
-        
-        # Update force data in the individual and combined tab
-        if hasattr(self, 'force_data_line'):
-            self.force_plot_widget.removeItem(self.force_data_line)
-            self.combined_force_plot_widget.removeItem(self.force_data_line_combined)
-        self.force_data_line = self.force_plot_widget.plot(x, y_force, pen='r')
-        self.force_data_line_combined = self.combined_force_plot_widget.plot(x, y_force, pen='r')
-
-        # Update angular data in the individual and combined tab
-        if hasattr(self, 'angular_data_line'):
-            self.angular_plot_widget.removeItem(self.angular_data_line)
-            self.combined_angular_plot_widget.removeItem(self.angular_data_line_combined)
-        self.angular_data_line = self.angular_plot_widget.plot(x, y_angular, pen='b')
-        self.angular_data_line_combined = self.combined_angular_plot_widget.plot(x, y_angular, pen='b')
-
-        # Update pressure data in the individual and combined tab
-        if hasattr(self, 'pressure_data_line'):
-            self.pressure_plot_widget.removeItem(self.pressure_data_line)
-            self.combined_pressure_plot_widget.removeItem(self.pressure_data_line_combined)
-        self.pressure_data_line = self.pressure_plot_widget.plot(x, y_angular, pen='b')
-        self.pressure_data_line_combined = self.combined_pressure_plot_widget.plot(x, y_pressure, pen='g')
-        
 # Define the main window for user input
 class Window1(QMainWindow):
     def __init__(self):
@@ -426,6 +72,22 @@ class Window1(QMainWindow):
         # Add the button to the layout
         self.window1_main_layout.addWidget(self.start_training_button)
 
+        # Controls to replay a recorded session at the chosen speed
+        self.replay_speed_combo = QComboBox()
+        self.replay_speed_combo.addItems(list(REPLAY_SPEEDS))
+        self.replay_button = QPushButton('Replay Session')
+        self.replay_button.clicked.connect(self.replay_session)
+        replay_layout = QHBoxLayout()
+        replay_layout.addWidget(self.replay_button)
+        replay_layout.addWidget(self.replay_speed_combo)
+        self.window1_main_layout.addLayout(replay_layout)
+
+        # Button to show the leaderboard and the trainee's past sessions
+        self.results_button = QPushButton('Results')
+        self.results_button.clicked.connect(self.show_results)
+        self.window1_main_layout.addWidget(self.results_button)
+        self.results = None  # Results database, opened on first use
+
         # Create a central widget and set the layout for the main window
         window1_widget = QWidget()
         window1_widget.setLayout(self.window1_main_layout)
@@ -438,24 +100,80 @@ class Window1(QMainWindow):
         occupation = self.occupation_input.text()
         difficulty = self.difficulty_combo.currentText()
 
+        # Every training session is recorded so it can be reviewed later, and scored
+        self.open_training_window(fullname, personal_id, occupation, difficulty,
+                                  self.create_sensor_source(), self.create_recording_path(personal_id),
+                                  self.results_store())
+
+    # Pick a recorded session and play it back through the matching training window
+    def replay_session(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Replay Session', RECORDINGS_DIR,
+                                              'Session recordings (*.btr)')
+        if not path:
+            return
+        from babytrainer.recording import ReplaySource
+        source = ReplaySource(path, REPLAY_SPEEDS[self.replay_speed_combo.currentText()])
+        info = source.recording.info
+        self.open_training_window(info['fullname'], info['personal_id'], info['occupation'],
+                                  info['difficulty'], source)
+
+    def open_training_window(self, fullname, personal_id, occupation, difficulty, source=None, recording_path=None,
+                             results=None):
         # Determine which training window to open based on the selected difficulty level
         if difficulty == 'Easy':
-            self.open_window2(fullname, personal_id, occupation, difficulty)
+            self.open_window2(fullname, personal_id, occupation, difficulty, source, recording_path, results)
         elif difficulty == 'Intermediate':
-            self.open_window3(fullname, personal_id, occupation, difficulty)
+            self.open_window3(fullname, personal_id, occupation, difficulty, source, recording_path, results)
         elif difficulty == 'Advanced':
-            self.open_window4(fullname, personal_id, occupation, difficulty)
-
-    def open_window2(self, fullname, personal_id, occupation, difficulty):
-        self.window2 = Window2(fullname, personal_id, occupation, difficulty)
+            self.open_window4(fullname, personal_id, occupation, difficulty, source, recording_path, results)
+
+    # Open the results database the first time it is needed; queued results are written out on exit
+    def results_store(self):
+        if self.results is None:
+            from babytrainer.results import ResultsStore
+            os.makedirs(os.path.dirname(RESULTS_PATH) or '.', exist_ok=True)
+            self.results = ResultsStore(RESULTS_PATH)
+            QApplication.instance().aboutToQuit.connect(self.results.close)
+        return self.results
+
+    def show_results(self):
+        from babytrainer.results_window import ResultsWindow
+        self.results_window = ResultsWindow(self.results_store(), self.personal_id_input.text().strip())
+        self.results_window.show()
+
+    # Connect to the configured trainer hardware, or return None to use the simulation
+    def create_sensor_source(self):
+        if not SENSOR_SOURCE:
+            return None
+        from babytrainer.sources import open_source
+        return open_source(SENSOR_SOURCE)
+
+    # Choose a new, unique file in the recordings folder for this trainee's session
+    def create_recording_path(self, personal_id):
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        trainee = ''.join(c for c in personal_id if c.isalnum() or c in '-_') or 'anonymous'
+        base = os.path.join(RECORDINGS_DIR, f"{trainee}-{time.strftime('%Y%m%d-%H%M%S')}")
+        path, counter = base + '.btr', 1
+        while os.path.exists(path):
+            path, counter = f'{base}-{counter}.btr', counter + 1
+        return path
+
+    def open_window2(self, fullname, personal_id, occupation, difficulty, source=None, recording_path=None,
+                     results=None):
+        self.window2 = training_windows().Window2(fullname, personal_id, occupation, difficulty, source,
+                                                      recording_path, results)
         self.window2.show()
 
-    def open_window3(self, fullname, personal_id, occupation, difficulty):
-        self.window3 = Window3(fullname, personal_id, occupation, difficulty)
+    def open_window3(self, fullname, personal_id, occupation, difficulty, source=None, recording_path=None,
+                     results=None):
+        self.window3 = training_windows().Window3(fullname, personal_id, occupation, difficulty, source,
+                                                      recording_path, results)
         self.window3.show()
 
-    def open_window4(self, fullname, personal_id, occupation, difficulty):
-        self.window4 = Window4(fullname, personal_id, occupation, difficulty)
+    def open_window4(self, fullname, personal_id, occupation, difficulty, source=None, recording_path=None,
+                     results=None):
+        self.window4 = training_windows().Window4(fullname, personal_id, occupation, difficulty, source,
+                                                      recording_path, results)
         self.window4.show()
 
 # Define the main window for the application startup page
@@ -463,7 +181,7 @@ class MainWindow1(QMainWindow):
     def __init__(self):
         super().__init__()  # Call the constructor of the base class (QMainWindow)
         self.setWindowTitle('Start-up Page')
-        self.window1 = Window1()
+        self.window1 = None  # The training form is built when it is first needed
       
         # Create a vertical layout for the main window
         l = QVBoxLayout()
@@ -495,8 +213,11 @@ class MainWindow1(QMainWindow):
         
     # Method to toggle the visibility of window1
     def toggle_window1(self):
+        if self.window1 is None:
+            self.window1 = Window1()
         self.close()  # Close the main window
         self.window1.show()  # Show window1
+        prewarm_training_windows()  # Load the training windows while the user fills in the form
         
         
 # Main function to start the application
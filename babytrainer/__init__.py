@@ -0,0 +1 @@
+# Data handling building blocks shared by the Baby Trainer windows
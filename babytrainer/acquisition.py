@@ -0,0 +1,125 @@
+# Background sample acquisition, decoupled from the GUI render timer
+import threading
+
+import numpy as np
+
+STOP_TIMEOUT = 0.5  # Longest stop() waits; a thread still opening its source finishes on its own
+
+
+class SpscQueue:
+    # Single-producer/single-consumer sample queue on one preallocated array.
+    # The producer only advances `_written` and the consumer only advances `_read`,
+    # so the two sides never need a lock (each counter has exactly one writer).
+    def __init__(self, channels, capacity, dtype=np.float64):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.channels = channels
+        self.capacity = capacity
+        self._data = np.zeros((channels + 1, capacity), dtype=dtype)  # Row 0 holds timestamps
+        self._written = 0  # Total samples ever pushed (producer side)
+        self._read = 0  # Total samples ever drained (consumer side)
+        self.dropped = 0  # Samples rejected because the consumer fell a full queue behind
+
+    # Number of samples waiting to be drained
+    def __len__(self):
+        return self._written - self._read
+
+    # Producer: copy a batch into the queue, returns how many samples were accepted
+    def push(self, timestamps, samples):
+        samples = np.asarray(samples)
+        if samples.ndim == 1:
+            samples = samples.reshape(1, -1)
+        n = samples.shape[1]
+        free = self.capacity - (self._written - self._read)
+        if n > free:
+            self.dropped += n - free
+            n = free
+        if n == 0:
+            return 0
+        start = self._written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[0, start:start + first] = timestamps[:first]
+        self._data[1:, start:start + first] = samples[:, :first]
+        if first < n:
+            self._data[0, :n - first] = timestamps[first:n]
+            self._data[1:, :n - first] = samples[:, first:n]
+        self._written += n  # Publish only after the data is in place
+        return n
+
+    # Consumer: hand every waiting sample to `target.append(timestamps, samples)`
+    # for each target as at most two zero-copy views, returns the number drained
+    def drain_into(self, *targets):
+        written = self._written  # Snapshot, the producer may keep pushing meanwhile
+        n = written - self._read
+        if n == 0:
+            return 0
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        for target in targets:
+            target.append(self._data[0, start:start + first], self._data[1:, start:start + first])
+            if first < n:
+                target.append(self._data[0, :n - first], self._data[1:, :n - first])
+        self._read = written  # Release the slots back to the producer
+        return n
+
+
+class AcquisitionWorker:
+    # Reads batches from a SensorSource on a background thread and pushes them
+    # into an SpscQueue. The source paces itself (device rate or blocking I/O).
+    # If opening or reading the source fails, the thread ends and `error` holds
+    # the exception for the consumer to report.
+    def __init__(self, source, queue, read_timeout=0.05):
+        self.source = source
+        self.queue = queue
+        self.read_timeout = read_timeout
+        self.sample_count = 0  # Samples read from the source so far
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        if self.is_running():
+            return
+        if self._thread is not None:
+            self._thread.join()  # Still finishing the last stop(), at most the source's open timeout
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name='acquisition', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(STOP_TIMEOUT)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    # Lossy sources drop what does not fit; lossless ones (replays) wait for space
+    def _push(self, timestamps, samples):
+        if not self.source.lossless:
+            self.queue.push(timestamps, samples)
+            return
+        done = 0
+        while done < len(timestamps) and not self._stop.is_set():
+            free = self.queue.capacity - len(self.queue)
+            if not free:
+                self._stop.wait(0.005)
+                continue
+            done += self.queue.push(timestamps[done:done + free], samples[:, done:done + free])
+
+    def _run(self):
+        source = self.source
+        try:
+            source.open()
+            while not self._stop.is_set() and not source.finished:
+                batch = source.read(self.read_timeout)
+                if batch is not None:
+                    self._push(*batch)
+                    self.sample_count += len(batch[0])
+        except Exception as error:  # Ends the thread either way; the consumer decides how to report it
+            self.error = error
+        finally:
+            source.close()
@@ -0,0 +1,107 @@
+# Streaming threshold rules evaluated over whole batches of samples
+from collections import deque, namedtuple
+
+import numpy as np
+
+# One state change of a rule: `active` became True (alarm) or False (cleared)
+# at sample time `time`, where the channel read `value`
+Crossing = namedtuple('Crossing', 'rule time active value')
+
+
+class ThresholdRule:
+    # Alarm while `channel` is above `threshold` (or below it with above=False).
+    # The alarm clears only once the signal is back past threshold -/+ hysteresis,
+    # and either transition only counts after the new state has held for
+    # `min_dwell` seconds. State carries across batches, so chunking never
+    # changes the result.
+    def __init__(self, channel, threshold, hysteresis=0.0, min_dwell=0.0, above=True, name=None):
+        if hysteresis < 0 or min_dwell < 0:
+            raise ValueError('hysteresis and min_dwell must not be negative')
+        self.channel = channel
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.min_dwell = min_dwell
+        self.above = above
+        self.name = name or f'channel {channel}'
+        self.reset()
+
+    def reset(self):
+        self.active = False  # Debounced state reported to the outside
+        self._raw = False  # Hysteresis state before debouncing
+        self._run_start = None  # Time the current raw state began
+
+    # Evaluate one batch, returns the list of Crossings it produced
+    def evaluate(self, timestamps, values):
+        n = len(values)
+        if n == 0:
+            return []
+        # Schmitt trigger: each sample either sets, clears or keeps the raw state
+        if self.above:
+            sets = values > self.threshold
+            clears = values < self.threshold - self.hysteresis
+        else:
+            sets = values < self.threshold
+            clears = values > self.threshold + self.hysteresis
+        decided = sets | clears
+        last = np.maximum.accumulate(np.where(decided, np.arange(n), -1))
+        raw = np.where(last >= 0, sets[np.maximum(last, 0)], self._raw)
+
+        # Runs of constant raw state: starts[i] is the first sample of run i
+        changes = np.flatnonzero(raw[1:] != raw[:-1]) + 1
+        starts = np.concatenate(([0], changes))
+        start_times = timestamps[starts]
+        if raw[0] == self._raw and self._run_start is not None:
+            start_times[0] = self._run_start  # The first run continues from the previous batch
+        ends = np.concatenate((changes, [n])) - 1  # Last sample of each run
+        run_values = raw[starts]
+
+        # A run counts once some sample in it is at least min_dwell past its start
+        qualified = timestamps[ends] - start_times >= self.min_dwell
+        q_values = run_values[qualified]
+        previous = np.concatenate(([self.active], q_values[:-1]))
+        flips = np.flatnonzero(q_values != previous)
+        events = []
+        if len(flips):
+            q_index = np.flatnonzero(qualified)[flips]
+            first = starts[q_index]
+            due = np.searchsorted(timestamps, start_times[q_index] + self.min_dwell, 'left')
+            at = np.maximum(first, due)
+            for index, sample in zip(q_index, at):
+                events.append(Crossing(self.name, float(timestamps[sample]), bool(run_values[index]),
+                                       float(values[sample])))
+            self.active = bool(q_values[flips[-1]])
+
+        self._raw = bool(raw[-1])
+        self._run_start = float(start_times[-1])
+        return events
+
+
+class AlertEngine:
+    # Runs every rule over each incoming batch (sample sink interface) and calls
+    # `on_change(engine)` only when at least one rule changed state
+    def __init__(self, rules, on_change=None, history=1000):
+        self.rules = list(rules)
+        self.on_change = on_change
+        self.events = deque(maxlen=history)  # Most recent crossings, oldest first
+        self.event_count = 0
+
+    def append(self, timestamps, samples):
+        changed = False
+        for rule in self.rules:
+            events = rule.evaluate(timestamps, samples[rule.channel])
+            if events:
+                self.events.extend(events)
+                self.event_count += len(events)
+                changed = True
+        if changed and self.on_change is not None:
+            self.on_change(self)
+
+    # True if any rule on `channel` (or on any channel, if None) is in alarm
+    def is_active(self, channel=None):
+        return any(rule.active for rule in self.rules if channel is None or rule.channel == channel)
+
+    def reset(self):
+        self.events.clear()
+        self.event_count = 0
+        for rule in self.rules:
+            rule.reset()
@@ -0,0 +1,160 @@
+# Time alignment of channels that are sampled independently: every channel
+# arrives with its own timestamps, rate and jitter, and leaves resampled onto
+# one common, evenly spaced time base, so the plots, the combined view and the
+# threshold rules compare all channels at the same instants.
+import math
+
+import numpy as np
+
+from babytrainer.sources import CHANNELS, SensorSource
+
+MAX_LATENCY = 0.25  # Seconds the output may trail the newest sample before a late channel is held
+
+
+class _Stream:
+    # Samples of one channel not yet needed for any future output, in arrays
+    # that are compacted in place and only grow when the live span does
+    def __init__(self, capacity=1024):
+        self.t = np.empty(capacity)
+        self.v = np.empty(capacity)
+        self.start = 0
+        self.end = 0
+        self.last_time = -math.inf
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, timestamps, values):
+        # Jitter may repeat or reorder a timestamp; keep strictly increasing times only
+        keep = timestamps > np.maximum.accumulate(np.concatenate(([self.last_time], timestamps[:-1])))
+        if not keep.all():
+            timestamps, values = timestamps[keep], values[keep]
+        n = len(timestamps)
+        if not n:
+            return
+        if self.end + n > len(self.t):
+            live = self.end - self.start
+            if live + n > len(self.t):
+                capacity = max(2 * len(self.t), live + n)
+                self.t = np.concatenate((self.t[self.start:self.end], np.empty(capacity - live)))
+                self.v = np.concatenate((self.v[self.start:self.end], np.empty(capacity - live)))
+            else:
+                self.t[:live] = self.t[self.start:self.end]
+                self.v[:live] = self.v[self.start:self.end]
+            self.start, self.end = 0, live
+        self.t[self.end:self.end + n] = timestamps
+        self.v[self.end:self.end + n] = values
+        self.end += n
+        self.last_time = float(timestamps[-1])
+
+    # Drop every sample before the last one at or before time `t`
+    def discard_before(self, t):
+        live = self.t[self.start:self.end]
+        self.start += max(0, int(np.searchsorted(live, t, 'right')) - 1)
+
+
+class ChannelAligner:
+    # Linear interpolation of `channels` independently timestamped streams
+    # onto the grid k / sample_rate. push() adds samples of one channel, pull()
+    # returns every grid point that is ready as a (timestamps, samples) batch,
+    # valid until the next pull(). A grid point is ready once every channel has
+    # a sample at or after it, so it only ever depends on the two samples
+    # around it and the output does not depend on how the input was chunked.
+    # With `max_latency` set, grid points more than that behind the newest
+    # sample of any channel are produced anyway, holding the last value of the
+    # channels that are late (counted in `held`); each stream then keeps at
+    # most about max_latency seconds of samples.
+    def __init__(self, channels, sample_rate, max_latency=MAX_LATENCY):
+        self.channels = channels
+        self.sample_rate = float(sample_rate)
+        self.max_latency = max_latency
+        self._t = np.empty(0)
+        self._out = np.empty((channels, 0))
+        self.reset()
+
+    def reset(self):
+        self.streams = [_Stream() for _ in range(self.channels)]
+        self._next = None  # Grid index of the next output sample
+        self.held = 0  # Output values taken from a channel that had not reached them yet
+
+    def push(self, channel, timestamps, values):
+        self.streams[channel].append(np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64))
+
+    def pull(self):
+        started = [stream for stream in self.streams if stream.last_time > -math.inf]
+        if not started:
+            return None
+        ready = min(stream.last_time for stream in self.streams)
+        if self.max_latency is not None:
+            ready = max(ready, max(stream.last_time for stream in started) - self.max_latency)
+        if self._next is None:
+            first = max(stream.t[stream.start] for stream in started)
+            if first > ready:
+                return None
+            self._next = math.ceil(first * self.sample_rate)
+        last = math.floor(ready * self.sample_rate)
+        if last / self.sample_rate > ready:
+            last -= 1
+        n = last - self._next + 1
+        if n <= 0:
+            return None
+
+        if len(self._t) < n:
+            self._t = np.empty(max(n, 1024))
+            self._out = np.empty((self.channels, len(self._t)))
+        t = self._t[:n]
+        np.divide(np.arange(self._next, last + 1, dtype=np.float64), self.sample_rate, out=t)
+        samples = self._out[:, :n]
+        for row, stream in zip(samples, self.streams):
+            if not len(stream):
+                row.fill(np.nan)
+                continue
+            row[:] = np.interp(t, stream.t[stream.start:stream.end], stream.v[stream.start:stream.end])
+            if stream.last_time < t[-1]:
+                self.held += n - int(np.searchsorted(t, stream.last_time, 'right'))
+            stream.discard_before(t[-1])
+        self._next = last + 1
+        return t, samples
+
+
+class AlignedSource(SensorSource):
+    # Sensor source built from one source per channel ({channel index:
+    # source}), each with its own clock and rate; the row of its channel is
+    # taken from every batch it reads. Batches come out on a common time base
+    # at `sample_rate` (default: the fastest input). Channels without a source
+    # read as NaN.
+    def __init__(self, sources, sample_rate=None, max_latency=MAX_LATENCY):
+        super().__init__(sample_rate or max(source.sample_rate for source in sources.values()))
+        self.sources = dict(sources)
+        self.aligner = ChannelAligner(len(self.sources), self.sample_rate, max_latency)
+        self._samples = np.empty((len(CHANNELS), 0))
+
+    def open(self):
+        self.finished = False
+        self.aligner.reset()
+        for source in self.sources.values():
+            source.open()
+
+    def read(self, timeout=0.1):
+        share = timeout / len(self.sources)
+        for stream, (channel, source) in enumerate(self.sources.items()):
+            if source.finished:
+                continue
+            batch = source.read(share)
+            if batch is not None:
+                timestamps, samples = batch
+                self.aligner.push(stream, timestamps, samples[channel if source.channels > 1 else 0])
+        self.finished = all(source.finished for source in self.sources.values())
+        aligned = self.aligner.pull()
+        if aligned is None:
+            return None
+        t, rows = aligned
+        if self._samples.shape[1] < len(t):
+            self._samples = np.full((len(CHANNELS), max(len(t), 1024)), np.nan)
+        samples = self._samples[:, :len(t)]
+        samples[list(self.sources)] = rows
+        return t, samples
+
+    def close(self):
+        for source in self.sources.values():
+            source.close()
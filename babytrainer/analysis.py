@@ -0,0 +1,182 @@
+# Offline re-scoring of recorded sessions, for when thresholds change. Every
+# recording (.btr) or archive (.bta) is run through the same filters, threshold
+# rules and scoring as a live session, one session per worker process, and one
+# row per session is streamed to CSV or JSON Lines as results come in. No Qt is
+# imported, so it starts quickly on a server.
+#
+#   python -m babytrainer.analysis scores.csv ~/BabyTrainerRecordings [--threshold force=0.6] [--workers 4]
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import zlib
+from collections import deque
+
+import numpy as np
+
+from babytrainer.alerts import AlertEngine, ThresholdRule
+from babytrainer.archive import SessionArchive, process_pool
+from babytrainer.engine import build_pipeline
+from babytrainer.recording import SessionRecording
+from babytrainer.scoring import SessionResult, SessionScore
+from babytrainer.sources import CHANNELS
+from babytrainer.training_spec import DIFFICULTIES
+
+EXTENSIONS = ('.btr', '.bta')  # Recordings and archives
+FIELDS = ('path',) + SessionResult._fields + ('samples',)  # Output columns
+MAX_IN_FLIGHT = 4  # Sessions per worker queued at once, bounds memory however many files there are
+
+
+# Recording and archive paths under `paths` (files, or directories searched recursively), sorted
+def find_sessions(paths):
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                found.extend(os.path.join(folder, name) for name in names if name.endswith(EXTENSIONS))
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+# Difficulty spec with the given {channel name: threshold} replaced
+def with_thresholds(spec, thresholds):
+    if not thresholds:
+        return spec
+    return spec._replace(channels=tuple(c._replace(threshold=thresholds.get(CHANNELS[c.channel], c.threshold))
+                                        for c in spec.channels))
+
+
+def _open(path):
+    return SessionArchive(path) if path.endswith('.bta') else SessionRecording(path)
+
+
+# Batches of a recording or archive as float64 copies, like the live pipeline
+# gets them; no view of a recording's memory map is left once it is exhausted or closed
+def _batches(session):
+    if isinstance(session, SessionArchive):
+        blocks = session.iter_chunks()
+    else:
+        blocks = (session.block(index) for index in range(session.block_count))
+    for t, samples in blocks:
+        yield np.array(t, dtype=np.float64), np.array(samples, dtype=np.float64)
+
+
+# Score one session, returns its output row as a dict. `difficulty` overrides
+# the level stored in the recording.
+def analyse_session(path, thresholds=None, difficulty=None):
+    session = _open(path)
+    batches = _batches(session)
+    try:
+        name = difficulty or session.difficulty
+        if name not in DIFFICULTIES:
+            raise ValueError(f'{path}: unknown difficulty {name!r}')
+        spec = with_thresholds(DIFFICULTIES[name], thresholds)
+        pipeline = build_pipeline(spec, session.sample_rate)
+        # A batch can hold at most one crossing per sample and rule, all of which the score must see
+        alerts = AlertEngine([ThresholdRule(c.channel, c.threshold, c.hysteresis, c.min_dwell, name=c.name)
+                              for c in spec.channels], history=1 << 20)
+        score = SessionScore(spec, alerts)
+        pipeline.sinks.extend((alerts, score))
+        for t, samples in batches:
+            pipeline.append(t, samples)
+        score.started = session.created  # When the session took place, not when it was re-scored
+        result = score.result(session.personal_id, session.fullname, session.occupation, name)
+        return dict(path=path, samples=score.sample_count, **result._asdict())
+    finally:
+        batches.close()
+        session.close()
+
+
+# Output row of one session, or an error row if it cannot be read, so one
+# damaged file does not stop the others being scored
+def _analyse(path, thresholds, difficulty):
+    try:
+        return analyse_session(path, thresholds, difficulty)
+    except (OSError, ValueError) as error:
+        return {'path': path, 'error': str(error)}
+    except (struct.error, zlib.error) as error:  # A corrupt chunk or truncated structure inside the file
+        return {'path': path, 'error': f'{path} is damaged: {error}'}
+
+
+# Rows for `paths` in order, computed by `workers` processes (0: in this one).
+# Only a few sessions per worker are in flight at any time.
+def analyse_sessions(paths, workers=None, thresholds=None, difficulty=None):
+    if workers == 0:
+        for path in paths:
+            yield _analyse(path, thresholds, difficulty)
+        return
+    workers = workers or os.cpu_count() or 1
+    with process_pool(workers) as pool:
+        limit = MAX_IN_FLIGHT * workers
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(_analyse, path, thresholds, difficulty))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self._writer = csv.DictWriter(stream, FIELDS, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, row):
+        self._stream.write(json.dumps(row) + '\n')
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonLinesWriter}
+
+
+# Parse "channel=value" threshold overrides
+def threshold_override(text):
+    name, _, value = text.partition('=')
+    if name not in CHANNELS:
+        raise argparse.ArgumentTypeError(f'channel must be one of {", ".join(CHANNELS)}')
+    return name, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-score recorded sessions')
+    parser.add_argument('output', help="CSV or JSON Lines file to write ('-' for standard output)")
+    parser.add_argument('paths', nargs='+', help='recordings, archives or directories holding them')
+    parser.add_argument('--threshold', type=threshold_override, action='append', default=[],
+                        metavar='CHANNEL=VALUE', help=f'new threshold for one of {", ".join(CHANNELS)}')
+    parser.add_argument('--difficulty', choices=list(DIFFICULTIES), help='score every session at this level')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per core, 0: none)')
+    parser.add_argument('--format', choices=list(WRITERS), help='output format (default: from the extension)')
+    args = parser.parse_args()
+
+    output_format = args.format or ('jsonl' if args.output.endswith(('.jsonl', '.json')) else 'csv')
+    stream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    writer = WRITERS[output_format](stream)
+    scored = failed = 0
+    try:
+        for row in analyse_sessions(find_sessions(args.paths), args.workers, dict(args.threshold), args.difficulty):
+            if 'error' in row:
+                print(row['error'], file=sys.stderr)
+                failed += 1
+                continue
+            writer.write(row)
+            scored += 1
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    print(f'{scored} sessions scored, {failed} skipped', file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+# Compressed, chunked column archive of recorded sessions for long-term storage
+#
+# File layout (little-endian):
+#   header  HEADER_SIZE bytes: magic, version, sample rate, channel count,
+#           creation time, value resolution (0 = lossless) and the trainee's
+#           details (see HEADER_FORMAT)
+#   chunks  up to `chunk_samples` samples each: uint32 sample count n, then one
+#           uint32 compressed size per column (its top bit set on a channel
+#           stored as float32 in a lossy archive, see encode_chunk), then the
+#           compressed columns (timestamps first, then one per channel)
+#   index   one INDEX_ENTRY per chunk: first and last timestamp, file offset,
+#           size and sample count
+#   trailer offset of the index, chunk count and the magic again
+#
+# Each column is stored as the difference between consecutive values (of their
+# bit patterns, or of the quantised values when a resolution is set; timestamps
+# twice, as they are evenly spaced), byte-shuffled so the slowly changing high
+# bytes line up, and deflated with zlib. A time-range query decodes only the
+# chunks the index says overlap it.
+#
+#   python -m babytrainer.archive ~/BabyTrainerArchive ~/BabyTrainerRecordings/*.btr [--workers 4]
+import argparse
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from babytrainer.recording import INFO_FIELDS, INFO_WIDTHS, SessionRecording, decode_info, encode_info
+
+MAGIC = b'BTRARCH1'
+VERSION = 1
+HEADER_SIZE = 512
+HEADER_FORMAT = '<8sIIdIdd128s64s64s32s'
+CHUNK_SAMPLES = 65536  # About a minute at 1 kHz; the smallest unit a query decodes
+CHUNK_HEADER = struct.Struct('<I')
+INDEX_ENTRY = struct.Struct('<ddQII')
+TRAILER = struct.Struct('<QI8s')
+LEVEL = 6  # zlib compression level
+MAX_IN_FLIGHT = 4  # Chunks per pool worker being encoded at once, bounds the writer's memory
+FLOAT_COLUMN = 1 << 31  # Column size flag: values kept as float32, they did not fit the quantised range
+QUANTISED_MAX = np.iinfo(np.int32).max
+
+
+def _encode_column(values, integer, order, level):
+    d = values.view(integer) if values.dtype != integer else values
+    for _ in range(order):
+        d = np.diff(d, prepend=d.dtype.type(0))  # Wraps around on overflow, undone exactly by cumsum
+    shuffled = d.view(np.uint8).reshape(len(d), d.itemsize).T
+    return zlib.compress(shuffled.tobytes(), level)
+
+
+def _decode_column(data, n, integer, order):
+    d = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(np.dtype(integer).itemsize, n)
+    d = np.ascontiguousarray(d.T).view(integer).ravel()
+    for _ in range(order):
+        d = np.cumsum(d, dtype=integer)
+    return d
+
+
+# Compressed bytes of one chunk. With `resolution` the values are rounded to
+# multiples of it (error at most resolution / 2), otherwise stored bit-exact.
+# A channel whose quantised values would not fit an int32 (or that holds
+# NaNs) is stored bit-exact in that chunk instead, flagged in its size.
+def encode_chunk(timestamps, samples, resolution=0.0, level=LEVEL):
+    timestamps = np.ascontiguousarray(timestamps, dtype='<f8')
+    columns = [_encode_column(timestamps, np.int64, 2, level)]
+    flags = [0]
+    for row in samples:
+        quantised = np.rint(row / resolution) if resolution else None
+        with np.errstate(invalid='ignore'):
+            fits = quantised is not None and bool(np.all(np.abs(quantised) <= QUANTISED_MAX))
+        if fits:
+            columns.append(_encode_column(quantised.astype('<i4'), np.int32, 1, level))
+        else:
+            columns.append(_encode_column(np.ascontiguousarray(row, dtype='<f4'), np.int32, 1, level))
+        flags.append(FLOAT_COLUMN if resolution and not fits else 0)
+    sizes = struct.pack(f'<{len(columns)}I', *(len(column) | flag for column, flag in zip(columns, flags)))
+    return b''.join([CHUNK_HEADER.pack(len(timestamps)), sizes, *columns])
+
+
+# (timestamps, samples) of a chunk written by encode_chunk()
+def decode_chunk(data, channels, resolution=0.0):
+    data = memoryview(data)
+    n, = CHUNK_HEADER.unpack_from(data)
+    sizes = struct.unpack_from(f'<{channels + 1}I', data, CHUNK_HEADER.size)
+    offset = CHUNK_HEADER.size + 4 * (channels + 1)
+    columns = []
+    for size in sizes:
+        columns.append(data[offset:offset + (size & ~FLOAT_COLUMN)])
+        offset += size & ~FLOAT_COLUMN
+    timestamps = _decode_column(columns[0], n, np.int64, 2).view('<f8')
+    samples = np.empty((channels, n), dtype='<f4')
+    for row, column, size in zip(samples, columns[1:], sizes[1:]):
+        values = _decode_column(column, n, np.int32, 1)
+        if resolution and not size & FLOAT_COLUMN:
+            np.multiply(values, resolution, out=row, casting='unsafe')
+        else:
+            row[:] = values.view('<f4')
+    return timestamps, samples
+
+
+def _encode_packed(chunk, resolution, level):
+    return encode_chunk(*chunk, resolution=resolution, level=level)
+
+
+# Pool for bulk archiving and export. Workers are spawned rather than forked so
+# none inherits the GUI's threads.
+def process_pool(workers=None):
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+class ArchiveWriter:
+    # Cuts the appended samples into chunks and compresses them, in `pool` (a
+    # ProcessPoolExecutor of `workers` processes) if given, writing them in
+    # order as they complete. The index and trailer are written by close(); an
+    # archive is only readable once it has been closed.
+    def __init__(self, path, sample_rate, channels=3, chunk_samples=CHUNK_SAMPLES, resolution=0.0,
+                 level=LEVEL, pool=None, workers=1, created=None, **info):
+        self.path = path
+        self.channels = channels
+        self.chunk_samples = chunk_samples
+        self.pool = pool
+        self._encode = partial(_encode_packed, resolution=resolution, level=level)
+        self._max_in_flight = MAX_IN_FLIGHT * (workers if pool is not None else 1)  # Sized from the pool used
+        self._file = open(path, 'wb')
+        fields = [encode_info(info.get(name, ''), width) for name, width in zip(INFO_FIELDS, INFO_WIDTHS)]
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, float(sample_rate), channels,
+                             time.time() if created is None else created, resolution, *fields)
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+        self._pending_t = []
+        self._pending_samples = []
+        self._pending = 0
+        self._in_flight = deque()  # (first time, last time, sample count, encoded bytes or future)
+        self._index = []
+        self.samples_written = 0
+        self.bytes_written = HEADER_SIZE
+
+    def append(self, timestamps, samples):
+        if not len(timestamps):
+            return
+        self._pending_t.append(np.array(timestamps, dtype='<f8'))
+        self._pending_samples.append(np.array(samples, dtype='<f4'))
+        self._pending += len(timestamps)
+        if self._pending >= self.chunk_samples:
+            self._cut(final=False)
+
+    def _cut(self, final):
+        t = np.concatenate(self._pending_t)
+        samples = np.concatenate(self._pending_samples, axis=1)
+        whole = len(t) if final else len(t) - len(t) % self.chunk_samples
+        for start in range(0, whole, self.chunk_samples):
+            stop = min(start + self.chunk_samples, whole)
+            self._submit(t[start:stop], samples[:, start:stop])
+        self._pending_t = [t[whole:]] if whole < len(t) else []
+        self._pending_samples = [samples[:, whole:]] if whole < len(t) else []
+        self._pending = len(t) - whole
+
+    def _submit(self, t, samples):
+        chunk = (t, samples)
+        encoded = self.pool.submit(self._encode, chunk) if self.pool is not None else self._encode(chunk)
+        self._in_flight.append((float(t[0]), float(t[-1]), len(t), encoded))
+        while len(self._in_flight) > self._max_in_flight:
+            self._write_next()
+
+    def _write_next(self):
+        first, last, n, encoded = self._in_flight.popleft()
+        data = encoded if isinstance(encoded, bytes) else encoded.result()
+        self._index.append(INDEX_ENTRY.pack(first, last, self.bytes_written, len(data), n))
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self.samples_written += n
+
+    def close(self):
+        if self._file is None:
+            return
+        if self._pending:
+            self._cut(final=True)
+        while self._in_flight:
+            self._write_next()
+        index_offset = self.bytes_written
+        self._file.write(b''.join(self._index))
+        self._file.write(TRAILER.pack(index_offset, len(self._index), MAGIC))
+        self.bytes_written += len(self._index) * INDEX_ENTRY.size + TRAILER.size
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionArchive:
+    # Read-only view of an archive. Opening reads the header and the chunk
+    # index only; read() decompresses just the chunks a time range touches,
+    # spread over `pool` if given.
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        header = self._file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC or size < HEADER_SIZE + TRAILER.size:
+            raise ValueError(f'{path} is not a session archive')
+        fields = struct.unpack_from(HEADER_FORMAT, header)
+        magic, version, _, self.sample_rate, self.channels, self.created, self.resolution = fields[:7]
+        if version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} session archive')
+        self.info = {name: decode_info(value) for name, value in zip(INFO_FIELDS, fields[7:])}
+        self.__dict__.update(self.info)  # fullname, personal_id, occupation, difficulty
+        self._file.seek(size - TRAILER.size)
+        index_offset, count, magic = TRAILER.unpack(self._file.read(TRAILER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} was not closed properly')
+        self._file.seek(index_offset)
+        index = np.frombuffer(self._file.read(count * INDEX_ENTRY.size), dtype=np.dtype([
+            ('first', '<f8'), ('last', '<f8'), ('offset', '<u8'), ('size', '<u4'), ('samples', '<u4')]))
+        self.first_times = index['first']
+        self.last_times = index['last']
+        self._offsets = index['offset']
+        self._sizes = index['size']
+        self._counts = index['samples']
+        self.sample_count = int(self._counts.sum())
+        self.compressed_bytes = int(self._sizes.sum())
+        self._decode = partial(decode_chunk, channels=self.channels, resolution=self.resolution)
+
+    def __len__(self):
+        return self.sample_count
+
+    @property
+    def chunk_count(self):
+        return len(self._offsets)
+
+    # Archived time span in seconds
+    @property
+    def duration(self):
+        return float(self.last_times[-1] - self.first_times[0]) if self.chunk_count else 0.0
+
+    # Range of chunk numbers holding samples between `start` and `stop` (inclusive)
+    def chunk_range(self, start=None, stop=None):
+        first = 0 if start is None else int(np.searchsorted(self.last_times, start, 'left'))
+        last = self.chunk_count if stop is None else int(np.searchsorted(self.first_times, stop, 'right'))
+        return range(first, max(first, last))
+
+    def _read_chunk(self, index):
+        self._file.seek(int(self._offsets[index]))
+        return self._file.read(int(self._sizes[index]))
+
+    # (timestamps, samples) of chunk `index`
+    def chunk(self, index):
+        return self._decode(self._read_chunk(index))
+
+    def iter_chunks(self, start=None, stop=None):
+        for index in self.chunk_range(start, stop):
+            yield self.chunk(index)
+
+    # (timestamps, samples) recorded between `start` and `stop` (inclusive)
+    def read(self, start=None, stop=None, pool=None):
+        chunks = self.chunk_range(start, stop)
+        data = [self._read_chunk(index) for index in chunks]
+        decoded = list(pool.map(self._decode, data) if pool is not None else map(self._decode, data))
+        if not decoded:
+            return np.empty(0, dtype='<f8'), np.empty((self.channels, 0), dtype='<f4')
+        t = np.concatenate([c[0] for c in decoded])
+        samples = np.concatenate([c[1] for c in decoded], axis=1)
+        lo = 0 if start is None else int(np.searchsorted(t, start, 'left'))
+        hi = len(t) if stop is None else int(np.searchsorted(t, stop, 'right'))
+        return t[lo:hi], samples[:, lo:hi]
+
+    def close(self):
+        self._file.close()
+
+
+# Archive the recording at `source` to `destination`, compressing in `pool` if given
+def archive_recording(source, destination, pool=None, **options):
+    recording = SessionRecording(source)
+    try:
+        with ArchiveWriter(destination, recording.sample_rate, recording.channels, pool=pool,
+                           created=recording.created, **options, **recording.info) as writer:
+            for index in range(recording.block_count):
+                writer.append(*recording.block(index))  # No view outlives the loop, so the map can close
+        return writer.bytes_written
+    finally:
+        recording.close()
+
+
+# Archive each recording into `directory` with the chunks of every file
+# compressed across one pool of `workers` processes. Archives keep the
+# recordings' paths relative to the folder they share (<name>.bta for files in
+# one folder), so recordings of the same name in different folders do not
+# overwrite each other.
+def export_recordings(paths, directory, workers=None, **options):
+    workers = workers or os.cpu_count() or 1
+    paths = [os.path.abspath(path) for path in paths]
+    if len(set(paths)) != len(paths):
+        raise ValueError('a recording is listed more than once')
+    common = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ''
+    archived = []
+    with process_pool(workers) as pool:
+        for path in paths:
+            destination = os.path.join(directory, os.path.splitext(os.path.relpath(path, common))[0] + '.bta')
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            archive_recording(path, destination, pool, workers=workers, **options)
+            archived.append(destination)
+    return archived
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive session recordings in compressed chunks')
+    parser.add_argument('directory', help='directory the archives are written to')
+    parser.add_argument('recordings', nargs='+', help='.btr recordings to archive')
+    parser.add_argument('--workers', type=int, default=None, help='compression processes (default: one per core)')
+    parser.add_argument('--resolution', type=float, default=0.0,
+                        help='round values to multiples of this (default: keep them bit-exact)')
+    parser.add_argument('--level', type=int, default=LEVEL, help='zlib compression level')
+    args = parser.parse_args()
+    raw = sum(os.path.getsize(path) for path in args.recordings)
+    archived = export_recordings(args.recordings, args.directory, args.workers,
+                                 resolution=args.resolution, level=args.level)
+    size = sum(os.path.getsize(path) for path in archived)
+    print(f'{len(archived)} recordings, {raw / 1e6:.1f} MB -> {size / 1e6:.1f} MB ({raw / max(size, 1):.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+# Instructor dashboard: live sparklines and alarm lights of every session
+# hosted by the session server, in one grid. The server already decimates each
+# stream to a few points per pixel; a background thread waits on all the
+# subscriptions at once and queues their frames, and one render tick drains
+# the queues and updates every tile's curves in place.
+#
+#   python -m babytrainer.dashboard /run/babytrainer [--seconds 30] [--columns 8]
+import argparse
+import queue
+import select
+import sys
+import threading
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication, QLabel, QMainWindow, QVBoxLayout, QWidget
+
+from babytrainer.acquisition import SpscQueue
+from babytrainer.engine import QUEUE_SECONDS
+from babytrainer.plotting import Y_MARGIN
+from babytrainer.ring_buffer import RingBuffer
+from babytrainer.server import SessionClient
+from babytrainer.training_spec import DIFFICULTIES
+
+WINDOW_SECONDS = 30.0  # History shown in every sparkline
+SPARKLINE_PIXELS = 240  # Expected tile width; with POINTS_PER_PIXEL sets the rate asked of the server
+POINTS_PER_PIXEL = 2  # One min/max pair per pixel column
+COLUMNS = 8
+INTERVAL_MS = 200  # Shared render tick of all tiles, about one pixel column of a 30 s sparkline
+DISCOVER_SECONDS = 2.0  # How often the server is asked for new sessions
+Y_RANGE = (-1.0, 1.5)  # Initial y range in units of each channel's threshold, the threshold sits at 1
+BACKGROUNDS = {'red': (90, 10, 10), 'green': (10, 60, 10)}  # Tile background while in alarm / not
+
+
+class SessionFeed:
+    # The decimated stream of one session: the feed thread queues its frames,
+    # the render tick drains them. `alarms` is the channel bit mask of the
+    # newest frame, `finished` is set once the session has closed.
+    def __init__(self, session_id, difficulty, subscription):
+        self.session_id = session_id
+        self.difficulty = difficulty
+        self.subscription = subscription
+        self.channels = subscription.info['channels']
+        # The server sends at least one min/max pair per tick, whatever rate was asked for
+        self.rate = max(subscription.info['points'], 2 / subscription.info['interval'])
+        self.queue = SpscQueue(self.channels, int(self.rate * QUEUE_SECONDS))
+        self.alarms = 0
+        self.frames = 0
+        self.finished = False
+
+    # Feed thread: queue every frame that has arrived, without waiting
+    def receive(self):
+        while True:
+            frame = self.subscription.read(0)
+            if frame is None:
+                break
+            _, alarms, timestamps, samples = frame
+            self.queue.push(timestamps, samples)
+            self.alarms = alarms
+            self.frames += 1
+        self.finished = self.subscription.finished
+
+
+class DashboardFeed:
+    # Background thread that finds the sessions hosted in `directory`,
+    # subscribes to each at `points` per second and waits on all of the
+    # subscriptions with one select(). New SessionFeeds are handed to the GUI
+    # thread through `added`.
+    def __init__(self, directory, points, discover_interval=DISCOVER_SECONDS):
+        self.client = SessionClient(directory)
+        self.points = points
+        self.discover_interval = discover_interval
+        self.added = queue.SimpleQueue()
+        self.feeds = {}  # Session id -> SessionFeed, only touched by the feed thread
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='dashboard-feed', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        for feed in self.feeds.values():
+            feed.subscription.close()
+        self.feeds.clear()
+
+    def discover(self):
+        try:
+            sessions = self.client.sessions()
+        except (OSError, ValueError):
+            return  # No server (yet), try again later
+        for session_id, difficulty in sessions.items():
+            if session_id in self.feeds:
+                continue
+            try:
+                subscription = self.client.subscribe(session_id, self.points)
+            except (OSError, ValueError):
+                continue  # Closed since it was listed
+            feed = self.feeds[session_id] = SessionFeed(session_id, difficulty, subscription)
+            self.added.put(feed)
+
+    def _run(self):
+        next_discovery = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_discovery:
+                self.discover()
+                next_discovery = time.monotonic() + self.discover_interval
+            feeds = {feed.subscription: feed for feed in self.feeds.values()}
+            if not feeds:
+                self._stop.wait(0.05)
+                continue
+            for subscription in select.select(list(feeds), [], [], 0.05)[0]:
+                feed = feeds[subscription]
+                feed.receive()
+                if feed.finished:
+                    subscription.close()
+                    del self.feeds[feed.session_id]
+
+
+class SessionTile:
+    # Sparkline of one session: every channel of its level scaled to its own
+    # threshold (so one line at 1 serves them all), the newest
+    # `window_seconds` ending at x = 0, and the background as the alarm light
+    def __init__(self, feed, window_seconds):
+        spec = DIFFICULTIES.get(feed.difficulty, DIFFICULTIES['Easy'])
+        self.feed = feed
+        self.plot = pg.PlotItem(title=f'{feed.session_id} ({spec.name})')
+        for axis in ('left', 'bottom'):
+            self.plot.hideAxis(axis)
+        self.plot.setMouseEnabled(False, False)
+        self.plot.setMenuEnabled(False)
+        self.plot.hideButtons()
+        self.plot.setXRange(-window_seconds, 0, padding=0)
+        self.y_range = Y_RANGE
+        self.plot.setYRange(*self.y_range, padding=0)
+        self.plot.addLine(y=1.0, pen='y')
+        self.scales = {c.channel: 1.0 / c.threshold for c in spec.channels}
+        self.curves = {}  # Plain curve items: no scatter points or downsampling to go through on every update
+        for c in spec.channels:
+            self.curves[c.channel] = pg.PlotCurveItem(pen=c.pen)
+            self.plot.addItem(self.curves[c.channel])
+        self.buffer = RingBuffer(feed.channels, feed.rate, window_seconds)
+        self.indicator_colour = None
+        self.set_indicator('green')
+
+    def set_indicator(self, colour):
+        if colour != self.indicator_colour:
+            self.indicator_colour = colour
+            self.plot.getViewBox().setBackgroundColor(BACKGROUNDS[colour])
+
+    # Move the queued points into the window and redraw the curves in place
+    def refresh(self):
+        self.set_indicator('red' if self.feed.alarms else 'green')
+        if not self.feed.queue.drain_into(self.buffer):
+            return
+        timestamps, samples = self.buffer.latest()
+        x = timestamps - timestamps[-1]
+        low, high = self.y_range
+        for channel, curve in self.curves.items():
+            y = samples[channel] * self.scales[channel]
+            curve.setData(x, y)
+            if np.isfinite(y).any():
+                low, high = min(low, float(np.nanmin(y))), max(high, float(np.nanmax(y)))
+        if (low, high) != self.y_range:  # The range only ever grows, so this is rare
+            margin = (high - low) * Y_MARGIN
+            self.y_range = (low - margin, high + margin)
+            self.plot.setYRange(*self.y_range, padding=0)
+
+
+class DashboardWindow(QMainWindow):
+    # Grid of SessionTiles, sorted by session id, in one GraphicsLayoutWidget
+    # (one view and scene for all of them). Sessions appear as the server
+    # opens them and disappear once they close.
+    def __init__(self, directory, window_seconds=WINDOW_SECONDS, columns=COLUMNS, interval_ms=INTERVAL_MS,
+                 pixels=SPARKLINE_PIXELS):
+        super().__init__()
+        self.setWindowTitle('Instructor Dashboard')
+        self.window_seconds = window_seconds
+        self.columns = columns
+        self.tiles = {}  # Session id -> SessionTile
+        self.feed = DashboardFeed(directory, POINTS_PER_PIXEL * pixels / window_seconds)
+
+        self.status_label = QLabel()
+        self.graphics = pg.GraphicsLayoutWidget()
+        layout = QVBoxLayout()
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.graphics)
+        central_widget = QWidget()
+        central_widget.setLayout(layout)
+        self.setCentralWidget(central_widget)
+        self.update_status()
+
+        self.render_timer = QTimer()
+        self.render_timer.timeout.connect(self.update_tiles)
+        self.render_timer.start(interval_ms)
+        self.feed.start()
+
+    # The shared render tick: add new sessions, refresh every tile, drop closed ones
+    def update_tiles(self):
+        changed = False
+        while True:
+            try:
+                feed = self.feed.added.get_nowait()
+            except queue.Empty:
+                break
+            self.tiles[feed.session_id] = SessionTile(feed, self.window_seconds)
+            changed = True
+        for session_id, tile in list(self.tiles.items()):
+            tile.refresh()
+            if tile.feed.finished and not len(tile.feed.queue):
+                del self.tiles[session_id]
+                changed = True
+        if changed:
+            self.graphics.clear()
+            for position, session_id in enumerate(sorted(self.tiles)):
+                self.graphics.addItem(self.tiles[session_id].plot, position // self.columns, position % self.columns)
+        self.update_status()
+
+    def update_status(self):
+        alarms = sum(tile.indicator_colour == 'red' for tile in self.tiles.values())
+        text = f'{len(self.tiles)} sessions, {alarms} in alarm'
+        if text != self.status_label.text():
+            self.status_label.setText(text)
+
+    def closeEvent(self, event):
+        self.render_timer.stop()
+        self.feed.stop()
+        super().closeEvent(event)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch every session hosted by a session server')
+    parser.add_argument('directory', help='directory of the session server sockets')
+    parser.add_argument('--seconds', type=float, default=WINDOW_SECONDS, help='history shown per session')
+    parser.add_argument('--columns', type=int, default=COLUMNS)
+    args = parser.parse_args()
+    app = QApplication(sys.argv)
+    window = DashboardWindow(args.directory, args.seconds, args.columns)
+    window.resize(1600, 900)
+    window.show()
+    sys.exit(app.exec())
+
+
+if __name__ == '__main__':
+    main()
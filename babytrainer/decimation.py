@@ -0,0 +1,206 @@
+# Min/max level-of-detail pyramid for drawing long traces at screen resolution
+import math
+
+import numpy as np
+
+
+# Min/max of each of `buckets` equal slices of a (timestamps, samples) batch,
+# as a zig-zag of two points per bucket (the minima at even, the maxima at odd
+# positions) stamped with the time the bucket starts. Batches that already
+# fit are returned unchanged.
+def decimate(timestamps, samples, buckets):
+    n = len(timestamps)
+    buckets = max(1, int(buckets))
+    if n <= 2 * buckets:
+        return timestamps, samples
+    starts = np.linspace(0, n, buckets + 1).astype(np.intp)[:-1]
+    x = np.repeat(timestamps[starts], 2)
+    y = np.empty((samples.shape[0], len(x)), dtype=samples.dtype)
+    y[:, 0::2] = np.minimum.reduceat(samples, starts, axis=1)
+    y[:, 1::2] = np.maximum.reduceat(samples, starts, axis=1)
+    return x, y
+
+
+class GrowableArray:
+    # Append-only 2-D array (rows x samples) with amortised O(1) appends. With
+    # keep_last() it holds only the newest columns; `offset` is then the
+    # absolute index of the first one held and `end` one past the newest.
+    def __init__(self, rows, dtype, capacity=4096):
+        self._data = np.empty((rows, capacity), dtype=dtype)
+        self.size = 0
+        self.offset = 0
+
+    @property
+    def end(self):
+        return self.offset + self.size
+
+    def extend(self, block):
+        n = block.shape[1]
+        if self.size + n > self._data.shape[1]:
+            grown = np.empty((self._data.shape[0], max(2 * self._data.shape[1], self.size + n)),
+                             dtype=self._data.dtype)
+            grown[:, :self.size] = self._data[:, :self.size]
+            self._data = grown
+        self._data[:, self.size:self.size + n] = block
+        self.size += n
+
+    # Drop all but the newest n columns. They are only moved to the front once
+    # at least n can be dropped, so this stays amortised O(1) and the storage
+    # stops growing at about 2n columns.
+    def keep_last(self, n):
+        drop = self.size - n
+        if drop < n:
+            return
+        self._data[:, :n] = self._data[:, drop:self.size]
+        self.offset += drop
+        self.size = n
+
+    # Zero-copy view of the filled part
+    @property
+    def values(self):
+        return self._data[:, :self.size]
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+
+class MinMaxPyramid:
+    # Keeps the samples of a session plus min/max summaries at bucket sizes of
+    # factor, factor**2, ... samples, each bucket stamped with the time of its
+    # first sample. Levels are extended as samples arrive, so each append only
+    # reduces the newly completed buckets. With `horizon` every level (the raw
+    # samples included) keeps only its newest `horizon` entries: level k then
+    # reaches horizon * factor**k samples back, older stretches are drawn from
+    # the coarser levels, and memory grows with the log of the session length
+    # rather than the length.
+    def __init__(self, channels, factor=8, dtype=np.float32, horizon=None):
+        if factor < 2:
+            raise ValueError('factor must be at least 2')
+        if horizon is not None and horizon < factor:
+            raise ValueError('horizon must be at least factor')
+        self.channels = channels
+        self.factor = factor
+        self.horizon = horizon
+        self._times = GrowableArray(1, np.float64)
+        self._raw = GrowableArray(channels, dtype)
+        self._levels = []  # Level k (k >= 1) is a (times, mins, maxs) triple of GrowableArrays
+
+    # Samples appended so far, whether still held at full resolution or not
+    def __len__(self):
+        return self._raw.end
+
+    @property
+    def level_count(self):
+        return len(self._levels)
+
+    # Time of the newest sample (None while empty)
+    @property
+    def last_time(self):
+        return self._times.values[0, -1] if self._times.size else None
+
+    # Bytes of storage held, raw samples and every level
+    @property
+    def nbytes(self):
+        return sum(part.nbytes for part in self._parts())
+
+    def _parts(self):
+        yield self._times
+        yield self._raw
+        for level in self._levels:
+            yield from level
+
+    # Sample sink interface: append a (timestamps, samples) batch
+    def append(self, timestamps, samples):
+        if not len(timestamps):
+            return
+        self._times.extend(np.reshape(timestamps, (1, -1)))
+        self._raw.extend(samples)
+        lower_times, lower_min, lower_max = self._times, self._raw, self._raw
+        level = 0
+        while lower_min.end >= self.factor:
+            if level == len(self._levels):
+                self._levels.append((GrowableArray(1, np.float64), GrowableArray(self.channels, self._raw.values.dtype),
+                                     GrowableArray(self.channels, self._raw.values.dtype)))
+            times, mins, maxs = self._levels[level]
+            complete = lower_min.end // self.factor
+            new = complete - mins.end
+            if new <= 0:
+                break  # Nothing completed here, so nothing can complete above either
+            # Fewer than `factor` entries of a level are ever waiting to be reduced, so they are still held
+            lo, hi = mins.end * self.factor - lower_min.offset, complete * self.factor - lower_min.offset
+            times.extend(lower_times.values[:, lo:hi:self.factor])
+            mins.extend(lower_min.values[:, lo:hi].reshape(self.channels, new, self.factor).min(axis=2))
+            maxs.extend(lower_max.values[:, lo:hi].reshape(self.channels, new, self.factor).max(axis=2))
+            lower_times, lower_min, lower_max = times, mins, maxs
+            level += 1
+        if self.horizon is not None:
+            for part in self._parts():
+                part.keep_last(self.horizon)
+
+    # (times, mins, maxs, offset) held at `level` for one channel; level 0 is the raw samples
+    def _level(self, level, channel):
+        if level == 0:
+            raw = self._raw.values[channel]
+            return self._times.values[0], raw, raw, self._raw.offset
+        times, mins, maxs = self._levels[level - 1]
+        return times.values[0], mins.values[channel], maxs.values[channel], mins.offset
+
+    # Per-pixel min/max envelope of one channel between times t0 and t1 for a
+    # plot `pixels` wide. Returns (x, y) ready for PlotDataItem.setData: the raw
+    # samples (as views) when they already fit, otherwise one (min, max) pair
+    # per pixel column drawn as a vertical zig-zag.
+    def envelope(self, channel, t0, t1, pixels):
+        pixels = max(1, int(pixels))
+        # The finest level still holding t0 gives the range in samples
+        finest = 0
+        while True:
+            times, _, _, offset = self._level(finest, channel)
+            if not offset or times[0] <= t0 or finest == len(self._levels):
+                break
+            finest += 1
+        size = self.factor ** finest
+        # Widen by one entry each side so the trace reaches the plot edges
+        j0 = max(0, int(np.searchsorted(times, t0, 'left')) - 1)
+        j1 = min(len(times), int(np.searchsorted(times, t1, 'right')) + 1)
+        i0, i1 = (offset + j0) * size, min(len(self), (offset + j1) * size)  # Absolute sample indices
+        n = i1 - i0
+        if finest == 0 and n <= 2 * pixels:
+            raw = self._raw.values[channel]
+            return times[j0:j1], raw[j0:j1]
+
+        level = max(finest, min(len(self._levels), int(math.log(max(n, 1) / pixels, self.factor))))
+        times, mins, maxs, offset = self._level(level, channel)
+        size = self.factor ** level  # Samples per bucket at this level
+        b0 = max(i0 // size, offset)
+        b1 = min(-(-i1 // size), offset + len(mins))
+        xs, lows, highs = [], [], []
+        if b1 > b0:
+            starts = np.unique(np.linspace(b0, b1, pixels + 1).astype(np.intp)[:-1])
+            xs.append(times[starts - offset])
+            lows.append(np.minimum.reduceat(mins[b0 - offset:b1 - offset], starts - b0))
+            highs.append(np.maximum.reduceat(maxs[b0 - offset:b1 - offset], starts - b0))
+        tail = max(i0, b1 * size)
+        if tail < i1:
+            # Samples past the last complete bucket, reduced from the finer levels they are still
+            # complete in and finally the raw samples, drawn as one column
+            tail_x, tail_lows, tail_highs = None, [], []
+            for finer in range(level - 1, -1, -1):
+                times, mins, maxs, offset = self._level(finer, channel)
+                step = self.factor ** finer
+                first = max(tail // step, offset)
+                last = min(-(-i1 // step), offset + len(mins))
+                if last > first:
+                    tail_x = times[first - offset] if tail_x is None else tail_x
+                    tail_lows.append(mins[first - offset:last - offset].min())
+                    tail_highs.append(maxs[first - offset:last - offset].max())
+                tail = max(tail, last * step)
+            if tail_x is not None:
+                xs.append([tail_x])
+                lows.append([min(tail_lows)])
+                highs.append([max(tail_highs)])
+        x = np.repeat(np.concatenate(xs), 2)
+        y = np.empty(len(x), dtype=self._raw.values.dtype)
+        y[0::2] = np.concatenate(lows)
+        y[1::2] = np.concatenate(highs)
+        return x, y
@@ -0,0 +1,291 @@
+# Streaming signal processing between the sensor and the plots: stateful
+# filters and derived signals computed over whole (timestamps, samples)
+# batches into preallocated outputs. Every stage carries its state across
+# batches and does the same arithmetic for each sample however the stream is
+# chunked, so chunked output is bit-for-bit the offline (one batch) output.
+import math
+import time
+
+import numpy as np
+
+
+# Scratch array of at least (rows, n), reallocated only when too small
+def _reserve(array, rows, n):
+    if array is None or array.shape[0] != rows or array.shape[1] < n:
+        array = np.empty((rows, max(n, 1024)))
+    return array
+
+
+class Stage:
+    # Base class of the pipeline stages. process() returns the output as a
+    # view into storage reused by the next call.
+    _out = None
+
+    # Rows produced from `rows` input rows (derived signals add rows)
+    def output_rows(self, rows):
+        return rows
+
+    def reset(self):
+        pass
+
+    def process(self, timestamps, samples):
+        raise NotImplementedError
+
+    def _output(self, rows, n):
+        self._out = _reserve(self._out, rows, n)
+        return self._out[:, :n]
+
+
+class _Smoother:
+    # First-order recursive filter y[k] = a x[k] + c y[k-1] (c = 1 - a) for
+    # several rows at once, solved in closed form over blocks of samples:
+    #   y[k] = c^(k+1) y0 + a c^k sum_{j<=k} c^-j x[j]
+    # with k and j counted from the block start and y0 the output before it.
+    # Blocks start at fixed sample counts and the running sum is carried from
+    # batch to batch, so no sample's arithmetic depends on the chunking. Blocks
+    # are short enough that c^-k stays far from overflowing.
+    def __init__(self, a):
+        if not 0 < a <= 1:
+            raise ValueError('smoothing coefficient must be in (0, 1]')
+        c = 1.0 - a
+        self.block = 1 if c == 0 else int(min(4096, max(1, 100 / -math.log10(c))))
+        k = np.arange(self.block)
+        self._inverse = c ** -k if c else np.ones(1)
+        self._decay = c ** (k + 1)
+        self._gain = a * c ** k
+        self._work = np.empty((0, self.block + 1))
+        self.reset()
+
+    def reset(self):
+        self._y0 = None  # Output just before the current block
+        self._sum = None  # Running sum of c^-j x[j] within the current block
+        self._offset = 0  # Samples of the current block already seen
+
+    def process(self, x, out):
+        rows, n = x.shape
+        if not n:
+            return
+        if self._y0 is None:
+            self._y0 = x[:, 0].astype(np.float64)  # Start settled on the first sample
+            self._sum = np.zeros(rows)
+        if self._work.shape[0] != rows:
+            self._work = np.empty((rows, self.block + 1))
+        done = 0
+        while done < n:
+            m = min(n - done, self.block - self._offset)
+            k = slice(self._offset, self._offset + m)
+            work = self._work[:, :m + 1]
+            work[:, 0] = self._sum
+            np.multiply(x[:, done:done + m], self._inverse[k], out=work[:, 1:])
+            np.add.accumulate(work, axis=1, out=work)
+            self._sum = work[:, m].copy()
+            segment = out[:, done:done + m]
+            np.multiply(self._y0[:, None], self._decay[k], out=segment)
+            np.multiply(work[:, 1:], self._gain[k], out=work[:, 1:])
+            segment += work[:, 1:]
+            done += m
+            self._offset += m
+            if self._offset == self.block:
+                self._y0 = segment[:, -1].copy()
+                self._sum[:] = 0.0
+                self._offset = 0
+
+
+class _Slope:
+    # dx/dt of several rows against the sample timestamps, carrying the last
+    # sample of each batch into the next. Zero for the very first sample and
+    # wherever timestamps do not advance.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._t = None
+        self._x = None
+
+    def process(self, timestamps, x, out, dt):
+        if not len(timestamps):
+            return
+        if self._t is None:
+            self._t, self._x = timestamps[0], x[:, 0].copy()
+        np.subtract(x[:, 1:], x[:, :-1], out=out[:, 1:])
+        np.subtract(x[:, 0], self._x, out=out[:, 0])
+        np.subtract(timestamps[1:], timestamps[:-1], out=dt[1:])
+        dt[0] = timestamps[0] - self._t
+        moving = dt > 0
+        np.divide(out, dt, out=out, where=moving)
+        out[:, ~moving] = 0.0
+        self._t, self._x = timestamps[-1], x[:, -1].copy()
+
+
+def _rows(rows, count):
+    return list(range(count)) if rows is None else list(rows)
+
+
+class LowPass(Stage):
+    # Low-pass filter on `rows` (default: all), other rows pass through. A
+    # cascade of `order` identical first-order sections, each tuned so the
+    # whole cascade is 3 dB down at `cutoff` Hz; it never overshoots a step.
+    def __init__(self, cutoff, sample_rate, order=2, rows=None):
+        if not 0 < cutoff < sample_rate / 2:
+            raise ValueError('cutoff must be between 0 and half the sample rate')
+        self.cutoff = cutoff
+        self.sample_rate = sample_rate
+        self.rows = rows
+        section_cutoff = cutoff / math.sqrt(2.0 ** (1.0 / order) - 1.0)
+        a = 1.0 - math.exp(-2.0 * math.pi * min(section_cutoff, sample_rate / 2) / sample_rate)
+        self.sections = [_Smoother(a) for _ in range(order)]
+        self._selected = None
+
+    def reset(self):
+        for section in self.sections:
+            section.reset()
+
+    def process(self, timestamps, samples):
+        out = self._output(*samples.shape)
+        out[...] = samples
+        rows = _rows(self.rows, samples.shape[0])
+        self._selected = _reserve(self._selected, len(rows), samples.shape[1])
+        selected = self._selected[:, :samples.shape[1]]
+        np.take(samples, rows, axis=0, out=selected)
+        for section in self.sections:
+            section.process(selected, selected)  # Each sample is read before it is overwritten
+        out[rows] = selected
+        return out
+
+
+class MovingAverage(Stage):
+    # Mean of the last `length` samples on `rows` (default: all), other rows
+    # pass through. The window starts out filled with the first sample.
+    def __init__(self, length, rows=None):
+        if length < 1:
+            raise ValueError('length must be at least 1')
+        self.length = length
+        self.rows = rows
+        self._extended = None
+        self._sums = None
+        self.reset()
+
+    def reset(self):
+        self._history = None  # Last length - 1 input samples of each averaged row
+
+    def process(self, timestamps, samples):
+        out = self._output(*samples.shape)
+        out[...] = samples
+        n = samples.shape[1]
+        if not n or self.length == 1:
+            return out
+        rows = _rows(self.rows, samples.shape[0])
+        if self._history is None:
+            self._history = np.repeat(samples[rows, :1], self.length - 1, axis=1)
+        self._extended = _reserve(self._extended, len(rows), self.length - 1 + n)
+        self._sums = _reserve(self._sums, len(rows), n)
+        extended = self._extended[:, :self.length - 1 + n]
+        extended[:, :self.length - 1] = self._history
+        extended[:, self.length - 1:] = samples[rows]
+        # Each window is summed on its own, in the same order whatever the chunking
+        windows = np.lib.stride_tricks.sliding_window_view(extended, self.length, axis=1)
+        sums = np.sum(windows, axis=2, out=self._sums[:, :n])
+        sums /= self.length
+        out[rows] = sums
+        self._history = extended[:, n:].copy()
+        return out
+
+
+class Derivative(Stage):
+    # Appends the rate of change of `row` per second (e.g. angular velocity
+    # from angular displacement) as a new last row
+    def __init__(self, row):
+        self.row = row
+        self._slope = _Slope()
+        self._dt = None
+
+    def output_rows(self, rows):
+        return rows + 1
+
+    def reset(self):
+        self._slope.reset()
+
+    def process(self, timestamps, samples):
+        rows, n = samples.shape
+        out = self._output(rows + 1, n)
+        out[:rows] = samples
+        self._dt = _reserve(self._dt, 1, n)
+        self._slope.process(timestamps, samples[self.row:self.row + 1], out[rows:], self._dt[0, :n])
+        return out
+
+
+class Phase(Stage):
+    # Appends the relative phase of `row` to `reference_row` in degrees,
+    # wrapped to [-180, 180): the difference of their phase-plane angles
+    # atan2(velocity / (2 pi frequency), value - slow mean), where `frequency`
+    # is the typical movement frequency used to scale velocity to amplitude
+    # and the slow mean is a low-pass at `mean_cutoff` Hz.
+    def __init__(self, row, reference_row, sample_rate, frequency=0.5, mean_cutoff=0.05):
+        self.row = row
+        self.reference_row = reference_row
+        self.scale = 1.0 / (2.0 * math.pi * frequency)
+        self._mean = _Smoother(1.0 - math.exp(-2.0 * math.pi * mean_cutoff / sample_rate))
+        self._slope = _Slope()
+        self._work = None
+        self._dt = None
+
+    def output_rows(self, rows):
+        return rows + 1
+
+    def reset(self):
+        self._mean.reset()
+        self._slope.reset()
+
+    def process(self, timestamps, samples):
+        rows, n = samples.shape
+        out = self._output(rows + 1, n)
+        out[:rows] = samples
+        self._work = _reserve(self._work, 6, n)
+        self._dt = _reserve(self._dt, 1, n)
+        x, centred, velocity = self._work[:2, :n], self._work[2:4, :n], self._work[4:, :n]
+        np.take(samples, [self.row, self.reference_row], axis=0, out=x)
+        self._mean.process(x, centred)
+        np.subtract(x, centred, out=centred)
+        self._slope.process(timestamps, x, velocity, self._dt[0, :n])
+        velocity *= self.scale
+        angles = np.arctan2(velocity, centred, out=velocity)
+        phase = out[rows]
+        np.subtract(angles[0], angles[1], out=phase)
+        np.degrees(phase, out=phase)
+        phase += 180.0
+        np.mod(phase, 360.0, out=phase)
+        phase -= 180.0
+        return out
+
+
+class Pipeline:
+    # Chain of stages used as a sample sink: each batch is run through every
+    # stage and the result handed to `sinks`. With `metrics` (a TickMetrics)
+    # set, the time spent in the stages is charged to its 'dsp' stage.
+    def __init__(self, stages, channels, sinks=(), metrics=None):
+        self.stages = list(stages)
+        self.channels = channels
+        for stage in self.stages:
+            self.channels = stage.output_rows(self.channels)
+        self.sinks = list(sinks)
+        self.metrics = metrics
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    # Run one batch through the stages, returns the output rows (reused by the next call)
+    def process(self, timestamps, samples):
+        for stage in self.stages:
+            samples = stage.process(timestamps, samples)
+        return samples
+
+    def append(self, timestamps, samples):
+        if not len(timestamps):
+            return
+        start = time.perf_counter()
+        samples = self.process(timestamps, samples)
+        if self.metrics is not None:
+            self.metrics.add(None, 'dsp', time.perf_counter() - start)
+        for sink in self.sinks:
+            sink.append(timestamps, samples)
@@ -0,0 +1,120 @@
+# Headless processing core of one training session: acquisition, the rolling
+# window, the whole-session history, threshold rules, scoring and recording. The
+# training windows draw from it and the session server runs many of them
+# without any Qt at all.
+from babytrainer.acquisition import AcquisitionWorker, SpscQueue
+from babytrainer.alerts import AlertEngine, ThresholdRule
+from babytrainer.decimation import MinMaxPyramid
+from babytrainer.dsp import Derivative, LowPass, MovingAverage, Phase, Pipeline
+from babytrainer.metrics import TimedSink
+from babytrainer.recording import SessionRecorder
+from babytrainer.ring_buffer import RingBuffer
+from babytrainer.scoring import SessionScore
+from babytrainer.sources import ANGULAR, CHANNELS, FORCE, SyntheticSource
+
+QUEUE_SECONDS = 5.0  # How far the consumer may fall behind the sensor before samples are dropped
+HISTORY_SECONDS = 60.0  # Session history held at each level of detail; older stretches are drawn coarser
+# Rows after processing: the filtered sensor channels followed by derived signals
+DERIVED = ('angular_velocity', 'force_angle_phase')
+SIGNALS = CHANNELS + DERIVED
+ANGULAR_VELOCITY, FORCE_ANGLE_PHASE = range(len(CHANNELS), len(SIGNALS))
+MOVEMENT_HZ = 0.5  # Typical hip-examination movement frequency, scales velocities for the phase
+
+
+# Simulated trainer for a difficulty level, from the waveforms of its channels
+def simulated_source(spec, sample_rate=None, batch_size=10, realtime=True):
+    return SyntheticSource(sample_rate or spec.sample_rate, batch_size=batch_size, realtime=realtime,
+                           **{CHANNELS[c.channel]: c.simulation for c in spec.channels})
+
+
+# Filter chain for a difficulty level: each channel's low-pass and moving
+# average from its spec, then angular velocity and force-angle phase
+def build_pipeline(spec, sample_rate, metrics=None):
+    stages = []
+    for cutoff in sorted({c.cutoff for c in spec.channels if c.cutoff and c.cutoff < sample_rate / 2}):
+        stages.append(LowPass(cutoff, sample_rate, rows=[c.channel for c in spec.channels if c.cutoff == cutoff]))
+    for smoothing in sorted({c.smoothing for c in spec.channels if c.smoothing}):
+        stages.append(MovingAverage(max(1, round(smoothing * sample_rate)),
+                                    rows=[c.channel for c in spec.channels if c.smoothing == smoothing]))
+    stages.append(Derivative(ANGULAR))
+    stages.append(Phase(FORCE, ANGULAR, sample_rate, MOVEMENT_HZ))
+    return Pipeline(stages, len(CHANNELS), metrics=metrics)
+
+
+class SessionEngine:
+    # Samples are read on a background thread into a lock-free queue; poll()
+    # runs whatever arrived through the filter pipeline into the buffer,
+    # history, alert rules and score (rows as in SIGNALS), and hands the raw samples
+    # to the recorder, all on the caller's thread. With `metrics` (a
+    # TickMetrics) set, the time of each sink is charged to its stage.
+    def __init__(self, spec, source=None, recording_path=None, on_alert=None, metrics=None, **info):
+        self.spec = spec
+        self.metrics = metrics
+        self.source = source if source is not None else simulated_source(spec)
+        self.sample_queue = SpscQueue(self.source.channels, int(self.source.sample_rate * QUEUE_SECONDS))
+        self.acquisition = AcquisitionWorker(self.source, self.sample_queue)
+        if self.source.processed:  # Filtered and derived elsewhere (e.g. by the session server) already
+            self.pipeline = Pipeline([], self.source.channels, metrics=metrics)
+        else:
+            self.pipeline = build_pipeline(spec, self.source.sample_rate, metrics)
+        self.sample_sinks = [self.pipeline]  # Everything the raw samples are handed to
+        self.buffer = RingBuffer(self.pipeline.channels, self.source.sample_rate, spec.window_seconds)
+        # Whole session, for zooming and panning back in time, in memory that grows with the log of its length
+        self.history = MinMaxPyramid(self.pipeline.channels, horizon=int(self.source.sample_rate * HISTORY_SECONDS))
+        # Threshold rules are evaluated over every incoming sample, not just the newest one
+        self.alerts = AlertEngine([ThresholdRule(c.channel, c.threshold, c.hysteresis, c.min_dwell, name=c.name)
+                                   for c in spec.channels], on_change=on_alert)
+        self.add_sink(self.buffer, 'acquisition')
+        self.add_sink(self.history, 'acquisition')
+        self.add_sink(self.alerts, 'alerts')
+        # A processed source is a view of a session hosted elsewhere, which records and scores it itself:
+        # its decimated, filtered stream is neither a recording nor fit to score
+        self.score = None
+        if not self.source.processed:
+            self.score = SessionScore(spec, self.alerts)  # Reads the crossings the alert rules just produced
+            self.add_sink(self.score, 'scoring')
+
+        # Record the session to disk (on a background writer thread) if asked to
+        self.recorder = None
+        if recording_path and not self.source.processed:
+            self.recorder = SessionRecorder(recording_path, self.source.sample_rate, self.source.channels, **info)
+            self.add_sink(self.recorder, 'recording', raw=True)
+
+    # Hand the processed samples (or with `raw` the samples as read) to `sink`
+    # too, charging its time to `stage` when profiling
+    def add_sink(self, sink, stage, raw=False):
+        if self.metrics is not None:
+            sink = TimedSink(sink, self.metrics, stage)
+        (self.sample_sinks if raw else self.pipeline.sinks).append(sink)
+
+    def is_running(self):
+        return self.acquisition.is_running()
+
+    # Why acquisition ended on its own (e.g. the trainer could not be reached), None while all is well
+    @property
+    def error(self):
+        return self.acquisition.error
+
+    def start(self):
+        self.acquisition.start()  # No-op if the worker is already running
+
+    def stop(self):
+        self.acquisition.stop()
+
+    # Hand every queued sample to the sinks, returns how many there were
+    def poll(self):
+        return self.sample_queue.drain_into(*self.sample_sinks)
+
+    # Zero-copy (timestamps, samples) views of the newest n samples in the rolling window
+    def latest(self, n):
+        timestamps, samples = self.buffer.latest()
+        n = min(n, len(timestamps))
+        return timestamps[len(timestamps) - n:], samples[:, samples.shape[1] - n:]
+
+    # Stop acquiring and make sure the recording is complete
+    def close(self):
+        self.stop()
+        if self.recorder is not None:
+            self.sample_queue.drain_into(self.recorder)
+            self.recorder.close()
+            self.recorder = None
@@ -0,0 +1,200 @@
+# Profiling of the training windows' render loop: per-tick stage timings,
+# timer jitter and missed ticks kept in fixed-size histograms, exported as a
+# JSON or Prometheus text snapshot over localhost. Qt-free, so ops tooling and
+# the benchmarks can use it without a display.
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds: 1-2-5 steps from 10 us to 10 s
+BUCKETS = tuple(m * 10.0 ** e for e in range(-5, 1) for m in (1, 2, 5)) + (10.0,)
+
+# Per-tick stages of a training window: time spent filtering, handing samples
+# to the buffers, evaluating the threshold rules, scoring, writing the
+# recording, in setData and in paint events
+TICK_STAGES = ('dsp', 'acquisition', 'alerts', 'scoring', 'recording', 'update', 'paint')
+# Recorded for every tick on top of its stages: the whole tick, how late the
+# timer fired and how far the queue was behind the sensor when the tick started
+TICK_TOTALS = ('tick', 'jitter', 'backlog')
+
+
+class Histogram:
+    # Counts per fixed bucket plus count/sum/max; observing is a bisect and an
+    # increment, and memory does not grow with the number of observations
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last bucket holds values above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    # Upper bound of the bucket holding the q-th quantile (never above the largest value seen)
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def snapshot(self):
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            cumulative.append([bound, seen])
+        return {'count': self.count, 'sum': self.sum, 'max': self.max,
+                'p50': self.quantile(0.5), 'p99': self.quantile(0.99), 'buckets': cumulative}
+
+
+class TickMetrics:
+    # Collects the stages of each timer tick. Paint events arrive after
+    # update_plots has returned, so stage times accumulate until the next tick
+    # starts and are then recorded together as one tick.
+    def __init__(self, interval, fps_window=1.0, stages=TICK_STAGES):
+        self.interval = interval  # Timer period in seconds
+        self.fps_window = fps_window
+        self.histograms = {stage: Histogram() for stage in stages + TICK_TOTALS}
+        self.ticks = 0
+        self.missed_ticks = 0  # Timer periods that passed without a tick
+        self.fps = 0.0  # Ticks per second over the last fps_window
+        self.counters = {}  # Extra values exported with every snapshot, e.g. dropped samples
+        self._pending = dict.fromkeys(stages, 0.0)
+        self._last_start = None
+        self._tick_start = 0.0
+        self._fps_ticks = 0
+        self._fps_since = None
+
+    # Same signature as RenderStats.add, so paint and setData timings can be forwarded
+    def add(self, name, kind, seconds):
+        self._pending[kind] += seconds
+
+    def tick_started(self, backlog=0.0):
+        now = time.perf_counter()
+        if self._last_start is not None:
+            for stage, seconds in self._pending.items():
+                self.histograms[stage].observe(seconds)
+                self._pending[stage] = 0.0
+            gap = now - self._last_start
+            self.histograms['jitter'].observe(abs(gap - self.interval))
+            self.missed_ticks += max(0, round(gap / self.interval) - 1)
+        else:
+            self._fps_since = now
+        self.histograms['backlog'].observe(backlog)
+        self._last_start = self._tick_start = now
+
+    def tick_finished(self):
+        now = time.perf_counter()
+        self.histograms['tick'].observe(now - self._tick_start)
+        self.ticks += 1
+        self._fps_ticks += 1
+        if now - self._fps_since >= self.fps_window:
+            self.fps = self._fps_ticks / (now - self._fps_since)
+            self._fps_ticks = 0
+            self._fps_since = now
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.ticks = self.missed_ticks = 0
+        self._last_start = None
+
+    def snapshot(self):
+        return {'interval': self.interval, 'ticks': self.ticks, 'missed_ticks': self.missed_ticks,
+                'fps': self.fps, **self.counters,
+                'stages': {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}}
+
+    # Prometheus text exposition format
+    def prometheus(self, prefix='babytrainer'):
+        lines = [f'# TYPE {prefix}_ticks_total counter', f'{prefix}_ticks_total {self.ticks}',
+                 f'# TYPE {prefix}_missed_ticks_total counter', f'{prefix}_missed_ticks_total {self.missed_ticks}',
+                 f'# TYPE {prefix}_fps gauge', f'{prefix}_fps {self.fps:.3f}']
+        for name, value in self.counters.items():
+            lines += [f'# TYPE {prefix}_{name} gauge', f'{prefix}_{name} {value}']
+        lines.append(f'# TYPE {prefix}_stage_seconds histogram')
+        for stage, histogram in self.histograms.items():
+            seen = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                seen += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {seen}')
+            lines += [f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}',
+                      f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.9f}',
+                      f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}']
+        return '\n'.join(lines) + '\n'
+
+    # One line for the on-screen overlay
+    def summary(self):
+        tick = self.histograms['tick']
+        return (f'{self.fps:.1f} fps | tick p50 {tick.quantile(0.5) * 1000:.1f} ms '
+                f'p99 {tick.quantile(0.99) * 1000:.1f} ms | '
+                f'backlog p99 {self.histograms["backlog"].quantile(0.99) * 1000:.0f} ms | '
+                f'missed {self.missed_ticks}')
+
+
+class TimedSink:
+    # Wraps a sample sink and charges the time of each append to one stage
+    def __init__(self, sink, metrics, stage):
+        self.sink = sink
+        self.metrics = metrics
+        self.stage = stage
+
+    def append(self, timestamps, samples):
+        start = time.perf_counter()
+        self.sink.append(timestamps, samples)
+        self.metrics.add(None, self.stage, time.perf_counter() - start)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        metrics = self.server.metrics
+        if self.path == '/metrics':
+            body, content_type = metrics.prometheus(), 'text/plain; version=0.0.4'
+        elif self.path in ('/', '/metrics.json'):
+            body, content_type = json.dumps(metrics.snapshot()), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # Scrapes are not worth a line on the kiosk console each
+
+
+class MetricsServer:
+    # Serves a TickMetrics snapshot on a background thread: Prometheus text at
+    # /metrics and JSON at /metrics.json. Binds to localhost unless told otherwise.
+    def __init__(self, metrics, port=0, host='127.0.0.1'):
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.metrics = metrics
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
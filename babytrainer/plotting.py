@@ -0,0 +1,251 @@
+# Qt-side glue between the session history and the pyqtgraph curves
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt6.QtWidgets import QLabel
+
+
+# Rendering modes of a plot widget, best looking first: antialiased lines,
+# plain lines, then plain lines from an envelope at half the screen resolution
+RENDER_MODES = ('antialiased', 'aliased', 'coarse')
+Y_MARGIN = 0.1  # Share of the data span added above and below when a fixed y range grows
+
+
+class LevelOfDetailCurve:
+    # Feeds one PlotDataItem from a MinMaxPyramid at screen resolution. While
+    # following, the curve shows the newest `window_seconds`; once the user
+    # pans or zooms it redraws whatever range is visible. With `fixed_ranges`
+    # the curve sets the axis ranges itself while following instead of letting
+    # the view box auto-range on every update: x to the window, y to `y_range`
+    # or, without one, a range that only ever grows to fit the data.
+    def __init__(self, plot_widget, curve, history, channel, window_seconds, fixed_ranges=False, y_range=None):
+        self.name = getattr(plot_widget, 'stats_name', plot_widget.objectName())
+        self.curve = curve
+        self.history = history
+        self.channel = channel
+        self.window_seconds = window_seconds
+        self.fixed_ranges = fixed_ranges
+        self.y_range = y_range
+        self.resolution = 1.0  # Envelope points per pixel column, halved in the coarse mode
+        self._following = True
+        self._grown_range = None  # y range fitted to the data so far, without a fixed y_range
+        self._style = {}  # Curve options waiting for the next setData
+        self.view_box = plot_widget.getPlotItem().getViewBox()
+        self.view_box.sigXRangeChanged.connect(self._range_changed)
+        self.view_box.sigRangeChangedManually.connect(self._panned)
+
+    def following(self):
+        if not self.fixed_ranges:
+            return bool(self.view_box.autoRangeEnabled()[0])
+        if self.view_box.autoRangeEnabled()[0]:
+            self._following = True  # The view box's auto-range button hands the axes back to the curve
+        return self._following
+
+    # Width of the plot area in device pixels, with a sensible guess before the first layout
+    def pixels(self):
+        width = self.view_box.width()
+        return max(1, int((width if width > 1 else 800) * self.resolution))
+
+    def set_antialias(self, antialias):
+        self._style['antialias'] = antialias
+        self.refresh()
+
+    def refresh(self):
+        if not len(self.history):
+            return
+        following = self.following()
+        if following:
+            t1 = self.history.last_time
+            t0 = t1 - self.window_seconds
+        else:
+            t0, t1 = self.view_box.viewRange()[0]
+        t, values = self.history.envelope(self.channel, t0, t1, self.pixels())
+        self.curve.setData(t, values, **self._style)
+        self._style.clear()
+        if following and self.fixed_ranges:
+            self._set_ranges(t0, t1, values)
+
+    def _set_ranges(self, t0, t1, values):
+        y_range = self.y_range or self._grown_range
+        if self.y_range is None and len(values):
+            low, high = float(np.nanmin(values)), float(np.nanmax(values))
+            if np.isfinite(low) and (y_range is None or low < y_range[0] or high > y_range[1]):
+                if y_range is not None:
+                    low, high = min(low, y_range[0]), max(high, y_range[1])
+                margin = (high - low) * Y_MARGIN or 1.0
+                y_range = self._grown_range = (low - margin, high + margin)
+        self.view_box.setRange(xRange=(t0, t1), yRange=y_range, padding=0)
+
+    # Zooming and panning re-query the pyramid right away, even while stopped
+    def _range_changed(self, *args):
+        if not self.following():
+            self.refresh()
+
+    def _panned(self, *args):
+        if self.fixed_ranges and self._following:
+            self._following = False
+            self.refresh()
+
+
+class RenderStats:
+    # Running count/total/max timings per (widget, kind), e.g. ('Force', 'paint'),
+    # optionally forwarded to the per-tick histograms of a TickMetrics
+    def __init__(self, metrics=None):
+        self.entries = {}
+        self.metrics = metrics
+
+    def add(self, name, kind, seconds):
+        count, total, worst = self.entries.get((name, kind), (0, 0.0, 0.0))
+        self.entries[name, kind] = (count + 1, total + seconds, max(worst, seconds))
+        if self.metrics is not None:
+            self.metrics.add(name, kind, seconds)
+
+    def reset(self):
+        self.entries.clear()
+
+    # Total milliseconds spent on `kind` across all widgets
+    def total_ms(self, kind):
+        return sum(total for (_, entry_kind), (_, total, _) in self.entries.items() if entry_kind == kind) * 1000.0
+
+    def report(self):
+        lines = [f'{"widget":<28} {"kind":<7} {"count":>6} {"mean ms":>8} {"max ms":>8} {"total ms":>9}']
+        for (name, kind), (count, total, worst) in sorted(self.entries.items()):
+            lines.append(f'{name:<28} {kind:<7} {count:>6} {total / count * 1000:>8.3f} '
+                         f'{worst * 1000:>8.3f} {total * 1000:>9.1f}')
+        return '\n'.join(lines)
+
+
+class TimedPlotWidget(pg.PlotWidget):
+    # PlotWidget that records how long each of its paints takes
+    def __init__(self, name, stats, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_name = name
+        self.stats = stats
+        self.paint_count = 0
+        self.last_paint = 0.0  # Seconds
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self.last_paint = time.perf_counter() - start
+        self.paint_count += 1
+        self.stats.add(self.stats_name, 'paint', self.last_paint)
+
+
+class RenderQuality:
+    # Picks the rendering mode of every plot widget. Widgets start in the mode
+    # `render` (a RenderSpec) asks for, with pyqtgraph's clip-to-view and peak
+    # downsampling as configured. When adaptive, a widget whose smoothed paint
+    # time goes over its share of the frame budget (the tick interval times
+    # render.frame_budget, split between the widgets on its tab) steps down a
+    # mode, and steps back up after `recover_ticks` ticks well under it.
+    def __init__(self, render, interval, recover_ticks=50, smoothing=0.2):
+        self.render = render
+        self.budget = render.frame_budget * interval
+        self.recover_ticks = recover_ticks
+        self.smoothing = smoothing
+        self.changes = 0  # Mode changes so far
+        self._pages = {}  # Tab page -> [plot widget, curve, mode, smoothed paint seconds, paints seen, calm ticks]
+
+    def add(self, page, plot_widget, curve):
+        item = curve.curve
+        item.setClipToView(self.render.clip_to_view)
+        item.setDownsampling(auto=self.render.downsampling, method='peak')
+        mode = RENDER_MODES.index(self.render.mode)
+        self._apply(curve, mode)
+        self._pages.setdefault(page, []).append([plot_widget, curve, mode, 0.0, plot_widget.paint_count, 0])
+
+    # Current mode of every widget, by its stats name
+    def modes(self):
+        return {entry[0].stats_name: RENDER_MODES[entry[2]] for entries in self._pages.values() for entry in entries}
+
+    @staticmethod
+    def _apply(curve, mode):
+        curve.resolution = 0.5 if RENDER_MODES[mode] == 'coarse' else 1.0
+        curve.set_antialias(RENDER_MODES[mode] == 'antialiased')
+
+    # Fold in the paints since the last tick; call once per tick
+    def update(self):
+        if not self.render.adaptive:
+            return
+        for entries in self._pages.values():
+            budget = self.budget / len(entries)
+            for entry in entries:
+                plot_widget, curve, mode, smoothed, seen, calm = entry
+                if plot_widget.paint_count == seen:
+                    continue  # Not painted (hidden tab or nothing new), nothing learned
+                entry[4] = plot_widget.paint_count
+                smoothed = entry[3] = smoothed + self.smoothing * (plot_widget.last_paint - smoothed)
+                if smoothed > budget and mode < len(RENDER_MODES) - 1:
+                    self._change(entry, mode + 1)
+                elif smoothed < budget / 4 and mode > RENDER_MODES.index(self.render.mode):
+                    entry[5] = calm + 1
+                    if entry[5] >= self.recover_ticks:
+                        self._change(entry, mode - 1)
+                else:
+                    entry[5] = 0
+
+    def _change(self, entry, mode):
+        entry[2] = mode
+        entry[3] = 0.0  # Judge the new mode on its own paints
+        entry[5] = 0
+        self.changes += 1
+        self._apply(entry[1], mode)
+
+
+class RenderScheduler:
+    # Refreshes only the curves on the visible tab. Curves on hidden tabs are
+    # marked dirty and caught up once when their tab is shown.
+    def __init__(self, tabs, stats=None, enabled=True):
+        self.tabs = tabs
+        self.stats = stats
+        self.enabled = enabled  # With scheduling off every curve refreshes every tick
+        self._pages = {}  # Tab page -> curves drawn on it
+        self._dirty = set()
+        tabs.currentChanged.connect(self._tab_changed)
+
+    def add(self, page, curve):
+        self._pages.setdefault(page, []).append(curve)
+
+    def refresh(self):
+        current = self.tabs.currentWidget()
+        for page, curves in self._pages.items():
+            if page is current or not self.enabled:
+                self._refresh_page(page, curves)
+            else:
+                self._dirty.add(page)
+
+    def _refresh_page(self, page, curves):
+        self._dirty.discard(page)
+        for curve in curves:
+            start = time.perf_counter()
+            curve.refresh()
+            if self.stats is not None:
+                self.stats.add(curve.name, 'update', time.perf_counter() - start)
+
+    def _tab_changed(self, index):
+        page = self.tabs.widget(index)
+        if page in self._dirty:
+            self._refresh_page(page, self._pages[page])
+
+
+class MetricsOverlay(QLabel):
+    # Small FPS/latency readout floating over the top-right corner of a widget.
+    # The text is only rebuilt every `period` seconds so it costs next to nothing per tick.
+    def __init__(self, parent, metrics, period=0.5):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.period = period
+        self._next_update = 0.0
+        self.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: white; padding: 2px 6px;')
+        self.raise_()
+
+    def refresh(self):
+        now = time.perf_counter()
+        if now < self._next_update:
+            return
+        self._next_update = now + self.period
+        self.setText(self.metrics.summary())
+        self.adjustSize()
+        self.move(max(0, self.parentWidget().width() - self.width() - 8), 8)
@@ -0,0 +1,226 @@
+# Append-only binary session recordings and memory-mapped replay
+#
+# File layout (little-endian):
+#   header  HEADER_SIZE bytes: magic, version, sample rate, channel count,
+#           creation time and the trainee's details (see HEADER_FORMAT)
+#   blocks  repeated until end of file, each one:
+#           uint32 sample count n, uint32 reserved,
+#           n float64 timestamps, then n float32 values per channel (columnar),
+#           zero padding up to a multiple of 8 bytes
+# A block cut short by a crash is ignored when the file is read back.
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from babytrainer.sources import SensorSource
+
+MAGIC = b'BTRSESS1'
+VERSION = 1
+HEADER_SIZE = 512
+HEADER_FORMAT = '<8sIIdId128s64s64s32s'
+BLOCK_HEADER = struct.Struct('<II')
+INFO_FIELDS = ('fullname', 'personal_id', 'occupation', 'difficulty')
+INFO_WIDTHS = (128, 64, 64, 32)  # Bytes of each info field in the header
+
+
+# UTF-8 bytes of an info field, cut at a character boundary so it fits `width`
+def encode_info(value, width):
+    return str(value).encode('utf-8')[:width].decode('utf-8', 'ignore').encode('utf-8')
+
+
+# Info field as read from a header; files cut mid-character by older versions still open
+def decode_info(raw):
+    return raw.rstrip(b'\0').decode('utf-8', 'replace')
+
+
+# Bytes taken by a block of n samples over `channels` channels, padding included
+def block_size(n, channels):
+    size = BLOCK_HEADER.size + 8 * n + 4 * n * channels
+    return size + (-size % 8)
+
+
+class SessionRecorder:
+    # Records a session on a background thread. append() only copies samples
+    # into a preallocated in-memory block; full blocks are handed to the writer
+    # thread, so the caller (the GUI thread) never waits on the disk.
+    def __init__(self, path, sample_rate, channels=3, block_samples=4096, **info):
+        self.path = path
+        self.channels = channels
+        self.block_samples = block_samples
+        self._file = open(path, 'wb', buffering=1 << 20)
+        self._file.write(self._pack_header(sample_rate, channels, info))
+        self._free = queue.SimpleQueue()  # Spare blocks, returned by the writer thread
+        self._full = queue.SimpleQueue()  # Blocks waiting to be written, None ends the thread
+        self._block = self._new_block()
+        self._filled = 0
+        self.samples_written = 0
+        self._thread = threading.Thread(target=self._run, name='recorder', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _pack_header(sample_rate, channels, info):
+        fields = [encode_info(info.get(name, ''), width) for name, width in zip(INFO_FIELDS, INFO_WIDTHS)]
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, float(sample_rate), channels,
+                             time.time(), *fields)
+        return header.ljust(HEADER_SIZE, b'\0')
+
+    def _new_block(self):
+        return (np.empty(self.block_samples, dtype='<f8'),
+                np.empty((self.channels, self.block_samples), dtype='<f4'))
+
+    # Copy a batch into the current block, handing over every block that fills up
+    def append(self, timestamps, samples):
+        n = len(timestamps)
+        done = 0
+        while done < n:
+            take = min(n - done, self.block_samples - self._filled)
+            t, values = self._block
+            t[self._filled:self._filled + take] = timestamps[done:done + take]
+            values[:, self._filled:self._filled + take] = samples[:, done:done + take]
+            self._filled += take
+            done += take
+            if self._filled == self.block_samples:
+                self._hand_over()
+
+    def _hand_over(self):
+        self._full.put((self._block, self._filled))
+        try:
+            self._block = self._free.get_nowait()
+        except queue.Empty:
+            self._block = self._new_block()  # The disk is behind, grow the pool instead of waiting
+        self._filled = 0
+
+    def _run(self):
+        padding = bytes(8)
+        while True:
+            item = self._full.get()
+            if item is None:
+                break
+            (t, values), n = item
+            self._file.write(BLOCK_HEADER.pack(n, 0))
+            self._file.write(t[:n])
+            for row in values:
+                self._file.write(row[:n])
+            pad = -(BLOCK_HEADER.size + 8 * n + 4 * n * self.channels) % 8
+            if pad:
+                self._file.write(padding[:pad])
+            self._file.flush()  # A crash loses at most the block being filled
+            self.samples_written += n
+            self._free.put((t, values))
+
+    # Write out the partial block and wait for the writer thread to finish
+    def close(self):
+        if self._thread is None:
+            return
+        if self._filled:
+            self._hand_over()
+        self._full.put(None)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+
+class SessionRecording:
+    # Read-only, memory-mapped view of a recording. Blocks are exposed as
+    # zero-copy NumPy views, so hours-long sessions are paged in on demand.
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f'{path} is not a session recording')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = struct.unpack_from(HEADER_FORMAT, self._mmap)
+        magic, version, header_size, self.sample_rate, self.channels, self.created = header[:6]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} session recording')
+        self.info = {name: decode_info(value) for name, value in zip(INFO_FIELDS, header[6:])}
+        self.__dict__.update(self.info)  # fullname, personal_id, occupation, difficulty
+        self._blocks = []  # (offset of the timestamps, sample count)
+        offset = header_size
+        while offset + BLOCK_HEADER.size <= size:
+            n, _ = BLOCK_HEADER.unpack_from(self._mmap, offset)
+            if n == 0 or offset + block_size(n, self.channels) > size:
+                break  # Truncated tail
+            self._blocks.append((offset + BLOCK_HEADER.size, n))
+            offset += block_size(n, self.channels)
+        self.sample_count = sum(n for _, n in self._blocks)
+
+    def __len__(self):
+        return self.sample_count
+
+    # Zero-copy (timestamps, samples) views of block `index`
+    def block(self, index):
+        offset, n = self._blocks[index]
+        t = np.frombuffer(self._mmap, dtype='<f8', count=n, offset=offset)
+        values = np.frombuffer(self._mmap, dtype='<f4', count=n * self.channels, offset=offset + 8 * n)
+        return t, values.reshape(self.channels, n)
+
+    def iter_blocks(self):
+        for index in range(len(self._blocks)):
+            yield self.block(index)
+
+    @property
+    def block_count(self):
+        return len(self._blocks)
+
+    # Recorded time span in seconds
+    @property
+    def duration(self):
+        if not self._blocks:
+            return 0.0
+        return float(self.block(len(self._blocks) - 1)[0][-1] - self.block(0)[0][0])
+
+    def close(self):
+        self._mmap.close()
+
+
+class ReplaySource(SensorSource):
+    # Plays a recording back through the normal acquisition path. `speed` is a
+    # playback multiplier (1.0 = real time); None replays as fast as the
+    # consumer keeps up. Replay is lossless: the worker waits for queue space.
+    lossless = True
+
+    def __init__(self, path, speed=1.0, batch_size=100):
+        self.recording = SessionRecording(path)
+        super().__init__(self.recording.sample_rate)
+        self.channels = self.recording.channels
+        self.speed = speed
+        self.batch_size = batch_size
+        self._block = 0
+        self._position = 0  # Sample position inside the current block
+        self._clock_start = None  # (wall time, recorded time) when playback (re)started
+
+    def open(self):
+        self._clock_start = None
+
+    def read(self, timeout=0.1):
+        if self._block >= self.recording.block_count:
+            self.finished = True
+            return None
+        t, values = self.recording.block(self._block)
+        stop = min(self._position + self.batch_size, len(t))
+        if self.speed is not None:
+            now = time.perf_counter()
+            if self._clock_start is None:
+                self._clock_start = (now, t[self._position])
+            due = self._clock_start[0] + (t[stop - 1] - self._clock_start[1]) / self.speed
+            if due - now > timeout:
+                time.sleep(timeout)
+                return None
+            if due > now:
+                time.sleep(due - now)
+        batch = t[self._position:stop], values[:, self._position:stop]
+        self._position = stop
+        if stop == len(t):
+            self._block += 1
+            self._position = 0
+        return batch
+
+    def close(self):
+        pass
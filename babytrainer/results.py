@@ -0,0 +1,141 @@
+# Local SQLite store of session results, with a leaderboard and per-trainee
+# history that only ever read through indexes
+import queue
+import sqlite3
+import threading
+
+from babytrainer.scoring import SessionResult
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    personal_id TEXT NOT NULL,
+    fullname TEXT NOT NULL DEFAULT '',
+    occupation TEXT NOT NULL DEFAULT '',
+    difficulty TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    peak_force REAL,
+    time_over_threshold REAL NOT NULL,
+    angle_range REAL,
+    violations INTEGER NOT NULL,
+    score REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_trainee ON sessions (personal_id, started DESC);
+CREATE INDEX IF NOT EXISTS sessions_by_trainee_level ON sessions (personal_id, difficulty, started DESC);
+
+-- Best session per trainee and level, kept up to date on every insert so the
+-- leaderboard never has to group the whole sessions table
+CREATE TABLE IF NOT EXISTS best_sessions (
+    personal_id TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    session_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (personal_id, difficulty)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS best_sessions_by_score ON best_sessions (difficulty, score DESC);
+
+CREATE TRIGGER IF NOT EXISTS sessions_keep_best AFTER INSERT ON sessions BEGIN
+    INSERT INTO best_sessions (personal_id, difficulty, session_id, score)
+    VALUES (NEW.personal_id, NEW.difficulty, NEW.id, NEW.score)
+    ON CONFLICT (personal_id, difficulty) DO UPDATE
+    SET session_id = excluded.session_id, score = excluded.score
+    WHERE excluded.score > best_sessions.score;
+END;
+'''
+
+COLUMNS = ', '.join(SessionResult._fields)
+INSERT = f'INSERT INTO sessions ({COLUMNS}) VALUES ({", ".join("?" * len(SessionResult._fields))})'
+LEADERBOARD = f'''
+SELECT {", ".join("s." + name for name in SessionResult._fields)}
+FROM best_sessions AS b JOIN sessions AS s ON s.id = b.session_id
+WHERE b.difficulty = ? ORDER BY b.score DESC LIMIT ?
+'''
+HISTORY = f'SELECT {COLUMNS} FROM sessions WHERE personal_id = ? ORDER BY started DESC LIMIT ?'
+LEVEL_HISTORY = (f'SELECT {COLUMNS} FROM sessions WHERE personal_id = ? AND difficulty = ? '
+                 f'ORDER BY started DESC LIMIT ?')
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode=WAL')  # Readers never wait for the writer
+    connection.execute('PRAGMA synchronous=NORMAL')  # Durable at checkpoints, no fsync per commit
+    return connection
+
+
+class ResultsStore:
+    # Results are queued by add() and written by a background thread, which
+    # commits everything queued so far (up to `batch_size` rows) in one
+    # transaction. Queries use their own connection and can run while it writes.
+    def __init__(self, path, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        with _connect(path) as connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+        self._reader = _connect(path)
+        self._read_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='results-writer', daemon=True)
+        self._thread.start()
+
+    def add(self, result):
+        self._queue.put(tuple(result))
+
+    def add_many(self, results):
+        for result in results:
+            self._queue.put(tuple(result))
+
+    # Wait until everything added so far is committed
+    def flush(self):
+        self._queue.join()
+
+    def _run(self):
+        connection = _connect(self.path)
+        try:
+            while True:
+                rows = [self._queue.get()]
+                while len(rows) < self.batch_size:
+                    try:
+                        rows.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = rows[-1] is None
+                if stop:
+                    rows.pop()
+                if rows:
+                    with connection:
+                        connection.executemany(INSERT, rows)
+                for _ in range(len(rows) + stop):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _query(self, sql, parameters):
+        with self._read_lock:
+            return [SessionResult(*row) for row in self._reader.execute(sql, parameters)]
+
+    # Best session of each trainee on `difficulty`, best first
+    def leaderboard(self, difficulty, limit=20):
+        return self._query(LEADERBOARD, (difficulty, limit))
+
+    # A trainee's sessions, newest first, on one level or on all of them
+    def history(self, personal_id, difficulty=None, limit=50):
+        if difficulty is None:
+            return self._query(HISTORY, (personal_id, limit))
+        return self._query(LEVEL_HISTORY, (personal_id, difficulty, limit))
+
+    def count(self):
+        with self._read_lock:
+            return self._reader.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    # Write out what is still queued and stop the writer
+    def close(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._reader.close()
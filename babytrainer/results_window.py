@@ -0,0 +1,80 @@
+# Leaderboard and per-trainee history of stored session results
+import time
+
+from PyQt6.QtWidgets import (
+    QComboBox, QHBoxLayout, QLabel, QLineEdit, QMainWindow, QTableWidget, QTableWidgetItem, QTabWidget,
+    QVBoxLayout, QWidget
+)
+
+from babytrainer.training_spec import DIFFICULTIES
+
+# Table columns: header and how to show the field of a SessionResult
+COLUMNS = (
+    ('Date', lambda r: time.strftime('%Y-%m-%d %H:%M', time.localtime(r.started))),
+    ('Personal ID', lambda r: r.personal_id),
+    ('Name', lambda r: r.fullname),
+    ('Level', lambda r: r.difficulty),
+    ('Score', lambda r: f'{r.score:.1f}'),
+    ('Peak force', lambda r: '' if r.peak_force is None else f'{r.peak_force:.2f}'),
+    ('Over threshold (s)', lambda r: f'{r.time_over_threshold:.1f}'),
+    ('Angle range', lambda r: '' if r.angle_range is None else f'{r.angle_range:.2f}'),
+    ('Violations', lambda r: str(r.violations)),
+    ('Duration (s)', lambda r: f'{r.duration:.0f}'),
+)
+
+
+class ResultsWindow(QMainWindow):
+    # Shows at most `limit` rows per table, so it stays quick however many
+    # sessions the store holds (both queries are index-only range scans)
+    def __init__(self, results, personal_id='', limit=50):
+        super().__init__()
+        self.setWindowTitle('Training Results')
+        self.results = results
+        self.limit = limit
+
+        self.difficulty_combo = QComboBox()
+        self.difficulty_combo.addItems(list(DIFFICULTIES))
+        self.difficulty_combo.currentTextChanged.connect(self.refresh)
+        self.personal_id_input = QLineEdit(personal_id)
+        self.personal_id_input.setPlaceholderText('Personal ID')
+        self.personal_id_input.editingFinished.connect(self.refresh)
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel('Difficulty:'))
+        controls.addWidget(self.difficulty_combo)
+        controls.addWidget(QLabel('Trainee:'))
+        controls.addWidget(self.personal_id_input)
+
+        self.leaderboard_table = self.create_table()
+        self.history_table = self.create_table()
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.leaderboard_table, 'Leaderboard')
+        self.tabs.addTab(self.history_table, 'History')
+
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.tabs)
+        central_widget = QWidget()
+        central_widget.setLayout(layout)
+        self.setCentralWidget(central_widget)
+        self.refresh()
+
+    @staticmethod
+    def create_table():
+        table = QTableWidget(0, len(COLUMNS))
+        table.setHorizontalHeaderLabels([header for header, _ in COLUMNS])
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        return table
+
+    @staticmethod
+    def fill_table(table, rows):
+        table.setRowCount(len(rows))
+        for row, result in enumerate(rows):
+            for column, (_, text) in enumerate(COLUMNS):
+                table.setItem(row, column, QTableWidgetItem(text(result)))
+
+    def refresh(self, *args):
+        difficulty = self.difficulty_combo.currentText()
+        self.fill_table(self.leaderboard_table, self.results.leaderboard(difficulty, self.limit))
+        personal_id = self.personal_id_input.text().strip()
+        self.fill_table(self.history_table,
+                        self.results.history(personal_id, difficulty, self.limit) if personal_id else [])
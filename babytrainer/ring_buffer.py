@@ -0,0 +1,91 @@
+# Fixed-capacity, multi-channel ring buffer for streaming sensor samples
+import numpy as np
+
+
+class RingBuffer:
+    # Row 0 of the storage holds the timestamps, rows 1..channels hold the samples.
+    # Every sample is written twice (at i and i + capacity) so the newest
+    # `capacity` samples are always one contiguous slice and reads never copy.
+    def __init__(self, channels, sample_rate, window_seconds=10.0, dtype=np.float64):
+        if channels < 1:
+            raise ValueError('channels must be at least 1')
+        if sample_rate <= 0:
+            raise ValueError('sample_rate must be positive')
+        self.channels = channels
+        self.sample_rate = float(sample_rate)
+        self.dtype = np.dtype(dtype)
+        self.set_window_length(window_seconds)
+
+    # Resize the buffer to hold `window_seconds` of data, keeping the newest samples
+    def set_window_length(self, window_seconds):
+        capacity = int(round(window_seconds * self.sample_rate))
+        if capacity < 1:
+            raise ValueError('window_seconds is too short for the sample rate')
+        kept = None
+        if hasattr(self, '_data'):
+            end = self._pos + self.capacity
+            kept = self._data[:, end - self._size:end][:, -capacity:].copy()
+        self.window_seconds = float(window_seconds)
+        self.capacity = capacity
+        self._data = np.zeros((self.channels + 1, 2 * capacity), dtype=self.dtype)
+        self._pos = 0  # Ring position of the next write, in [0, capacity)
+        self._size = 0
+        if kept is not None and kept.shape[1]:
+            self.append(kept[0], kept[1:])
+
+    # Number of samples currently held
+    def __len__(self):
+        return self._size
+
+    # Forget all samples without releasing the storage
+    def clear(self):
+        self._pos = 0
+        self._size = 0
+
+    # Append a batch: `timestamps` has shape (n,), `samples` has shape (channels, n)
+    def append(self, timestamps, samples):
+        samples = np.asarray(samples)
+        if samples.ndim == 1:
+            samples = samples.reshape(1, -1)
+        n = samples.shape[1]
+        if samples.shape[0] != self.channels or np.shape(timestamps) != (n,):
+            raise ValueError(f'expected timestamps of shape ({n},) and samples of shape ({self.channels}, n)')
+        if n == 0:
+            return
+        capacity = self.capacity
+        if n > capacity:
+            # Only the newest `capacity` samples can survive anyway
+            timestamps = timestamps[-capacity:]
+            samples = samples[:, -capacity:]
+            n = capacity
+        start = self._pos
+        first = min(n, capacity - start)
+        rest = n - first
+        self._write(start, 0, first, timestamps, samples)
+        if rest:
+            self._write(0, first, n, timestamps, samples)
+        self._pos = (start + n) % capacity
+        self._size = min(capacity, self._size + n)
+
+    # Copy batch columns [lo, hi) into both halves of the storage at ring position `pos`
+    def _write(self, pos, lo, hi, timestamps, samples):
+        count = hi - lo
+        data = self._data
+        capacity = self.capacity
+        data[0, pos:pos + count] = timestamps[lo:hi]
+        data[1:, pos:pos + count] = samples[:, lo:hi]
+        data[0, pos + capacity:pos + capacity + count] = timestamps[lo:hi]
+        data[1:, pos + capacity:pos + capacity + count] = samples[:, lo:hi]
+
+    # Zero-copy views (timestamps, samples) of the newest `seconds` of data (whole window if None)
+    def latest(self, seconds=None):
+        count = self._size
+        if seconds is not None:
+            count = min(count, int(round(seconds * self.sample_rate)))
+        end = self._pos + self.capacity  # The mirrored copy ends right after the newest sample
+        view = self._data[:, end - count:end]
+        return view[0], view[1:]
+
+    # Zero-copy view of one channel's newest `seconds` of data
+    def channel(self, index, seconds=None):
+        return self.latest(seconds)[1][index]
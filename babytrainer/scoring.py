@@ -0,0 +1,110 @@
+# Trainee performance metrics, updated incrementally as batches arrive
+import time
+from collections import namedtuple
+from itertools import islice
+
+import numpy as np
+
+from babytrainer.sources import ANGULAR, FORCE
+
+# Outcome of one training session as stored in the results database. Metrics
+# of channels the difficulty level does not use are None.
+SessionResult = namedtuple('SessionResult', [
+    'personal_id', 'fullname', 'occupation', 'difficulty',
+    'started',  # Wall-clock time of the first sample (Unix seconds)
+    'duration',  # Seconds of sensor data
+    'peak_force',
+    'time_over_threshold',  # Seconds with at least one threshold rule in alarm
+    'angle_range',  # Largest minus smallest angular displacement
+    'violations',  # Number of times a threshold rule went into alarm
+    'score',
+])
+
+VIOLATION_PENALTY = 2.0  # Score points lost per threshold violation
+
+
+# 0-100: the share of the session spent below every threshold, less a fixed
+# penalty per violation
+def session_score(duration, time_over_threshold, violations):
+    if duration <= 0:
+        return 0.0
+    within = max(0.0, 1.0 - time_over_threshold / duration)
+    return max(0.0, 100.0 * within - VIOLATION_PENALTY * violations)
+
+
+class SessionScore:
+    # Sample sink keeping the running metrics of a session. Each batch costs
+    # one reduction per tracked channel plus the threshold crossings it
+    # produced, which are read from `alerts` (the session's AlertEngine, fed
+    # the same batch just before this sink); no per-sample state is kept.
+    def __init__(self, spec, alerts):
+        self.spec = spec
+        self.alerts = alerts
+        channels = {c.channel for c in spec.channels}
+        self.tracks_force = FORCE in channels
+        self.tracks_angle = ANGULAR in channels
+        self.reset()
+
+    def reset(self):
+        self.started = None
+        self.first_time = None
+        self.last_time = None
+        self.sample_count = 0
+        self.peak_force = -np.inf
+        self.angle_min = np.inf
+        self.angle_max = -np.inf
+        self.violations = 0
+        self._over = 0.0  # Seconds in alarm before the current alarm period
+        self._active = set()  # Rules in alarm
+        self._alarm_since = None  # Time the current alarm period (any rule in alarm) began
+        self._seen_events = self.alerts.event_count
+
+    def append(self, timestamps, samples):
+        n = len(timestamps)
+        if not n:
+            return
+        if self.first_time is None:
+            self.started = time.time()
+            self.first_time = float(timestamps[0])
+        self.last_time = float(timestamps[-1])
+        self.sample_count += n
+        if self.tracks_force:
+            self.peak_force = max(self.peak_force, float(samples[FORCE].max()))
+        if self.tracks_angle:
+            self.angle_min = min(self.angle_min, float(samples[ANGULAR].min()))
+            self.angle_max = max(self.angle_max, float(samples[ANGULAR].max()))
+
+        new = self.alerts.event_count - self._seen_events
+        self._seen_events = self.alerts.event_count
+        if new:
+            # Rules report one after the other, so put this batch's crossings back in time order
+            for event in sorted(islice(reversed(self.alerts.events), new), key=lambda e: e.time):
+                if event.active:
+                    self.violations += 1
+                    if not self._active:
+                        self._alarm_since = event.time
+                    self._active.add(event.rule)
+                elif event.rule in self._active:
+                    self._active.discard(event.rule)
+                    if not self._active:
+                        self._over += event.time - self._alarm_since
+
+    @property
+    def duration(self):
+        return 0.0 if self.first_time is None else self.last_time - self.first_time
+
+    @property
+    def time_over_threshold(self):
+        return self._over + (self.last_time - self._alarm_since if self._active else 0.0)
+
+    def result(self, personal_id='', fullname='', occupation='', difficulty=''):
+        over = self.time_over_threshold
+        return SessionResult(
+            personal_id, fullname, occupation, difficulty or self.spec.name, self.started or time.time(),
+            self.duration,
+            self.peak_force if self.tracks_force and self.sample_count else None,
+            over,
+            self.angle_max - self.angle_min if self.tracks_angle and self.sample_count else None,
+            self.violations,
+            session_score(self.duration, over, self.violations),
+        )
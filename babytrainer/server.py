@@ -0,0 +1,403 @@
+# Multi-trainee session server: one headless SessionEngine per trainer
+# station, spread over worker processes that each tick their sessions from an
+# asyncio loop. Stations and thin clients talk to the workers over Unix
+# sockets in one directory: one JSON request per line, after which a
+# subscription streams min/max-decimated frames for plotting.
+#
+#   python -m babytrainer.server /run/babytrainer [--workers 4]
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import select
+import signal
+import socket
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from babytrainer.decimation import decimate
+from babytrainer.engine import SIGNALS, SessionEngine, simulated_source
+from babytrainer.metrics import TickMetrics
+from babytrainer.results import ResultsStore
+from babytrainer.sources import SensorSource, open_source
+from babytrainer.training_spec import DIFFICULTIES
+
+TICK_SECONDS = 0.1  # How often every hosted session is polled and published
+SERVER_STAGES = ('dsp', 'acquisition', 'alerts', 'scoring', 'recording', 'publish')
+HOST_SOCKET = 'host-{}.sock'  # One socket per worker process inside the server directory
+# Frame: host time.monotonic() of the tick, bit mask of channels in alarm,
+# rows (timestamps + one per signal in engine.SIGNALS) and points, then rows x points float64
+FRAME_HEADER = struct.Struct('<dIII')
+MAX_PENDING_BYTES = 1 << 20  # Frames are skipped for a subscriber that has this much unsent
+DEFAULT_POINTS = 200  # Points per second streamed to a subscriber that does not ask for a rate
+
+
+# Sockets of the running workers, in worker order
+def host_paths(directory):
+    paths = []
+    while os.path.exists(os.path.join(directory, HOST_SOCKET.format(len(paths)))):
+        paths.append(os.path.join(directory, HOST_SOCKET.format(len(paths))))
+    return paths
+
+
+# Worker socket a session lives on, from a stable hash of its id
+def host_path(directory, session_id):
+    paths = host_paths(directory)
+    if not paths:
+        raise ConnectionError(f'no session server running in {directory}')
+    return paths[zlib.crc32(session_id.encode()) % len(paths)]
+
+
+class _HostedSession:
+    def __init__(self, engine, difficulty, info):
+        self.engine = engine
+        self.difficulty = difficulty
+        self.info = info  # Trainee details the result is stored under
+        self.subscribers = {}  # StreamWriter -> points per second
+
+
+class SessionHost:
+    # Runs the sessions of one worker process. Every tick drains each session
+    # through its engine and sends each subscriber the new samples decimated
+    # to the rate it asked for; a subscriber that stops reading misses frames
+    # instead of holding up the others. With `results` (a database path) set,
+    # the score of every session is stored when it closes.
+    def __init__(self, path, interval=TICK_SECONDS, results=None):
+        self.path = path
+        self.interval = interval
+        self.results = ResultsStore(results) if results else None
+        self.sessions = {}  # Session id -> _HostedSession
+        self.metrics = TickMetrics(interval, stages=SERVER_STAGES)
+        self.metrics.counters.update(sessions=0, subscribers=0, dropped_samples=0, dropped_frames=0)
+        self._stopping = None
+
+    async def serve(self):
+        self._stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self._stopping.set)
+        server = await asyncio.start_unix_server(self._handle, self.path)
+        try:
+            async with server:
+                next_tick = loop.time()
+                while not self._stopping.is_set():
+                    next_tick += self.interval
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), max(0.0, next_tick - loop.time()))
+                    except asyncio.TimeoutError:
+                        pass
+                    if loop.time() > next_tick + self.interval:
+                        next_tick = loop.time()  # Missed ticks are counted, not made up
+                    self.tick()
+        finally:
+            for session in self.sessions.values():
+                self._close_session(session)
+            self.sessions.clear()
+            if self.results is not None:
+                self.results.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def tick(self):
+        metrics = self.metrics
+        sessions = list(self.sessions.values())
+        metrics.tick_started(max((len(s.engine.sample_queue) / s.engine.source.sample_rate for s in sessions),
+                                 default=0.0))
+        stamp = time.monotonic()
+        dropped = subscribers = 0
+        for session in sessions:
+            n = session.engine.poll()
+            dropped += session.engine.sample_queue.dropped
+            subscribers += len(session.subscribers)
+            if n and session.subscribers:
+                start = time.perf_counter()
+                self._publish(session, n, stamp)
+                metrics.add(None, 'publish', time.perf_counter() - start)
+        metrics.counters.update(sessions=len(sessions), subscribers=subscribers, dropped_samples=dropped)
+        metrics.tick_finished()
+
+    def _publish(self, session, n, stamp):
+        engine = session.engine
+        timestamps, samples = engine.latest(n)  # Filtered channels and derived signals, as this host computed them
+        alarms = sum(1 << c.channel for c in engine.spec.channels if engine.alerts.is_active(c.channel))
+        frames = {}  # Points per second -> encoded frame, shared by subscribers asking for the same rate
+        for writer, points in list(session.subscribers.items()):
+            if writer.is_closing():
+                del session.subscribers[writer]
+                continue
+            if writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                self.metrics.counters['dropped_frames'] += 1
+                continue
+            frame = frames.get(points)
+            if frame is None:
+                t, y = decimate(timestamps, samples, points * n / engine.source.sample_rate / 2)
+                block = np.vstack((t, y)).astype('<f8', copy=False)
+                frame = frames[points] = FRAME_HEADER.pack(stamp, alarms, *block.shape) + block.tobytes()
+            writer.write(frame)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    reply = self._request(request, writer)
+                except (ValueError, KeyError, TypeError, OSError) as error:
+                    request, reply = {}, {'ok': False, 'error': str(error)}
+                writer.write(json.dumps(reply).encode() + b'\n')
+                if reply['ok'] and request.get('op') == 'subscribe':
+                    # The connection now only carries frames; it ends when the client hangs up
+                    while await reader.read(4096):
+                        pass
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            for session in self.sessions.values():
+                session.subscribers.pop(writer, None)
+            writer.close()
+
+    def _request(self, request, writer):
+        op = request['op']
+        if op == 'open':
+            session_id = request['id']
+            if session_id in self.sessions:
+                raise ValueError(f'session {session_id!r} is already open')
+            spec = DIFFICULTIES[request.get('difficulty', 'Easy')]
+            if request.get('source'):
+                source = open_source(request['source'])
+            else:
+                rate = request.get('rate') or spec.sample_rate
+                source = simulated_source(spec, rate, batch_size=max(1, int(rate / 100)))
+            engine = SessionEngine(spec, source, request.get('record'), metrics=self.metrics,
+                                   **request.get('info', {}))
+            engine.start()
+            info = request.get('info', {})
+            self.sessions[session_id] = _HostedSession(engine, spec.name, {
+                name: info.get(name, '') for name in ('personal_id', 'fullname', 'occupation')})
+            return {'ok': True, 'id': session_id, 'sample_rate': source.sample_rate, 'channels': source.channels}
+        if op == 'close':
+            self._close_session(self.sessions.pop(request['id']))
+            return {'ok': True}
+        if op == 'subscribe':
+            session = self.sessions[request['id']]
+            points = float(request.get('points', DEFAULT_POINTS))
+            session.subscribers[writer] = points
+            return {'ok': True, 'channels': session.engine.pipeline.channels, 'points': points,
+                    'interval': self.interval}
+        if op == 'list':
+            return {'ok': True, 'sessions': {k: s.difficulty for k, s in self.sessions.items()}}
+        if op == 'stats':
+            return {'ok': True, **self.metrics.snapshot()}
+        raise ValueError(f'unknown request {op!r}')
+
+    def _close_session(self, session):
+        session.engine.close()
+        for subscriber in session.subscribers:
+            subscriber.close()
+        if self.results is not None and session.engine.score.sample_count:
+            self.results.add(session.engine.score.result(difficulty=session.difficulty, **session.info))
+
+
+# Worker process entry point
+def run_host(path, interval=TICK_SECONDS, results=None):
+    try:
+        asyncio.run(SessionHost(path, interval, results).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+class SessionServer:
+    # Starts one SessionHost process per worker (default: one per core), each
+    # listening on its own socket in `directory` and all saving scores to the
+    # `results` database, if given (SQLite in WAL mode takes the concurrent writers)
+    def __init__(self, directory, workers=None, interval=TICK_SECONDS, results=None):
+        self.directory = directory
+        self.workers = workers or os.cpu_count() or 1
+        self.interval = interval
+        self.results = results
+        self._processes = []
+
+    def start(self, timeout=10.0):
+        os.makedirs(self.directory, exist_ok=True)
+        for path in host_paths(self.directory):
+            os.unlink(path)  # Left behind by a server that did not shut down cleanly
+        context = multiprocessing.get_context('spawn')  # Fresh interpreters, no threads inherited mid-flight
+        paths = [os.path.join(self.directory, HOST_SOCKET.format(i)) for i in range(self.workers)]
+        for index, path in enumerate(paths):
+            process = context.Process(target=run_host, args=(path, self.interval, self.results),
+                                      name=f'session-host-{index}', daemon=True)
+            process.start()
+            self._processes.append(process)
+        deadline = time.monotonic() + timeout
+        while not all(os.path.exists(path) for path in paths):
+            if time.monotonic() > deadline or not all(p.is_alive() for p in self._processes):
+                self.stop()
+                raise RuntimeError(f'session server workers did not start in {self.directory}')
+            time.sleep(0.01)
+
+    def stop(self, timeout=5.0):
+        for process in self._processes:
+            process.terminate()  # SIGTERM: the host closes its sessions and recordings first
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+        self._processes = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# Line-delimited JSON request over a fresh connection to the worker at `path`
+def _request(path, message, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(path)
+        connection.sendall(json.dumps(message).encode() + b'\n')
+        reply = connection.makefile('rb').readline()
+    reply = json.loads(reply) if reply else {'ok': False, 'error': 'connection closed'}
+    if not reply['ok']:
+        raise ValueError(reply['error'])
+    return reply
+
+
+class SessionClient:
+    # Blocking client for stations and tools: opens and closes sessions and
+    # collects the workers' metrics
+    def __init__(self, directory, timeout=5.0):
+        self.directory = directory
+        self.timeout = timeout
+
+    def open_session(self, session_id, difficulty='Easy', source=None, rate=None, record=None, **info):
+        return _request(host_path(self.directory, session_id),
+                        {'op': 'open', 'id': session_id, 'difficulty': difficulty, 'source': source,
+                         'rate': rate, 'record': record, 'info': info}, self.timeout)
+
+    def close_session(self, session_id):
+        _request(host_path(self.directory, session_id), {'op': 'close', 'id': session_id}, self.timeout)
+
+    def sessions(self):
+        found = {}
+        for path in host_paths(self.directory):
+            found.update(_request(path, {'op': 'list'}, self.timeout)['sessions'])
+        return found
+
+    # Metrics snapshot of every worker
+    def stats(self):
+        return [_request(path, {'op': 'stats'}, self.timeout) for path in host_paths(self.directory)]
+
+    def subscribe(self, session_id, points=DEFAULT_POINTS):
+        return Subscription(self.directory, session_id, points, self.timeout)
+
+
+class Subscription:
+    # Decimated stream of one session. read() returns (tick time, alarm mask,
+    # timestamps, samples) for the next frame, or None if none arrived in time.
+    def __init__(self, directory, session_id, points=DEFAULT_POINTS, timeout=5.0):
+        self.finished = False
+        self._buffer = bytearray()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(host_path(directory, session_id))
+        self._socket.sendall(json.dumps({'op': 'subscribe', 'id': session_id, 'points': points}).encode() + b'\n')
+        while b'\n' not in self._buffer:
+            data = self._socket.recv(65536)
+            if not data:
+                raise ConnectionError('session server closed the connection')
+            self._buffer += data
+        line, _, rest = bytes(self._buffer).partition(b'\n')
+        self._buffer = bytearray(rest)
+        self.info = json.loads(line)
+        if not self.info['ok']:
+            self._socket.close()
+            raise ValueError(self.info['error'])
+        self._socket.setblocking(False)
+
+    def _take_frame(self):
+        if len(self._buffer) < FRAME_HEADER.size:
+            return None
+        stamp, alarms, rows, points = FRAME_HEADER.unpack_from(self._buffer)
+        end = FRAME_HEADER.size + rows * points * 8
+        if len(self._buffer) < end:
+            return None
+        block = np.frombuffer(self._buffer, '<f8', rows * points, FRAME_HEADER.size).reshape(rows, points).copy()
+        del self._buffer[:end]
+        return stamp, alarms, block[0], block[1:]
+
+    def read(self, timeout=0.1):
+        frame = self._take_frame()
+        if frame is not None or self.finished:
+            return frame
+        if select.select([self._socket], [], [], timeout)[0]:
+            data = self._socket.recv(1 << 20)
+            if not data:
+                self.finished = True
+                return None
+            self._buffer += data
+        return self._take_frame()
+
+    # Lets one select() wait on many subscriptions
+    def fileno(self):
+        return self._socket.fileno()
+
+    def close(self):
+        self._socket.close()
+
+
+class RemoteSource(SensorSource):
+    # Thin-client sensor source: plots a session hosted by the server from its
+    # decimated stream (`points` samples per second) instead of the raw data.
+    # The frames carry the host's filtered channels and derived signals, so
+    # they are not filtered a second time.
+    channels = len(SIGNALS)
+    processed = True
+
+    def __init__(self, directory, session_id, points=DEFAULT_POINTS):
+        super().__init__(points)
+        self.directory = directory
+        self.session_id = session_id
+        self.points = points
+        self.subscription = None
+
+    def open(self):
+        self.subscription = Subscription(self.directory, self.session_id, self.points)
+
+    def read(self, timeout=0.1):
+        frame = self.subscription.read(timeout)
+        self.finished = self.subscription.finished
+        return None if frame is None else frame[2:]
+
+    def close(self):
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve many training sessions from one machine')
+    parser.add_argument('directory', help='directory for the worker sockets')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--interval', type=float, default=TICK_SECONDS, help='tick period in seconds')
+    parser.add_argument('--results', help='SQLite database the session scores are saved to')
+    args = parser.parse_args()
+    with SessionServer(args.directory, args.workers, args.interval, args.results) as server:
+        print(f'{server.workers} workers serving {args.directory}')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
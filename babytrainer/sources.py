@@ -0,0 +1,339 @@
+# Sensor sources: every backend yields timestamped batches of
+# (force, pressure, angular displacement) samples
+import os
+import select
+import socket
+import threading
+import time
+import tty
+from collections import namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+CHANNELS = ('force', 'pressure', 'angular')  # Row order of every batch
+FORCE, PRESSURE, ANGULAR = range(len(CHANNELS))
+FRAME_FIELDS = 1 + len(CHANNELS)  # Wire frame: timestamp followed by one value per channel
+FRAME_DTYPE = np.dtype('<f8')  # Little-endian float64 for every field
+FRAME_BYTES = FRAME_FIELDS * FRAME_DTYPE.itemsize
+CONNECT_TIMEOUT = 3.0  # Seconds a network source waits for its server to accept the connection
+
+
+class SensorSource:
+    # Base class for sample producers. read() returns (timestamps, samples) with
+    # samples shaped (len(CHANNELS), n), or None if nothing arrived within
+    # `timeout` seconds. Returned arrays may be views into reusable storage and
+    # are only valid until the next read().
+    channels = len(CHANNELS)
+    finished = False  # Set once the source has nothing more to deliver (e.g. peer closed)
+    lossless = False  # If set, the worker waits for queue space instead of dropping samples
+    processed = False  # If set, samples come filtered with the derived rows appended (engine.SIGNALS), no DSP needed
+
+    def __init__(self, sample_rate):
+        self.sample_rate = float(sample_rate)
+
+    def open(self):
+        pass
+
+    def read(self, timeout=0.1):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# One synthetic channel: amplitude * function(t) + offset, or a flat `offset` without a function
+Waveform = namedtuple('Waveform', 'function amplitude offset', defaults=(None, 1.0, 0.0))
+
+
+class SyntheticSource(SensorSource):
+    # Generates waveforms in batches of `batch_size`. With `realtime` set, read()
+    # sleeps so batches come out at the device rate; without it, as fast as asked.
+    def __init__(self, sample_rate, force=None, pressure=None, angular=None, batch_size=10, realtime=True):
+        super().__init__(sample_rate)
+        self.waveforms = tuple(w or Waveform() for w in (force, pressure, angular))
+        self.batch_size = batch_size
+        self.realtime = realtime
+        self.sample_index = 0  # Index of the next sample, kept across open()/close()
+        self._offsets = np.arange(batch_size, dtype=np.float64)
+        self._timestamps = np.empty(batch_size)
+        self._samples = np.empty((len(CHANNELS), batch_size))
+        self._next_due = 0.0
+
+    def open(self):
+        self._next_due = time.perf_counter()
+
+    def read(self, timeout=0.1):
+        if self.realtime:
+            delay = self._next_due - time.perf_counter()
+            if delay > timeout:
+                time.sleep(timeout)
+                return None
+            if delay > 0:
+                time.sleep(delay)
+            self._next_due += self.batch_size / self.sample_rate
+        t = self._timestamps
+        np.add(self._offsets, self.sample_index, out=t)
+        t /= self.sample_rate
+        for row, waveform in zip(self._samples, self.waveforms):
+            if waveform.function is None:
+                row.fill(waveform.offset)
+            else:
+                row[:] = waveform.function(t)
+                row *= waveform.amplitude
+                row += waveform.offset
+        self.sample_index += self.batch_size
+        return t, self._samples
+
+
+class _FramedSource(SensorSource):
+    # Shared framing for byte-stream backends: bulk-reads into one reusable
+    # buffer and decodes every complete frame in it as a zero-copy NumPy view.
+    def __init__(self, sample_rate, max_frames=4096):
+        super().__init__(sample_rate)
+        self._buffer = bytearray(max_frames * FRAME_BYTES)
+        self._view = memoryview(self._buffer)
+        self._filled = 0  # Bytes currently held in the buffer
+        self._consumed = 0  # Bytes handed out by the previous read()
+
+    # Read at most len(view) bytes into `view`. Returns the byte count, None on
+    # timeout and 0 once the peer is gone.
+    def _read_into(self, view, timeout):
+        raise NotImplementedError
+
+    def read(self, timeout=0.1):
+        if self._consumed:
+            # Move the trailing partial frame to the front before reading more
+            remainder = self._filled - self._consumed
+            self._buffer[:remainder] = self._buffer[self._consumed:self._filled]
+            self._filled = remainder
+            self._consumed = 0
+        received = self._read_into(self._view[self._filled:], timeout)
+        if received == 0:
+            self.finished = True
+            return None
+        if received is None:
+            return None
+        self._filled += received
+        frames = self._filled // FRAME_BYTES
+        if frames == 0:
+            return None
+        block = np.frombuffer(self._buffer, dtype=FRAME_DTYPE, count=frames * FRAME_FIELDS)
+        block = block.reshape(frames, FRAME_FIELDS)
+        self._consumed = frames * FRAME_BYTES
+        return block[:, 0], block[:, 1:].T
+
+
+class StreamSource(_FramedSource):
+    # Reads frames from a TCP server or from UDP datagrams sent to a local port.
+    # Connecting to an unreachable server gives up after `connect_timeout` seconds.
+    def __init__(self, host, port, sample_rate, protocol='tcp', max_frames=4096, connect_timeout=CONNECT_TIMEOUT):
+        super().__init__(sample_rate, max_frames)
+        if protocol not in ('tcp', 'udp'):
+            raise ValueError(f'unknown protocol {protocol!r}')
+        self.address = (host, port)
+        self.protocol = protocol
+        self.connect_timeout = connect_timeout
+        self._socket = None
+
+    def open(self):
+        self.finished = False
+        self._filled = self._consumed = 0
+        if self.protocol == 'tcp':
+            self._socket = socket.create_connection(self.address, self.connect_timeout)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, len(self._buffer) * 4)
+            self._socket.bind(self.address)
+
+    def _read_into(self, view, timeout):
+        self._socket.settimeout(timeout)
+        try:
+            return self._socket.recv_into(view) if self.protocol == 'tcp' else self._socket.recvfrom_into(view)[0]
+        except socket.timeout:
+            return None
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class SerialSource(_FramedSource):
+    # Reads frames from a serial device (or pty) put into raw mode
+    def __init__(self, port, sample_rate, max_frames=4096):
+        super().__init__(sample_rate, max_frames)
+        self.port = port
+        self._fd = None
+
+    def open(self):
+        self.finished = False
+        self._filled = self._consumed = 0
+        self._fd = os.open(self.port, os.O_RDONLY | os.O_NOCTTY)
+        if os.isatty(self._fd):
+            tty.setraw(self._fd)
+
+    def _read_into(self, view, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return None
+        try:
+            return os.readv(self._fd, [view])
+        except OSError:
+            return 0  # The device went away (e.g. the other end of a pty was closed)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# Build a source from a URL such as tcp://127.0.0.1:9000?rate=1000,
+# udp://0.0.0.0:9000?rate=1000, serial:///dev/ttyUSB0?rate=1000 or, for a
+# session hosted by the session server, session:///run/babytrainer?id=station-1&points=200.
+# Channels sampled by separate devices are given one URL each, e.g.
+# force=tcp://10.0.0.2:9000?rate=1000;pressure=udp://0.0.0.0:9001?rate=250,
+# and aligned onto the time base of the fastest one.
+def open_source(url):
+    if '=' in url.partition('://')[0]:
+        from babytrainer.alignment import AlignedSource  # The alignment module imports this one
+        sources = {}
+        for part in url.split(';'):
+            name, _, channel_url = part.strip().partition('=')
+            if name not in CHANNELS:
+                raise ValueError(f'unknown channel {name!r} in sensor source {url!r}')
+            sources[CHANNELS.index(name)] = open_source(channel_url)
+        return AlignedSource(sources)
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    rate = float(query.get('rate', ['1000'])[0])
+    if parts.scheme in ('tcp', 'udp'):
+        return StreamSource(parts.hostname, parts.port, rate, protocol=parts.scheme)
+    if parts.scheme == 'serial':
+        return SerialSource(parts.path, rate)
+    if parts.scheme == 'session':
+        from babytrainer.server import DEFAULT_POINTS, RemoteSource  # The server module imports this one
+        return RemoteSource(parts.path, query['id'][0], float(query.get('points', [DEFAULT_POINTS])[0]))
+    raise ValueError(f'unsupported sensor source {url!r}')
+
+
+# Pack a batch into wire frames
+def encode_frames(timestamps, samples):
+    frames = np.empty((len(timestamps), FRAME_FIELDS), dtype=FRAME_DTYPE)
+    frames[:, 0] = timestamps
+    frames[:, 1:] = samples.T
+    return frames.tobytes()
+
+
+class _FakeDevice:
+    # Streams frames from a SyntheticSource to `write(bytes)` on a background thread
+    def __init__(self, source):
+        self.source = source
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self.source.open()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._shutdown()
+
+    def _run(self):
+        try:
+            self._connect()
+            while not self._stop.is_set():
+                batch = self.source.read(timeout=0.05)
+                if batch is not None:
+                    self._write(encode_frames(*batch))
+        except OSError:
+            pass  # The reader hung up
+        finally:
+            self._disconnect()
+
+    def _connect(self):
+        pass
+
+    def _write(self, data):
+        raise NotImplementedError
+
+    def _disconnect(self):
+        pass
+
+    def _shutdown(self):
+        pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class FakeStreamServer(_FakeDevice):
+    # Local stand-in for a networked trainer. TCP: listens on `port` (0 picks a
+    # free one) and streams to the first client. UDP: sends datagrams to `port`.
+    def __init__(self, source, port=0, protocol='tcp', host='127.0.0.1'):
+        super().__init__(source)
+        self.protocol = protocol
+        self.host = host
+        self.port = port
+        self._client = None
+        if protocol == 'tcp':
+            self._listener = socket.create_server((host, port))
+            self.port = self._listener.getsockname()[1]
+        else:
+            self._listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _connect(self):
+        if self.protocol == 'tcp':
+            self._listener.settimeout(0.1)
+            while self._client is None and not self._stop.is_set():
+                try:
+                    self._client, _ = self._listener.accept()
+                except socket.timeout:
+                    pass
+
+    def _write(self, data):
+        if self.protocol == 'tcp':
+            self._client.sendall(data)
+        else:
+            view = memoryview(data)
+            step = 1600 * FRAME_BYTES  # Stay below the 64 KiB datagram limit
+            for start in range(0, len(view), step):
+                self._listener.sendto(view[start:start + step], (self.host, self.port))
+
+    def _disconnect(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _shutdown(self):
+        self._listener.close()
+
+
+class FakeSerialDevice(_FakeDevice):
+    # pty-backed stand-in for the trainer's serial link; read from `port`
+    def __init__(self, source):
+        super().__init__(source)
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view and not self._stop.is_set():
+            _, writable, _ = select.select([], [self._master], [], 0.05)
+            if writable:
+                view = view[os.write(self._master, view):]
+
+    def _shutdown(self):
+        os.close(self._master)
+        os.close(self._slave)
@@ -0,0 +1,69 @@
+# Declarative description of the training channels and difficulty levels.
+# The training window engine, the alert rules and the offline tools all read
+# these specs, so adding a channel or a level means adding an entry here.
+from collections import namedtuple
+
+import numpy as np
+
+from babytrainer.sources import ANGULAR, FORCE, PRESSURE, Waveform
+
+# How one sensor channel is labelled, drawn and judged
+ChannelSpec = namedtuple('ChannelSpec', [
+    'channel',  # Row index in every sample batch (FORCE, PRESSURE or ANGULAR)
+    'name',  # Tab and widget name
+    'axis_label',  # Left axis label
+    'units',
+    'threshold',  # Alarm level, also drawn as a horizontal line
+    'pen',  # Curve colour
+    'threshold_pen',  # Threshold line colour
+    'hysteresis',  # See babytrainer.alerts.ThresholdRule
+    'min_dwell',
+    'simulation',  # Waveform used when no trainer is connected
+    'cutoff',  # Low-pass cutoff in Hz against sensor noise (None: unfiltered)
+    'smoothing',  # Moving-average window in seconds on top of the low-pass (0: none)
+    'y_range',  # (low, high) of the y axis while following (None: grows to fit the data)
+], defaults=(0.0, 0.0, None, None, 0.0, None))
+
+# How the plot widgets of a level are drawn, see babytrainer.plotting.RenderQuality
+RenderSpec = namedtuple('RenderSpec', [
+    'mode',  # Starting mode, one of babytrainer.plotting.RENDER_MODES
+    'adaptive',  # Step the mode down (and back up) with the measured paint time
+    'frame_budget',  # Share of the plot interval the widgets on one tab may spend painting
+    'clip_to_view',  # Only hand pyqtgraph the points inside the visible x range
+    'downsampling',  # Let pyqtgraph peak-downsample to the widget width
+    'fixed_ranges',  # Set the axis ranges while following instead of auto-ranging every update
+], defaults=('aliased', True, 0.5, True, True, True))
+
+# One difficulty level: which channels it shows and how its window is laid out
+DifficultySpec = namedtuple('DifficultySpec', [
+    'name',  # As offered in the training form
+    'title',  # Window title
+    'channels',  # ChannelSpecs in tab order
+    'combined_view',  # Add a "Combined View" tab with every channel in a grid
+    'combined_first',  # Put the combined tab before the per-channel tabs
+    'sample_rate',  # Simulated samples per second, per channel
+    'window_seconds',  # Length of the rolling time window shown while following
+    'plot_interval_ms',  # Plot refresh period
+    'combined_columns',  # Grid width of the combined view
+    'render',  # RenderSpec of its plot widgets
+], defaults=(100, 10.0, 100, 2, RenderSpec()))
+
+FORCE_SPEC = ChannelSpec(FORCE, 'Force', 'Force', 'N', 0.5, 'r', 'g', simulation=Waveform(np.sin), cutoff=20.0)
+PRESSURE_SPEC = ChannelSpec(PRESSURE, 'Pressure', 'Pressure', 'Pa', 100, 'b', 'b',
+                            simulation=Waveform(np.cos, 80, 100), cutoff=20.0)
+ANGULAR_SPEC = ChannelSpec(ANGULAR, 'Angular Displacement', 'Angular Displacement', 'deg', 0.5, 'b', 'g',
+                           simulation=Waveform(np.cos), cutoff=20.0)
+
+DIFFICULTIES = {
+    # One or two curves per tab: antialiased, until a slow machine steps them down
+    'Easy': DifficultySpec('Easy', 'Simple training', (FORCE_SPEC,), combined_view=False, combined_first=False,
+                           render=RenderSpec('antialiased')),
+    'Intermediate': DifficultySpec('Intermediate', 'Intermediate Training', (FORCE_SPEC, ANGULAR_SPEC),
+                                   combined_view=True, combined_first=False, render=RenderSpec('antialiased')),
+    'Advanced': DifficultySpec('Advanced', 'Advanced Training', (
+        FORCE_SPEC._replace(simulation=Waveform(np.sin, 0.4, 0.5)),
+        PRESSURE_SPEC,
+        ANGULAR_SPEC._replace(pen='g', simulation=Waveform(np.sin, 0.4, 0.5)),
+    ), combined_view=True, combined_first=True),
+}
+
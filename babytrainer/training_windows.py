@@ -0,0 +1,253 @@
+# Training windows for the three difficulty levels. Kept out of
+# "Main Application.py" so pyqtgraph, NumPy and the data pipeline are only
+# imported once a training session is about to start.
+import os  # Used to read the instrumentation switch from the environment
+from PyQt6.QtWidgets import (  # Import necessary widgets from PyQt6
+    QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QTabWidget, QGridLayout
+)
+from PyQt6.QtCore import QTimer  # Timer driving the plot refresh
+from babytrainer.engine import SessionEngine  # Acquisition, history, threshold rules and recording
+from babytrainer.plotting import (  # Draws the history at screen resolution, visible tab first
+    RENDER_MODES, LevelOfDetailCurve, MetricsOverlay, RenderQuality, RenderScheduler, RenderStats, TimedPlotWidget
+)
+from babytrainer.metrics import MetricsServer, TickMetrics  # Opt-in render loop profiling
+from babytrainer.training_spec import DIFFICULTIES  # Channels and layout of every difficulty level
+
+PAINT_REPORT = bool(os.environ.get('BABY_TRAINER_PAINT_REPORT'))  # Print per-widget paint timings on close
+METRICS_PORT = int(os.environ.get('BABY_TRAINER_METRICS_PORT', '0'))  # Serve tick metrics on localhost:port
+PROFILE = bool(os.environ.get('BABY_TRAINER_PROFILE')) or bool(METRICS_PORT)  # Per-tick histograms and overlay
+RENDER_MODE = os.environ.get('BABY_TRAINER_RENDER_MODE')  # Starting render mode of every level, e.g. 'coarse' on kiosks
+if RENDER_MODE not in (None,) + RENDER_MODES:
+    raise ValueError(f'BABY_TRAINER_RENDER_MODE must be one of {", ".join(RENDER_MODES)}')
+# Defaults of the built-in levels, kept for callers that size things from them
+SAMPLE_RATE = DIFFICULTIES['Easy'].sample_rate
+WINDOW_SECONDS = DIFFICULTIES['Easy'].window_seconds
+PLOT_INTERVAL_MS = DIFFICULTIES['Easy'].plot_interval_ms
+
+
+# One training window, built entirely from a DifficultySpec
+class TrainingWindow(QMainWindow):
+    spec = None  # Set by subclasses, or passed to the constructor
+
+    def __init__(self, fullname="", personal_id="", occupation="", difficulty="", source=None, recording_path=None,
+                 results=None, spec=None):
+        super().__init__()
+        self.spec = spec or self.spec
+        self.trainee = dict(personal_id=personal_id, fullname=fullname, occupation=occupation, difficulty=difficulty)
+        self.results = results  # ResultsStore the session's score is saved to when the window closes
+        self.setWindowTitle(self.spec.title)
+        # Per-tick stage histograms, timer jitter and missed ticks, only when profiling
+        self.metrics = TickMetrics(self.spec.plot_interval_ms / 1000.0) if PROFILE else None
+        self.render_stats = RenderStats(self.metrics)  # Paint and update timings per plot widget
+        self.main_layout = QVBoxLayout()
+
+        # One tab per channel, plus the combined view if the level has one
+        self.tabs = QTabWidget()
+        self.channel_tabs = {}  # Channel index -> tab page
+        self.plot_widgets = {}  # Channel index -> plot widget on its own tab
+        self.curves = {}  # Channel index -> curve on its own tab
+        self.combined_tab = None
+        self.combined_plot_widgets = {}
+        self.combined_curves = {}
+        if self.spec.combined_view and self.spec.combined_first:
+            self.create_combined_tab()
+        for channel in self.spec.channels:
+            self.create_channel_tab(channel)
+        if self.spec.combined_view and not self.spec.combined_first:
+            self.create_combined_tab()
+        self.main_layout.addWidget(self.tabs)
+
+        # Display personal and training details
+        self.display_input_info(fullname, personal_id, occupation, difficulty)
+
+        # Control buttons for starting and stopping the training
+        self.start_button = QPushButton('Start')
+        self.start_button.clicked.connect(self.start_plot)
+        self.stop_button = QPushButton('Stop')
+        self.stop_button.clicked.connect(self.stop_plot)
+        self.main_layout.addWidget(self.start_button)
+        self.main_layout.addWidget(self.stop_button)
+        self.status_label = QLabel()  # Why the session stopped on its own, e.g. the trainer is unreachable
+        self.status_label.setStyleSheet("color: red;")
+        self.main_layout.addWidget(self.status_label)
+
+        # Timer to handle real-time updates to the plots
+        self.plot_timer = QTimer()
+        self.plot_timer.timeout.connect(self.update_plots)
+
+        central_widget = QWidget()
+        central_widget.setLayout(self.main_layout)
+        self.setCentralWidget(central_widget)
+
+        # Sensor backend (the physical trainer if one was given, otherwise a simulation) and the
+        # headless processing behind the plots, recording the session to disk if asked to
+        self.engine = SessionEngine(self.spec, source, recording_path, on_alert=self.update_indicator,
+                                    metrics=self.metrics, fullname=fullname, personal_id=personal_id,
+                                    occupation=occupation, difficulty=difficulty)
+        self.source = self.engine.source
+        self.buffer = self.engine.buffer
+        self.sample_queue = self.engine.sample_queue
+        self.history = self.engine.history
+        self.alerts = self.engine.alerts
+
+        # Curves are drawn as per-pixel min/max envelopes of the history; only the
+        # visible tab is redrawn each tick and hidden tabs catch up when shown.
+        # Each widget's rendering mode follows its paint time.
+        self.render_scheduler = RenderScheduler(self.tabs, self.render_stats)
+        render = self.spec.render._replace(mode=RENDER_MODE) if RENDER_MODE else self.spec.render
+        self.render_quality = RenderQuality(render, self.spec.plot_interval_ms / 1000.0)
+        for channel in self.spec.channels:
+            index = channel.channel
+            self.add_curve(self.channel_tabs[index], self.plot_widgets[index], self.curves[index], channel)
+            if self.combined_tab is not None:
+                self.add_curve(self.combined_tab, self.combined_plot_widgets[index], self.combined_curves[index],
+                               channel)
+
+        # Light indicator for threshold breaches
+        self.light_indicator = QLabel()
+        self.light_indicator.setFixedSize(60, 60)
+        self.light_indicator.setStyleSheet("border-radius: 10px; background-color: red;")
+        self.main_layout.addWidget(self.light_indicator)
+        self.indicator_colour = 'red'
+        # Channel whose alarm drives the light on each tab (None: any channel)
+        self.indicator_channels = {tab: index for index, tab in self.channel_tabs.items()}
+        if self.combined_tab is not None:
+            self.indicator_channels[self.combined_tab] = None
+        self.tabs.currentChanged.connect(self.update_indicator)
+
+        # FPS/latency readout and the localhost metrics endpoint, when profiling
+        self.metrics_overlay = None
+        self.metrics_server = None
+        if self.metrics is not None:
+            self.metrics.counters['dropped_samples'] = 0
+            self.metrics.counters['render_mode_changes'] = 0
+            self.metrics_overlay = MetricsOverlay(self.tabs, self.metrics)
+            if METRICS_PORT:
+                try:
+                    self.metrics_server = MetricsServer(self.metrics, METRICS_PORT)
+                except OSError as error:  # E.g. another training window already serves the port
+                    print(f'metrics endpoint not started: {error}')
+
+    # Display static user information clearly
+    def display_input_info(self, fullname, personal_id, occupation, difficulty):
+        info_label = QLabel(f"Full Name: {fullname}\n"
+                            f"Personal ID: {personal_id}\n"
+                            f"Occupation: {occupation}\n"
+                            f"Difficulty: {difficulty}")
+        self.main_layout.addWidget(info_label)
+
+    # Plot widget with a threshold line and one long-lived curve, updated in place
+    def create_plot_widget(self, channel, stats_name, axis_labels):
+        plot_widget = TimedPlotWidget(stats_name, self.render_stats)
+        plot_widget.setTitle(f'{channel.name} vs. Time')
+        if axis_labels:
+            plot_widget.setLabel('left', channel.axis_label, units=channel.units)
+            plot_widget.setLabel('bottom', 'Time', units='s')
+        plot_widget.addLine(y=channel.threshold, pen=channel.threshold_pen)  # Threshold line
+        curve = plot_widget.plot(pen=channel.pen)
+        return plot_widget, curve
+
+    # Create the tab for one channel
+    def create_channel_tab(self, channel):
+        tab = QWidget()
+        layout = QVBoxLayout()
+        plot_widget, curve = self.create_plot_widget(channel, channel.name, axis_labels=True)
+        layout.addWidget(plot_widget)
+        tab.setLayout(layout)
+        self.tabs.addTab(tab, channel.name)
+        self.channel_tabs[channel.channel] = tab
+        self.plot_widgets[channel.channel] = plot_widget
+        self.curves[channel.channel] = curve
+
+    # Combined tab showing all channels together in a grid for comparison
+    def create_combined_tab(self):
+        self.combined_tab = QWidget()
+        grid_layout = QGridLayout()
+        columns = self.spec.combined_columns
+        for position, channel in enumerate(self.spec.channels):
+            plot_widget, curve = self.create_plot_widget(channel, f'Combined {channel.name}', axis_labels=False)
+            grid_layout.addWidget(plot_widget, position // columns, position % columns)
+            self.combined_plot_widgets[channel.channel] = plot_widget
+            self.combined_curves[channel.channel] = curve
+        self.combined_tab.setLayout(grid_layout)
+        self.tabs.addTab(self.combined_tab, 'Combined View')
+
+    # Draw `channel` of the history into `curve` whenever `page` is the visible tab
+    def add_curve(self, page, plot_widget, curve, channel):
+        curve = LevelOfDetailCurve(plot_widget, curve, self.history, channel.channel, self.spec.window_seconds,
+                                   self.spec.render.fixed_ranges, channel.y_range)
+        self.render_scheduler.add(page, curve)
+        self.render_quality.add(page, plot_widget, curve)
+
+    # Methods to start and stop the real-time data plot updates
+    def start_plot(self):
+        self.status_label.clear()
+        self.engine.start()
+        self.update_indicator()
+        if not self.plot_timer.isActive():
+            self.plot_timer.start(self.spec.plot_interval_ms)
+
+    def stop_plot(self):
+        self.engine.stop()
+        if self.plot_timer.isActive():
+            self.plot_timer.stop()
+
+    # Make sure the acquisition thread does not outlive the window, the recording is complete and the score saved
+    def closeEvent(self, event):
+        self.stop_plot()
+        self.engine.close()
+        if self.results is not None and self.engine.score is not None and self.engine.score.sample_count:
+            self.results.add(self.engine.score.result(**self.trainee))
+            self.results = None
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if PAINT_REPORT:
+            print(f'{self.windowTitle()}\n{self.render_stats.report()}')
+            print('render modes: ' + ', '.join(f'{name} {mode}' for name, mode in self.render_quality.modes().items()))
+        super().closeEvent(event)
+
+    # Light turns red while the current tab's channel is in alarm; the style sheet is only touched on a change
+    def update_indicator(self, *args):
+        channel = self.indicator_channels.get(self.tabs.currentWidget())
+        colour = 'red' if self.alerts.is_active(channel) else 'green'
+        if colour != self.indicator_colour:
+            self.indicator_colour = colour
+            self.light_indicator.setStyleSheet(f"border-radius: 10px; background-color: {colour};")
+
+    # Update the plots based on the timer: pull new samples through every sink, then redraw
+    def update_plots(self):
+        if self.metrics is not None:
+            self.metrics.tick_started(len(self.sample_queue) / self.source.sample_rate)
+
+        # Pull whatever the acquisition thread produced since the last tick
+        self.engine.poll()
+        if self.engine.error is not None and not self.engine.is_running():
+            self.stop_plot()
+            self.status_label.setText(f'Sensor stopped: {self.engine.error}')
+
+        # Update the curves on the visible tab in place
+        if len(self.buffer):
+            self.render_scheduler.refresh()
+        self.render_quality.update()  # Paints of the previous tick
+
+        if self.metrics is not None:
+            self.metrics.counters['dropped_samples'] = self.sample_queue.dropped
+            self.metrics.counters['render_mode_changes'] = self.render_quality.changes
+            self.metrics.tick_finished()
+            self.metrics_overlay.refresh()
+
+
+# Simple training: force only
+class Window2(TrainingWindow):
+    spec = DIFFICULTIES['Easy']
+
+
+# Intermediate training: force and angular displacement, plus a combined view
+class Window3(TrainingWindow):
+    spec = DIFFICULTIES['Intermediate']
+
+
+# Advanced training: force, pressure and angular displacement, combined view first
+class Window4(TrainingWindow):
+    spec = DIFFICULTIES['Advanced']
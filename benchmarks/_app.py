@@ -0,0 +1,138 @@
+# Shared helpers for the headless benchmarks in this folder
+import importlib.util
+import os
+import sys
+
+# Run Qt without a display unless the caller picked a platform already
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+# Import "Main Application.py" as a module (the space in the name rules out a plain import)
+def load_app():
+    if 'main_application' in sys.modules:
+        return sys.modules['main_application']
+    spec = importlib.util.spec_from_file_location('main_application', os.path.join(ROOT, 'Main Application.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['main_application'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Create (or reuse) the QApplication the windows need
+def qt_app():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+# Return the p-th percentile of a sorted list of timings
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Simulated sensor whose force channel is the sample index, so gaps are detectable
+def counting_sensor(sample_rate, **kwargs):
+    import numpy as np
+    from babytrainer.sources import SyntheticSource, Waveform
+    return SyntheticSource(sample_rate, force=Waveform(lambda t: np.rint(t * sample_rate)),
+                           pressure=Waveform(np.sin), angular=Waveform(np.cos), **kwargs)
+
+
+# Drain target that checks a counting sensor's force channel (the sample index)
+# for gaps or reordering before forwarding each batch to `buffer`
+class ContinuityChecker:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.expected = 0
+        self.received = 0
+        self.errors = 0
+
+    def append(self, timestamps, samples):
+        import numpy as np
+        index = samples[0]
+        if index[0] != self.expected or np.any(np.diff(index) != 1):
+            self.errors += 1
+        self.expected = int(index[-1]) + 1
+        self.received += len(index)
+        self.buffer.append(timestamps, samples)
+
+
+WINDOWS = {'Easy': 'window2', 'Intermediate': 'window3', 'Advanced': 'window4'}  # Training form attribute per level
+
+
+# Samples for `n` plot ticks of a level starting at sample `start`: force at
+# `level`, pressure and angular displacement at zero
+def level_samples(spec, start, n, level):
+    import numpy as np
+    index = np.arange(start, start + n, dtype=float)
+    rows = np.zeros((3, n))
+    rows[spec.channels[0].channel] = level
+    return index / spec.sample_rate, rows
+
+
+# A training window fed by hand instead of by its acquisition thread: every
+# tick pushes the next batch and fires the plot timer's timeout, then lets Qt paint
+class HandFedSession:
+    def __init__(self, app, window):
+        self.app = app
+        self.window = window
+        self.spec = window.spec
+        self.per_tick = int(self.spec.sample_rate * self.spec.plot_interval_ms / 1000)
+        self.fed = 0
+
+    def tick(self, level):
+        self.window.sample_queue.push(*level_samples(self.spec, self.fed, self.per_tick, level))
+        self.fed += self.per_tick
+        self.window.plot_timer.timeout.emit()
+        self.app.processEvents()
+
+    # Run `ticks` ticks at `level`, returns the sorted tick times in ms as measured by `clock`
+    def run(self, ticks, level, clock=None):
+        import time
+        clock = clock or time.perf_counter
+        timings = []
+        for _ in range(ticks):
+            start = clock()
+            self.tick(level)
+            timings.append((clock() - start) * 1000)
+        return sorted(timings)
+
+
+# Go from the start-up page through the training form to the training window of
+# `difficulty`, clicking the buttons a trainee would. Returns the form and the
+# window it opened (None if it did not).
+def open_training_window(app, module, difficulty, personal_id):
+    start_page = module.MainWindow1()
+    start_page.show()
+    app.processEvents()
+    start_page.findChild(module.QPushButton).click()
+    app.processEvents()
+    form = start_page.window1
+    if form is None or not form.isVisible() or start_page.isVisible():
+        return form, None
+    form.fullname_input.setText('Regression Trainee')
+    form.personal_id_input.setText(personal_id)
+    form.occupation_input.setText('Midwife')
+    form.difficulty_combo.setCurrentText(difficulty)
+    form.start_training_button.click()
+    app.processEvents()
+    window = getattr(form, WINDOWS[difficulty], None)
+    if window is None or not window.isVisible():
+        return form, None
+    window.resize(1000, 800)
+    app.processEvents()
+    return form, window
+
+
+# (plot items, scene items, data items) of every plot widget of a window, by widget
+def scene_items(window):
+    import pyqtgraph as pg
+    return {widget.stats_name: (len(widget.getPlotItem().items), len(widget.scene().items()),
+                                len(widget.getPlotItem().listDataItems()))
+            for widget in window.findChildren(pg.PlotWidget)}
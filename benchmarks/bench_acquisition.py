@@ -0,0 +1,54 @@
+# Headless harness for the background acquisition path: a simulated 1 kHz sensor
+# feeds an SpscQueue from its own thread while a deliberately slow render loop
+# drains it. Exits non-zero if any sample is dropped, duplicated or reordered.
+#
+#   python benchmarks/bench_acquisition.py [--rate 1000] [--duration 10] [--max-stall-ms 400]
+import argparse
+import random
+import sys
+import time
+
+from _app import ContinuityChecker, counting_sensor
+from babytrainer.acquisition import AcquisitionWorker, SpscQueue
+from babytrainer.ring_buffer import RingBuffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Acquisition thread vs. slow render loop')
+    parser.add_argument('--rate', type=float, default=1000.0)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--interval-ms', type=float, default=100.0, help='nominal render period')
+    parser.add_argument('--max-stall-ms', type=float, default=400.0, help='worst artificial render stall')
+    parser.add_argument('--queue-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    queue = SpscQueue(3, int(args.rate * args.queue_seconds))
+    checker = ContinuityChecker(RingBuffer(3, args.rate, 10.0))
+    worker = AcquisitionWorker(counting_sensor(args.rate), queue)
+    rng = random.Random(0)
+    backlog = []
+
+    worker.start()
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        backlog.append(len(queue))
+        # Render step: drain, then pretend drawing took a normal or, sometimes, a very long time
+        queue.drain_into(checker)
+        time.sleep(rng.uniform(0, args.max_stall_ms) / 1000.0 if rng.random() < 0.2 else args.interval_ms / 1000.0)
+    worker.stop()
+    elapsed = time.perf_counter() - start
+    queue.drain_into(checker)
+
+    produced = worker.sample_count
+    print(f'produced        {produced} samples in {elapsed:.2f} s ({produced / elapsed:,.0f} samples/s per channel)')
+    print(f'consumed        {checker.received}')
+    print(f'dropped         {queue.dropped}')
+    print(f'continuity errs {checker.errors}')
+    print(f'max backlog     {max(backlog)} samples ({max(backlog) / args.rate * 1000:.0f} ms)')
+    ok = queue.dropped == 0 and checker.errors == 0 and checker.received == produced
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
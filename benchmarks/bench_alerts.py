@@ -0,0 +1,89 @@
+# Alert engine check and benchmark. First replays noisy signals through the
+# batch rules in random chunk sizes and compares every crossing with a
+# sample-by-sample reference, then measures throughput at 10 kHz per channel.
+# Exits non-zero if any crossing is missed, invented or mistimed.
+#
+#   python benchmarks/bench_alerts.py [--trials 200] [--seconds 60]
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import _app  # noqa: F401  (puts the repository root on sys.path)
+from babytrainer.alerts import AlertEngine, ThresholdRule
+
+
+# Straightforward per-sample implementation of the same rule semantics
+def reference_crossings(timestamps, values, threshold, hysteresis, min_dwell, above=True):
+    raw, run_start, active, events = False, None, False, []
+    for t, x in zip(timestamps, values):
+        sets = x > threshold if above else x < threshold
+        clears = x < threshold - hysteresis if above else x > threshold + hysteresis
+        state = True if sets else False if clears else raw
+        if state != raw or run_start is None:
+            raw, run_start = state, t
+        if raw != active and t - run_start >= min_dwell:
+            active = raw
+            events.append((float(t), active, float(x)))
+    return events
+
+
+def check(trials):
+    rng = np.random.default_rng(0)
+    failures = 0
+    for trial in range(trials):
+        n = int(rng.integers(10, 5000))
+        rate = float(rng.choice([100.0, 1000.0, 10000.0]))
+        timestamps = np.arange(n) / rate + rng.uniform(0, 5)
+        values = np.sin(timestamps * rng.uniform(1, 50)) + rng.normal(0, rng.uniform(0, 0.5), n)
+        threshold = rng.uniform(-0.5, 0.5)
+        hysteresis = float(rng.choice([0.0, rng.uniform(0, 0.3)]))
+        min_dwell = float(rng.choice([0.0, rng.uniform(0, 20 / rate)]))
+        above = bool(rng.integers(2))
+        expected = reference_crossings(timestamps, values, threshold, hysteresis, min_dwell, above)
+
+        engine = AlertEngine([ThresholdRule(0, threshold, hysteresis, min_dwell, above)], history=None)
+        position = 0
+        while position < n:
+            size = int(rng.integers(1, 300))
+            engine.append(timestamps[position:position + size], values[None, position:position + size])
+            position += size
+        got = [(event.time, event.active, event.value) for event in engine.events]
+        if got != expected:
+            failures += 1
+            print(f'trial {trial}: expected {len(expected)} crossings, got {len(got)}')
+    print(f'correctness  {trials - failures}/{trials} randomly chunked trials match the per-sample reference')
+    return failures == 0
+
+
+def throughput(seconds, rate, batch):
+    n = int(seconds * rate)
+    timestamps = np.arange(n) / rate
+    samples = np.vstack((np.sin(timestamps * 3), np.cos(timestamps * 3) * 80 + 100, np.sin(timestamps)))
+    samples += np.random.default_rng(1).normal(0, 0.05, samples.shape)
+    engine = AlertEngine([ThresholdRule(0, 0.5, 0.05, 0.01), ThresholdRule(1, 100, 5, 0.01),
+                          ThresholdRule(2, 0.5, 0.05, 0.01)])
+    start = time.perf_counter()
+    for i in range(0, n, batch):
+        engine.append(timestamps[i:i + batch], samples[:, i:i + batch])
+    elapsed = time.perf_counter() - start
+    print(f'{rate:>8,.0f} Hz x 3 ch, batch {batch:>5}: {n * 3 / elapsed:>14,.0f} samples/s '
+          f'({n / elapsed / rate:>8,.0f}x real time), {engine.event_count} crossings')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Alert engine correctness and throughput')
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=60.0, help='signal length for the throughput runs')
+    args = parser.parse_args()
+
+    ok = check(args.trials)
+    for rate in (1000.0, 10000.0):
+        for batch in (int(rate // 100), int(rate // 10)):
+            throughput(args.seconds, rate, batch)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# Channel alignment benchmark. Three channels sampled at different rates with
+# jittered timestamps reach ChannelAligner in randomly sized, randomly delayed
+# deliveries and are checked against an offline reference (np.interp of each
+# whole stream onto the same grid), which they must match bit for bit. A stalled channel must not hold
+# the output back by more than the latency bound, and the buffers must not
+# grow with the session. An AlignedSource over three simulated sensors must
+# deliver one evenly spaced time base. Then the throughput is reported per
+# batch size. Exits with status 1 if a check fails.
+#
+#   python benchmarks/bench_alignment.py [--seconds 60] [--rate 1000]
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import _app  # noqa: F401  (puts the repo on sys.path)
+from babytrainer.alignment import MAX_LATENCY, AlignedSource, ChannelAligner
+from babytrainer.sources import ANGULAR, FORCE, PRESSURE, SyntheticSource, Waveform
+
+RATES = (1000.0, 250.0, 500.0)  # Force, pressure and angular displacement sensors
+JITTER = (0.3, 0.5, 0.2)  # Timestamp jitter as a share of each sample period
+
+
+def movement(t):
+    return np.sin(2 * np.pi * 0.5 * t) + 0.1 * np.cos(2 * np.pi * 7 * t)
+
+
+def streams(seconds, seed=1):
+    rng = np.random.default_rng(seed)
+    result = []
+    for rate, jitter in zip(RATES, JITTER):
+        n = int(seconds * rate)
+        t = np.arange(n) / rate + rng.uniform(0, jitter / rate, n)
+        result.append((t, movement(t)))
+    return result
+
+
+# Deliver the streams as the sensors would: every few milliseconds each one
+# hands over what it has sampled, less a random transport delay. During
+# `stall` (channel, from, to) that channel's samples are lost.
+def run_chunked(aligner, data, rng, stall=None):
+    positions = [0] * len(data)
+    times, rows, lags = [], [], []
+    clock = 0.0
+    while clock < max(t[-1] for t, _ in data) + 1.0:
+        clock += rng.uniform(0.001, 0.1)
+        for channel, (t, v) in enumerate(data):
+            stop = int(np.searchsorted(t, clock - rng.uniform(0, 0.05)))
+            if stall is None or channel != stall[0] or not stall[1] <= clock < stall[2]:
+                aligner.push(channel, t[positions[channel]:stop], v[positions[channel]:stop])
+            positions[channel] = max(positions[channel], stop)
+        pulled = aligner.pull()
+        if pulled is not None:
+            times.append(pulled[0].copy())
+            rows.append(pulled[1].copy())
+            newest = max(stream.last_time for stream in aligner.streams)
+            lags.append(newest - pulled[0][-1])
+    return np.concatenate(times), np.concatenate(rows, axis=1), lags
+
+
+def offline(data, rate):
+    first = max(t[0] for t, _ in data)
+    last = min(t[-1] for t, _ in data)
+    grid = np.arange(np.ceil(first * rate), np.floor(last * rate) + 1) / rate
+    return grid, np.vstack([np.interp(grid, t, v) for t, v in data])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Correctness and throughput of the channel alignment')
+    parser.add_argument('--seconds', type=float, default=60.0, help='length of the simulated streams')
+    parser.add_argument('--rate', type=float, default=1000.0, help='output rate')
+    args = parser.parse_args()
+    failed = False
+    rng = np.random.default_rng(2)
+    data = streams(args.seconds)
+
+    grid, reference = offline(data, args.rate)
+    t, samples, _ = run_chunked(ChannelAligner(3, args.rate, max_latency=None), data, rng)
+    exact = len(t) <= len(grid) and np.array_equal(t, grid[:len(t)]) and np.array_equal(samples, reference[:, :len(t)])
+    failed |= not exact or len(t) != len(grid)
+    error = np.abs(samples - movement(t)).max(axis=1)
+    print(f'chunked vs offline: {len(t):,} of {len(grid):,} grid points, '
+          f'{"bit-exact" if exact else "DIFFERENT"}; '
+          f'interpolation error vs the true signal {", ".join(f"{e:.1e}" for e in error)} '
+          f'(force, pressure, angular)')
+
+    aligner = ChannelAligner(3, args.rate)
+    stall = (PRESSURE, args.seconds / 6, args.seconds / 6 + 5.0)
+    t, samples, lags = run_chunked(aligner, data, rng, stall)
+    capacity = max(len(stream.t) for stream in aligner.streams)
+    lagging = max(lags) > MAX_LATENCY + 2 / args.rate
+    failed |= lagging or not aligner.held or np.any(np.diff(t) <= 0) or capacity > 8 * MAX_LATENCY * max(RATES)
+    print(f'pressure silent for 5 s: output lag at most {max(lags) * 1000:.0f} ms (bound {MAX_LATENCY * 1000:.0f} ms), '
+          f'{aligner.held:,} values held, largest buffer {capacity} samples after {args.seconds:g} s')
+
+    source = AlignedSource({channel: SyntheticSource(rate, Waveform(np.sin), Waveform(np.sin), Waveform(np.sin),
+                                                     batch_size=int(rate // 10), realtime=False)
+                            for channel, rate in zip((FORCE, PRESSURE, ANGULAR), RATES)})
+    source.open()
+    times, rows = [], []
+    while sum(map(len, times)) < 10 * source.sample_rate:
+        batch = source.read()
+        if batch is not None:
+            times.append(batch[0].copy())
+            rows.append(batch[1].copy())
+    source.close()
+    t, samples = np.concatenate(times), np.concatenate(rows, axis=1)
+    even = np.allclose(np.diff(t), 1 / source.sample_rate)
+    close = np.abs(samples - np.sin(t)).max() < 1e-4
+    failed |= not even or not close
+    print(f'AlignedSource {"/".join(f"{r:g}" for r in RATES)} Hz -> {source.sample_rate:g} Hz: '
+          f'{"evenly spaced" if even else "UNEVEN"}, max error vs the waveform {np.abs(samples - np.sin(t)).max():.1e}')
+
+    print(f'\n{"batch (s)":>9} {"output Msamples/s":>18} {"x real time":>12}')
+    for batch_seconds in (0.01, 0.1, 1.0):
+        aligner = ChannelAligner(3, args.rate)
+        positions = [0] * 3
+        output = 0
+        start = time.perf_counter()
+        for step in range(int(args.seconds / batch_seconds)):
+            for channel, (ts, vs) in enumerate(data):
+                stop = int(np.searchsorted(ts, (step + 1) * batch_seconds))
+                aligner.push(channel, ts[positions[channel]:stop], vs[positions[channel]:stop])
+                positions[channel] = stop
+            pulled = aligner.pull()
+            output += 0 if pulled is None else len(pulled[0])
+        elapsed = time.perf_counter() - start
+        print(f'{batch_seconds:>9g} {output * 3 / elapsed / 1e6:>18.2f} {args.seconds / elapsed:>12.0f}')
+
+    print('FAILED' if failed else 'all checks passed')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
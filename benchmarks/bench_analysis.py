@@ -0,0 +1,72 @@
+# Offline analysis benchmark: re-scores a folder of simulated recordings with
+# 1, 2, 4 and N worker processes and reports sessions and samples per second
+# and the speed-up over one worker. Checks that every worker count produces the
+# same rows and that the analysis module starts without importing Qt. Exits
+# with status 1 if a check fails.
+#
+#   python benchmarks/bench_analysis.py [--sessions 32] [--minutes 5] [--workers 8]
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _app import ROOT
+from babytrainer.analysis import analyse_sessions, find_sessions
+from babytrainer.recording import SessionRecorder
+from babytrainer.training_spec import DIFFICULTIES
+from bench_archive import simulated_batches
+
+# Imports the CLI and reports whether any Qt module came with it, and how long that took
+IMPORT_CHECK = ('import sys, time; start = time.perf_counter(); import babytrainer.analysis; '
+                'print(time.perf_counter() - start, '
+                'any(m.split(".")[0] in ("PyQt6", "pyqtgraph") for m in sys.modules))')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scaling of the offline analysis over worker processes')
+    parser.add_argument('--sessions', type=int, default=32, help='recordings to score')
+    parser.add_argument('--minutes', type=float, default=5.0, help='length of every recording')
+    parser.add_argument('--rate', type=float, default=1000.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='N, the largest pool tried')
+    args = parser.parse_args()
+
+    output = subprocess.run([sys.executable, '-c', IMPORT_CHECK], cwd=ROOT, capture_output=True, text=True, check=True)
+    seconds, imports_qt = output.stdout.split()
+    failed = imports_qt == 'True'
+    print(f'import babytrainer.analysis: {float(seconds) * 1000:.0f} ms, '
+          f'{"imports Qt" if failed else "no Qt modules"}')
+
+    with tempfile.TemporaryDirectory() as folder:
+        levels = list(DIFFICULTIES)
+        for index in range(args.sessions):
+            recorder = SessionRecorder(os.path.join(folder, f'session-{index:04}.btr'), args.rate,
+                                       personal_id=f'{index:04}', difficulty=levels[index % len(levels)])
+            for batch in simulated_batches(args.minutes, args.rate, seed=index):
+                recorder.append(*batch)
+            recorder.close()
+        paths = find_sessions([folder])
+        samples = args.sessions * int(args.minutes * 60 * args.rate)
+        print(f'{args.sessions} sessions x {args.minutes:g} min at {args.rate:g} Hz ({samples / 1e6:.1f} M samples)')
+
+        print(f'{"workers":>7} {"seconds":>8} {"sessions/s":>11} {"Msamples/s":>11} {"speed-up":>9}')
+        expected = None
+        single = None
+        for workers in sorted({1, 2, 4, args.workers}):
+            start = time.perf_counter()
+            rows = list(analyse_sessions(paths, workers))
+            elapsed = time.perf_counter() - start
+            single = single or elapsed
+            same = expected is None or rows == expected
+            expected = expected or rows
+            failed |= not same or any('error' in row for row in rows)
+            print(f'{workers:>7} {elapsed:>8.2f} {args.sessions / elapsed:>11.1f} {samples / elapsed / 1e6:>11.2f} '
+                  f'{single / elapsed:>8.2f}x{"" if same else "  DIFFERENT ROWS"}')
+
+    print('FAILED' if failed else 'all checks passed')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
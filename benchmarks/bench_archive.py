@@ -0,0 +1,136 @@
+# Session archive benchmark: compression ratio against the raw recording,
+# encode and decode throughput serially and across process pools of growing
+# size, and the latency of short time-range queries. Checks that lossless
+# archives read back bit-exact, quantised ones within half the resolution, and
+# that range queries return exactly the samples in range. Exits with status 1
+# if any check fails.
+#
+#   python benchmarks/bench_archive.py [--minutes 60] [--rate 1000] [--workers 4]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from _app import percentile
+from babytrainer.archive import LEVEL, ArchiveWriter, SessionArchive, archive_recording, process_pool
+from babytrainer.recording import SessionRecorder, SessionRecording
+
+RESOLUTION = 0.001  # Quantisation step of the lossy runs, in sensor units
+
+
+# Hip-examination-like movement plus sensor noise, in recorder-sized batches
+def simulated_batches(minutes, rate, batch=4096, seed=1):
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * rate)
+    for start in range(0, n, batch):
+        t = np.arange(start, min(start + batch, n)) / rate
+        samples = np.vstack([0.5 + 0.4 * np.sin(2 * np.pi * 0.5 * t),
+                             100 + 80 * np.cos(2 * np.pi * 0.3 * t),
+                             30 * np.sin(2 * np.pi * 0.5 * t - 0.8)])
+        samples += rng.normal(0, 0.002, samples.shape) * [[1], [80], [30]]
+        yield t, samples
+
+
+def read_all(path):
+    recording = SessionRecording(path)
+    t = np.concatenate([t for t, _ in recording.iter_blocks()])
+    samples = np.concatenate([s for _, s in recording.iter_blocks()], axis=1)
+    recording.close()
+    return t, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compression ratio, throughput and range queries of session archives')
+    parser.add_argument('--minutes', type=float, default=60.0, help='simulated session length')
+    parser.add_argument('--rate', type=float, default=1000.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='largest process pool tried')
+    parser.add_argument('--queries', type=int, default=200, help='random 10 s range queries')
+    parser.add_argument('--level', type=int, default=LEVEL, help='zlib compression level')
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, 'session.btr')
+        recorder = SessionRecorder(source, args.rate, fullname='Bench Trainee', personal_id='0000',
+                                   occupation='Benchmark', difficulty='Advanced')
+        for batch in simulated_batches(args.minutes, args.rate):
+            recorder.append(*batch)
+        recorder.close()
+        raw = os.path.getsize(source)
+        t, samples = read_all(source)
+        megabytes = len(t) * (8 + 4 * samples.shape[0]) / 1e6  # Uncompressed payload
+        print(f'{len(t):,} samples x {samples.shape[0]} channels ({args.minutes:g} min at {args.rate:g} Hz), '
+              f'recording {raw / 1e6:.1f} MB')
+
+        print(f'{"codec":<16} {"size MB":>8} {"ratio":>6} {"encode MB/s":>12} {"decode MB/s":>12} {"max error":>10}')
+        for name, resolution in (('lossless', 0.0), (f'resolution {RESOLUTION:g}', RESOLUTION)):
+            path = os.path.join(folder, 'session.bta')
+            start = time.perf_counter()
+            archive_recording(source, path, resolution=resolution, level=args.level)
+            encode = time.perf_counter() - start
+            archive = SessionArchive(path)
+            start = time.perf_counter()
+            t2, samples2 = archive.read()
+            decode = time.perf_counter() - start
+            error = float(np.abs(samples2.astype(np.float64) - samples).max())
+            # Quantised values are also rounded to float32 on the way out
+            bound = resolution / 2 + np.finfo(np.float32).eps * float(np.abs(samples).max())
+            ok = np.array_equal(t2, t) and (np.array_equal(samples2, samples) if not resolution else error <= bound)
+            failed |= not ok
+            size = os.path.getsize(path)
+            print(f'{name:<16} {size / 1e6:>8.2f} {raw / size:>5.1f}x {megabytes / encode:>12.0f} '
+                  f'{megabytes / decode:>12.0f} {error:>10.2e}{"" if ok else "  MISMATCH"}')
+            archive.close()
+
+        print(f'\n{"workers":>7} {"encode MB/s":>12} {"decode MB/s":>12}   (lossless, whole archive)')
+        workers = 1
+        while True:
+            path = os.path.join(folder, f'pool-{workers}.bta')
+            with process_pool(workers) as pool:
+                pool.submit(int).result()  # Start the workers before timing
+                start = time.perf_counter()
+                with ArchiveWriter(path, args.rate, samples.shape[0], level=args.level, pool=pool,
+                                   workers=workers) as writer:
+                    for batch in simulated_batches(args.minutes, args.rate):
+                        writer.append(*batch)
+                encode = time.perf_counter() - start
+                archive = SessionArchive(path)
+                start = time.perf_counter()
+                t2, samples2 = archive.read(pool=pool)
+                decode = time.perf_counter() - start
+                archive.close()
+            ok = np.array_equal(t2, t) and np.array_equal(samples2, samples)
+            failed |= not ok
+            print(f'{workers:>7} {megabytes / encode:>12.0f} {megabytes / decode:>12.0f}'
+                  f'{"" if ok else "  MISMATCH"}')
+            if workers >= args.workers:
+                break
+            workers = min(workers * 2, args.workers)
+
+        archive = SessionArchive(os.path.join(folder, 'pool-1.bta'))
+        rng = np.random.default_rng(2)
+        timings = []
+        chunks = []
+        wrong = 0
+        for begin in rng.uniform(t[0], t[-1] - 10.0, args.queries):
+            start = time.perf_counter()
+            t2, samples2 = archive.read(begin, begin + 10.0)
+            timings.append((time.perf_counter() - start) * 1000)
+            chunks.append(len(archive.chunk_range(begin, begin + 10.0)))
+            lo, hi = np.searchsorted(t, begin, 'left'), np.searchsorted(t, begin + 10.0, 'right')
+            wrong += not (np.array_equal(t2, t[lo:hi]) and np.array_equal(samples2, samples[:, lo:hi]))
+        archive.close()
+        timings.sort()
+        failed |= wrong > 0
+        print(f'\n10 s range queries: p50 {percentile(timings, 50):.2f} ms  p99 {percentile(timings, 99):.2f} ms, '
+              f'{np.mean(chunks):.2f} of {archive.chunk_count} chunks decoded on average, {wrong} wrong')
+
+    print('FAILED' if failed else 'all checks passed')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# Instructor dashboard load benchmark: hosts simulated sessions on the session
+# server, opens the dashboard on them offscreen and drives its shared render
+# tick by hand, timing the tick (draining the feeds and setData) and the paint
+# of the whole grid at 10, 25 and --sessions sessions. The last row asks the
+# server for the undecimated stream, for comparison. Times are CPU time of the
+# GUI thread, so server workers sharing the machine do not count against the
+# dashboard; the wall-clock p99 is listed too. Checks that every session gets a
+# tile drawing its stream, that each light follows the alarm mask of its newest
+# frame, and that at --sessions sessions the 99th percentile of tick plus
+# paint stays within --budget of the tick interval. Exits with status 1 if a
+# check fails.
+#
+#   python benchmarks/bench_dashboard.py [--sessions 50] [--seconds 10] [--rate 1000] [--workers 2]
+import argparse
+import itertools
+import sys
+import tempfile
+import time
+
+from _app import percentile, qt_app
+from babytrainer.dashboard import INTERVAL_MS, POINTS_PER_PIXEL, SPARKLINE_PIXELS, WINDOW_SECONDS, DashboardWindow
+from babytrainer.server import SessionClient, SessionServer
+from babytrainer.training_spec import DIFFICULTIES
+
+
+def run(app, sessions, args, pixels=SPARKLINE_PIXELS):
+    errors = []
+    interval = INTERVAL_MS / 1000.0
+    with tempfile.TemporaryDirectory() as directory, SessionServer(directory, args.workers):
+        client = SessionClient(directory)
+        for index, difficulty in zip(range(sessions), itertools.cycle(DIFFICULTIES)):
+            client.open_session(f'station-{index:02}', difficulty, rate=args.rate)
+        window = DashboardWindow(directory, pixels=pixels)
+        window.render_timer.stop()  # Ticked by hand below
+        window.resize(1600, 900)
+        window.show()
+        deadline = time.monotonic() + 10.0
+        while len(window.tiles) < sessions and time.monotonic() < deadline:
+            window.update_tiles()
+            app.processEvents()
+            time.sleep(interval)
+
+        updates, paints, totals, walls = [], [], [], []
+        changes = 0
+        colours = {session_id: tile.indicator_colour for session_id, tile in window.tiles.items()}
+        received = sum(tile.feed.frames for tile in window.tiles.values())
+        next_tick = time.perf_counter()
+        for _ in range(int(args.seconds / interval)):
+            next_tick += interval
+            wall = time.perf_counter()
+            start = time.thread_time()
+            window.update_tiles()
+            updated = time.thread_time()
+            app.processEvents()
+            painted = time.thread_time()
+            updates.append((updated - start) * 1000)
+            paints.append((painted - updated) * 1000)
+            totals.append((painted - start) * 1000)
+            walls.append((time.perf_counter() - wall) * 1000)
+            for session_id, tile in window.tiles.items():
+                changes += tile.indicator_colour != colours.get(session_id)
+                colours[session_id] = tile.indicator_colour
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+        window.feed.stop()  # Nothing arrives any more, so every light must match its newest frame
+        window.update_tiles()
+        if len(window.tiles) != sessions:
+            errors.append(f'{len(window.tiles)} tiles for {sessions} sessions')
+        points = 0
+        for session_id, tile in window.tiles.items():
+            drawn = [len(curve.getData()[0] if curve.getData()[0] is not None else ()) for curve in tile.curves.values()]
+            points = max(points, *drawn)
+            if not min(drawn):
+                errors.append(f'{session_id}: nothing drawn')
+            if tile.indicator_colour != ('red' if tile.feed.alarms else 'green'):
+                errors.append(f'{session_id}: light is {tile.indicator_colour} with alarm mask {tile.feed.alarms}')
+        frames = sum(tile.feed.frames for tile in window.tiles.values()) - received
+        window.close()
+    return errors, sorted(updates), sorted(paints), sorted(totals), sorted(walls), points, changes, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render cost of the instructor dashboard under many sessions')
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=10.0, help='measured time per load level')
+    parser.add_argument('--rate', type=float, default=1000.0, help='sample rate of every session')
+    parser.add_argument('--workers', type=int, default=2, help='session server worker processes')
+    parser.add_argument('--budget', type=float, default=0.5, help='share of the tick interval tick + paint may take')
+    args = parser.parse_args()
+
+    app = qt_app()
+    failed = False
+    undecimated = args.rate * WINDOW_SECONDS / POINTS_PER_PIXEL  # Tile width that makes the server send every sample
+    print(f'{args.rate:g} Hz sessions, {INTERVAL_MS} ms render tick, {WINDOW_SECONDS:g} s sparklines, '
+          f'GUI thread CPU ms')
+    print(f'{"sessions":>8} {"stream":<11} {"tick p50":>8} {"p99":>6} {"paint p50":>9} {"p99":>6} '
+          f'{"total p99":>9} {"wall p99":>8} {"points/curve":>12} {"frames/s":>9} {"light changes":>13}')
+    for sessions, pixels in ((10, SPARKLINE_PIXELS), (25, SPARKLINE_PIXELS), (args.sessions, SPARKLINE_PIXELS),
+                             (args.sessions, undecimated)):
+        errors, updates, paints, totals, walls, points, changes, frames = run(app, sessions, args, pixels)
+        decimated = pixels == SPARKLINE_PIXELS
+        over = percentile(totals, 99) > args.budget * INTERVAL_MS
+        if decimated and sessions == args.sessions and over:
+            errors.append(f'tick + paint p99 {percentile(totals, 99):.1f} ms is over the '
+                          f'{args.budget * INTERVAL_MS:g} ms budget')
+        print(f'{sessions:>8} {"decimated" if decimated else "every sample":<11} {percentile(updates, 50):>8.1f} '
+              f'{percentile(updates, 99):>6.1f} {percentile(paints, 50):>9.1f} {percentile(paints, 99):>6.1f} '
+              f'{percentile(totals, 99):>9.1f} {percentile(walls, 99):>8.1f} {points:>12} {frames / args.seconds:>9.0f} {changes:>13}')
+        for error in errors:
+            print(f'  {error}')
+        failed |= bool(errors)
+
+    print('FAILED' if failed else 'all checks passed')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
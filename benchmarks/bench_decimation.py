@@ -0,0 +1,97 @@
+# Level-of-detail benchmark: builds a MinMaxPyramid incrementally from a long
+# 1 kHz trace, then compares zoom/pan frames drawn from per-pixel envelopes with
+# frames drawn from the raw arrays, both rendered offscreen by pyqtgraph. The
+# same trace is also built into a pyramid bounded to the sessions' history
+# horizon, to compare memory and query time.
+#
+#   python benchmarks/bench_decimation.py [--samples 10000000] [--frames 60]
+import argparse
+import time
+
+import numpy as np
+
+from _app import percentile, qt_app
+from babytrainer.decimation import MinMaxPyramid
+from babytrainer.engine import HISTORY_SECONDS
+
+
+def make_trace(samples, rate):
+    t = np.arange(samples) / rate
+    rng = np.random.default_rng(0)
+    force = (np.sin(t) * 0.4 + 0.5 + rng.normal(0, 0.02, samples)).astype(np.float32)
+    return t, np.vstack((force, force * 200, force))
+
+
+# Random zoom/pan ranges from the whole trace down to a few seconds
+def view_ranges(duration, frames):
+    rng = np.random.default_rng(1)
+    spans = duration * np.geomspace(1.0, 1e-4, frames)
+    starts = rng.uniform(0, 1, frames) * (duration - spans)
+    return list(zip(starts, starts + spans))
+
+
+def render_frames(widget, curve, app, ranges, data_for_range):
+    timings = []
+    for t0, t1 in ranges:
+        start = time.perf_counter()
+        curve.setData(*data_for_range(t0, t1))
+        widget.setXRange(t0, t1, padding=0)
+        widget.grab()  # Forces a full software render of the plot
+        app.processEvents()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return sorted(timings)
+
+
+def report(name, timings):
+    print(f'{name:<22} p50 {percentile(timings, 50):9.2f} ms  p99 {percentile(timings, 99):9.2f} ms  '
+          f'-> {1000.0 / max(percentile(timings, 50), 1e-9):8.1f} fps')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Min/max decimation vs. raw plotting')
+    parser.add_argument('--samples', type=int, default=10_000_000)
+    parser.add_argument('--rate', type=float, default=1000.0)
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--raw-frames', type=int, default=5, help='raw frames are slow, keep this small')
+    args = parser.parse_args()
+
+    t, samples = make_trace(args.samples, args.rate)
+    batch = int(args.rate // 10)  # One 100 ms tick per append, as in the app
+    ranges = view_ranges(t[-1], args.frames)
+    pixels = 800
+    for name, horizon in (('whole', None), ('bounded', int(args.rate * HISTORY_SECONDS))):
+        pyramid = MinMaxPyramid(3, horizon=horizon)
+        start = time.perf_counter()
+        for i in range(0, args.samples, batch):
+            pyramid.append(t[i:i + batch], samples[:, i:i + batch])
+        build = time.perf_counter() - start
+        print(f'{name} pyramid of {args.samples:,} samples x 3 channels, {pyramid.level_count} levels, '
+              f'{pyramid.nbytes / 1e6:.1f} MB, built in {build:.2f} s ({args.samples / build:,.0f} samples/s, '
+              f'{build / (args.samples / batch) * 1e6:.1f} us per 100 ms tick)')
+
+        query = []
+        for t0, t1 in ranges:
+            began = time.perf_counter()
+            pyramid.envelope(0, t0, t1, pixels)
+            query.append((time.perf_counter() - began) * 1000.0)
+        query.sort()
+        print(f'{"  envelope query":<22} p50 {percentile(query, 50):9.2f} ms  p99 {percentile(query, 99):9.2f} ms')
+
+    import pyqtgraph as pg
+    app = qt_app()
+    widget = pg.PlotWidget()
+    widget.resize(pixels, 400)
+    widget.show()
+    curve = widget.plot(pen='r')
+    app.processEvents()
+
+    report('envelope frame', render_frames(widget, curve, app, ranges,
+                                           lambda t0, t1: pyramid.envelope(0, t0, t1, pixels)))
+
+    # Raw frames draw every sample of the trace, as update_plots used to
+    raw_ranges = ranges[:args.raw_frames]
+    report('raw frame', render_frames(widget, curve, app, raw_ranges, lambda t0, t1: (t, samples[0])))
+
+
+if __name__ == '__main__':
+    main()
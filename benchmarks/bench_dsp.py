@@ -0,0 +1,96 @@
+# Streaming DSP benchmark: checks that every stage (and the whole chain) gives
+# bit-for-bit the same output when a noisy session is fed in random chunks as
+# when it is processed in one batch, then reports the throughput of each stage.
+# Exits with status 1 if chunked and offline output differ.
+#
+#   python benchmarks/bench_dsp.py [--seconds 60] [--rate 1000]
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import _app  # noqa: F401  (puts the repo on sys.path)
+from babytrainer.dsp import Derivative, LowPass, MovingAverage, Phase, Pipeline
+from babytrainer.sources import ANGULAR, CHANNELS, FORCE
+
+
+def stages(rate):
+    return {
+        'low-pass 10 Hz': lambda: [LowPass(10.0, rate)],
+        'low-pass 0.5 Hz': lambda: [LowPass(0.5, rate, order=4)],
+        'moving average 50': lambda: [MovingAverage(50)],
+        'angular velocity': lambda: [Derivative(ANGULAR)],
+        'force-angle phase': lambda: [Phase(FORCE, ANGULAR, rate)],
+        'full chain': lambda: [LowPass(20.0, rate), MovingAverage(10, rows=[FORCE]), Derivative(ANGULAR),
+                               Phase(FORCE, ANGULAR, rate)],
+    }
+
+
+# Hip-examination-like movement plus sensor noise and a little timestamp jitter
+def noisy_session(seconds, rate, seed=1):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    t = np.arange(n) / rate + rng.uniform(0, 0.2 / rate, n)
+    samples = np.vstack([0.5 + 0.4 * np.sin(2 * np.pi * 0.5 * t),
+                         100 + 80 * np.cos(2 * np.pi * 0.3 * t),
+                         30 * np.sin(2 * np.pi * 0.5 * t - 0.8)])
+    samples += rng.normal(0, 0.05, samples.shape) * samples.std(axis=1, keepdims=True)
+    return t, samples
+
+
+# Straightforward per-sample recursion of the low-pass, for checking the block-wise closed form
+def reference_low_pass(stage, samples):
+    c = 1.0 - stage.sections[0]._gain[0]
+    out = samples.copy()
+    for _ in stage.sections:
+        y = out[:, 0].copy()
+        for k in range(out.shape[1]):
+            y = (1.0 - c) * out[:, k] + c * y
+            out[:, k] = y
+    return out
+
+
+def chunked(pipeline, t, samples, rng):
+    outputs = []
+    start = 0
+    while start < len(t):
+        n = int(rng.choice([1, 2, 7, 64, 100, 333, 1000, 4097]))
+        outputs.append(pipeline.process(t[start:start + n], samples[:, start:start + n]).copy())
+        start += n
+    return np.concatenate(outputs, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunked-vs-offline equality and throughput of the DSP stages')
+    parser.add_argument('--seconds', type=float, default=60.0, help='length of the simulated session')
+    parser.add_argument('--rate', type=float, default=1000.0, help='sample rate')
+    parser.add_argument('--batch', type=int, default=100, help='batch size for the throughput runs')
+    args = parser.parse_args()
+
+    t, samples = noisy_session(args.seconds, args.rate)
+    rng = np.random.default_rng(2)
+    low_pass = LowPass(10.0, args.rate)
+    error = np.abs(low_pass.process(t[:20000], samples[:, :20000]) - reference_low_pass(low_pass, samples[:, :20000]))
+    failed = not error.max() <= 1e-9 * np.abs(samples[:, :20000]).max()
+    print(f'low-pass vs per-sample recursion: max error {error.max():.2e}')
+    print(f'{len(t)} samples x {len(CHANNELS)} channels, throughput in batches of {args.batch}')
+    print(f'{"stage":<20} {"chunked == offline":>18} {"Msamples/s":>11} {"x real time":>12}')
+    for name, make in stages(args.rate).items():
+        offline = Pipeline(make(), len(CHANNELS)).process(t, samples).copy()
+        equal = all(np.array_equal(chunked(Pipeline(make(), len(CHANNELS)), t, samples, rng), offline)
+                    for _ in range(3))
+        failed = failed or not equal
+
+        pipeline = Pipeline(make(), len(CHANNELS))
+        start = time.perf_counter()
+        for i in range(0, len(t), args.batch):
+            pipeline.process(t[i:i + args.batch], samples[:, i:i + args.batch])
+        elapsed = time.perf_counter() - start
+        print(f'{name:<20} {"yes" if equal else "NO":>18} {len(t) / elapsed / 1e6:>11.2f} '
+              f'{args.seconds / elapsed:>12.0f}')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# Headless GUI performance regression check of the training windows (the
+# functional checks are tests/test_gui_regression.py). Window2 to Window4 are
+# opened through the start-up page and the training form, and their plot timer
+# is advanced by hand with deterministic samples. Per level it measures tick
+# time over --repeats runs (CPU time of the GUI thread, so other load on the
+# machine does not count against the windows) and memory growth (tracemalloc)
+# over a fixed number of ticks after a warm-up; cold start time is the median
+# of --startup-runs fresh interpreters.
+#
+# Only medians are gated: the median over the runs of the tick p50, the memory
+# growth and the start-up times fail the check when more than --tolerance times
+# their baseline and above a per-figure noise floor; p99 is reported only.
+# Baselines are per machine, in benchmarks/baselines/gui-<host>.json unless
+# BABY_TRAINER_GUI_BASELINE names another file, and are recorded with
+# --update-baseline; without one the check fails rather than pass unchecked.
+# Memory grows in steps as the session history doubles its storage, so figures
+# are only compared against a baseline recorded with the same tick counts.
+# `python -m pytest tests --perf` runs the same gate with the default settings.
+#
+#   python benchmarks/bench_gui_regression.py [--ticks 300] [--repeats 5] [--long-ticks 1200] [--update-baseline]
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _app import WINDOWS, HandFedSession, load_app, open_training_window, percentile, qt_app
+from bench_startup import run_child
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.environ.get('BABY_TRAINER_GUI_BASELINE',
+                          os.path.join(HERE, 'baselines', f'gui-{platform.node() or "local"}.json'))
+SETTINGS = {'ticks': 300, 'repeats': 5, 'warmup_ticks': 300, 'long_ticks': 1200}  # Tick counts of a run
+STARTUP_RUNS = 3
+TOLERANCE = 1.5  # Allowed ratio to the baseline
+HIGH, LOW = 0.9, 0.1  # Force fed above and below its threshold (0.5); the other channels stay at rest
+SETTLE_TICKS = 20  # Ticks for the low-pass to settle on a new level
+# Gated figures and the differences below which they never count as a regression; the rest are reported only
+NOISE_FLOOR = {'tick_p50_ms': 2.0, 'memory_kb': 64.0, 'shown_ms': 50.0, 'click_to_plot_ms': 50.0}
+
+
+def measure_level(app, module, difficulty, settings):
+    form, window = open_training_window(app, module, difficulty, f'gui-bench-{difficulty.lower()}')
+    if window is None:
+        raise RuntimeError(f'could not open the {difficulty} window; run tests/test_gui_regression.py')
+    session = HandFedSession(app, window)
+    p50s, p99s = [], []
+    for _ in range(settings['repeats']):
+        session.run(SETTLE_TICKS, HIGH)
+        timings = session.run(settings['ticks'], LOW, time.thread_time)
+        p50s.append(percentile(timings, 50))
+        p99s.append(percentile(timings, 99))
+
+    session.run(settings['warmup_ticks'], LOW)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    session.run(settings['long_ticks'], LOW)
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    window.close()
+    form.results.close()
+    form.close()
+    app.processEvents()
+    return {'tick_p50_ms': statistics.median(p50s), 'tick_p99_ms': statistics.median(p99s),
+            'memory_kb': growth / 1024}
+
+
+# Cold start, measured by bench_startup.py's child in fresh interpreters
+def startup(runs):
+    with tempfile.TemporaryDirectory() as recordings:
+        env = dict(os.environ, QT_QPA_PLATFORM='offscreen', BABY_TRAINER_RECORDINGS=recordings,
+                   BENCH_THINK_SECONDS='0')
+        results = [run_child(env)[0] for _ in range(runs)]
+    return {'startup.shown_ms': statistics.median(r['shown'] for r in results) * 1000,
+            'startup.click_to_plot_ms': statistics.median(r['click_to_plot'] for r in results) * 1000}
+
+
+# Every figure of a run: each level's ticks and memory, then cold start
+def measure(app, module, settings, startup_runs):
+    figures = {}
+    for difficulty in WINDOWS:
+        level_figures = measure_level(app, module, difficulty, settings)
+        figures.update({f'{difficulty.lower()}.{name}': value for name, value in level_figures.items()})
+    figures.update(startup(startup_runs))
+    return figures
+
+
+# Figures of the baseline at `path`; ValueError if there is none or it was recorded with other settings
+def read_baseline(path, settings):
+    if not os.path.exists(path):
+        raise ValueError(f'no baseline at {path}; record one on this machine with --update-baseline')
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != settings:
+        raise ValueError(f'{path} was recorded with {baseline.get("settings")}, not {settings}; '
+                         f'rerun with those or record again with --update-baseline')
+    return baseline['figures']
+
+
+def write_baseline(path, settings, figures):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'settings': settings, 'figures': {name: round(value, 3) for name, value in figures.items()}},
+                  f, indent=2)
+        f.write('\n')
+
+
+def regressions(figures, baseline, tolerance):
+    found = []
+    for name, value in figures.items():
+        floor = NOISE_FLOOR.get(name.rsplit('.', 1)[-1])
+        if floor is None or name not in baseline:
+            continue
+        if value > baseline[name] * tolerance and value - baseline[name] > floor:
+            found.append(name)
+    return found
+
+
+# Table of the figures next to their baseline, regressions marked
+def report(figures, baseline, slower):
+    lines = [f'{"figure":<34} {"now":>9} {"baseline":>9}']
+    for name, value in figures.items():
+        stored = f'{baseline[name]:>9.2f}' if name in baseline else f'{"-":>9}'
+        note = '  REGRESSION' if name in slower else '' if name.rsplit('.', 1)[-1] in NOISE_FLOOR else '  (not gated)'
+        lines.append(f'{name:<34} {value:>9.2f} {stored}{note}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless GUI performance regression check')
+    parser.add_argument('--ticks', type=int, default=SETTINGS['ticks'], help='timed ticks per run')
+    parser.add_argument('--repeats', type=int, default=SETTINGS['repeats'],
+                        help='timed runs per level, the median is gated')
+    parser.add_argument('--warmup-ticks', type=int, default=SETTINGS['warmup_ticks'],
+                        help='ticks before the memory growth run')
+    parser.add_argument('--long-ticks', type=int, default=SETTINGS['long_ticks'],
+                        help='ticks of the memory growth run per level')
+    parser.add_argument('--startup-runs', type=int, default=STARTUP_RUNS)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed ratio to the baseline')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='store these figures as the new baseline')
+    args = parser.parse_args()
+    settings = {'ticks': args.ticks, 'repeats': args.repeats, 'warmup_ticks': args.warmup_ticks,
+                'long_ticks': args.long_ticks}
+    baseline = {}
+    if not args.update_baseline:
+        try:
+            baseline = read_baseline(args.baseline, settings)
+        except ValueError as error:
+            sys.exit(str(error))
+
+    # The windows record and score every session; keep that out of the user's folders
+    folder = tempfile.mkdtemp()
+    os.environ['BABY_TRAINER_RECORDINGS'] = folder
+    os.environ['BABY_TRAINER_RESULTS'] = os.path.join(folder, 'results.sqlite')
+    os.environ['BABY_TRAINER_PREWARM'] = '0'
+    module = load_app()  # Reads the folders from the environment
+    try:
+        figures = measure(qt_app(), module, settings, args.startup_runs)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    slower = regressions(figures, baseline, args.tolerance)
+    print(report(figures, baseline, slower))
+    if args.update_baseline:
+        write_baseline(args.baseline, settings, figures)
+        print(f'baseline written to {args.baseline}')
+    print('FAILED' if slower else 'no regressions')
+    sys.exit(1 if slower else 0)
+
+
+if __name__ == '__main__':
+    main()
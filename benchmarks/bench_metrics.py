@@ -0,0 +1,105 @@
+# Tick-metrics benchmark: cost of one histogram observation, per-tick overhead
+# of profiling a training window, a live run under the real timer with one
+# deliberately stalled tick (which must show up as missed ticks), and both
+# localhost export formats. Exits with status 1 if a check fails.
+#
+#   python benchmarks/bench_metrics.py [--ticks 500] [--seconds 2]
+import argparse
+import json
+import sys
+import time
+import urllib.request
+
+from _app import load_app, qt_app
+from babytrainer.metrics import Histogram, MetricsServer
+from babytrainer.sources import SyntheticSource
+
+
+def observe_cost(n=200000):
+    histogram = Histogram()
+    values = [i * 1e-6 for i in range(1000)]
+    start = time.perf_counter()
+    for i in range(n):
+        histogram.observe(values[i % 1000])
+    return (time.perf_counter() - start) / n
+
+
+def tick_cost(module, windows, app, ticks, profile):
+    windows.PROFILE = profile
+    window = module.Window4('Bench Trainee', '0000', 'Benchmark', 'Advanced')
+    window.show()
+    app.processEvents()
+    n = int(window.source.sample_rate) * window.spec.plot_interval_ms // 1000
+    source = SyntheticSource(window.source.sample_rate, *window.source.waveforms, batch_size=n, realtime=False)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        window.sample_queue.push(*source.read())
+        window.update_plots()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    window.close()
+    return elapsed / ticks
+
+
+def live_run(module, windows, app, seconds):
+    windows.PROFILE = True
+    window = module.Window4('Bench Trainee', '0000', 'Benchmark', 'Advanced')
+    window.show()
+    stall_at = time.perf_counter() + seconds / 2
+    window.plot_timer.timeout.connect(lambda: time.sleep(0.35) if 0 < stall_at - time.perf_counter() < 0.1 else None)
+    window.start_plot()
+    until = time.perf_counter() + seconds
+    while time.perf_counter() < until:
+        app.processEvents()
+        time.sleep(0.001)
+    window.stop_plot()
+    return window
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Overhead and export of the render-loop tick metrics')
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=2.0, help='length of the live run')
+    args = parser.parse_args()
+
+    app = qt_app()
+    module = load_app()
+    windows = module.training_windows()
+    failed = False
+
+    print(f'histogram observe: {observe_cost() * 1e9:.0f} ns')
+    # Keep the best of three, the difference is small next to the noise
+    off = min(tick_cost(module, windows, app, args.ticks, False) for _ in range(3))
+    on = min(tick_cost(module, windows, app, args.ticks, True) for _ in range(3))
+    print(f'Window4 tick: {off * 1000:.3f} ms unprofiled, {on * 1000:.3f} ms profiled '
+          f'({(on - off) * 1e6:+.0f} us)')
+
+    window = live_run(module, windows, app, args.seconds)
+    metrics = window.metrics
+    print(f'\nlive run, {args.seconds:g} s with one 350 ms stall: {metrics.summary()}')
+    print(f'  {"stage":<12} {"count":>6} {"p50 ms":>8} {"p99 ms":>8} {"max ms":>8}')
+    for stage, histogram in metrics.histograms.items():
+        print(f'  {stage:<12} {histogram.count:>6} {histogram.quantile(0.5) * 1000:>8.3f} '
+              f'{histogram.quantile(0.99) * 1000:>8.3f} {histogram.max * 1000:>8.3f}')
+    if metrics.missed_ticks < 2:
+        print(f'FAIL: the stall should have cost at least 2 ticks, got {metrics.missed_ticks}')
+        failed = True
+
+    server = MetricsServer(metrics)
+    try:
+        base = f'http://127.0.0.1:{server.port}'
+        text = urllib.request.urlopen(f'{base}/metrics').read().decode()
+        snapshot = json.loads(urllib.request.urlopen(f'{base}/metrics.json').read())
+    finally:
+        server.close()
+    print(f'\n/metrics: {len(text.splitlines())} lines, /metrics.json: {len(snapshot["stages"])} stages, '
+          f'{snapshot["ticks"]} ticks, {snapshot["missed_ticks"]} missed')
+    if snapshot['ticks'] != metrics.ticks or 'babytrainer_missed_ticks_total' not in text:
+        print('FAIL: exported snapshot does not match the window metrics')
+        failed = True
+    window.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Session recording benchmark: per-batch append latency seen by the caller (the
+# GUI thread in the app), on-disk size, and max-speed replay throughput.
+#
+#   python benchmarks/bench_recording.py [--minutes 60] [--rate 1000]
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from _app import percentile
+from babytrainer.acquisition import AcquisitionWorker, SpscQueue
+from babytrainer.recording import ReplaySource, SessionRecorder, SessionRecording
+from babytrainer.sources import SyntheticSource, Waveform
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Session recording and replay')
+    parser.add_argument('--minutes', type=float, default=60.0, help='simulated session length')
+    parser.add_argument('--rate', type=float, default=1000.0)
+    parser.add_argument('--batch', type=int, default=100, help='samples per append (one 100 ms tick at 1 kHz)')
+    args = parser.parse_args()
+
+    source = SyntheticSource(args.rate, Waveform(np.sin), Waveform(np.cos, 80, 100), Waveform(np.sin, 0.4, 0.5),
+                             batch_size=args.batch, realtime=False)
+    batches = int(args.minutes * 60 * args.rate) // args.batch
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'session.btr')
+        recorder = SessionRecorder(path, args.rate, fullname='Bench Trainee', personal_id='0000',
+                                   occupation='Benchmark', difficulty='Advanced')
+        timings = []
+        start = time.perf_counter()
+        for _ in range(batches):
+            batch = source.read()
+            began = time.perf_counter()
+            recorder.append(*batch)
+            timings.append((time.perf_counter() - began) * 1e6)
+        recorder.close()
+        write_elapsed = time.perf_counter() - start
+        timings.sort()
+        size = os.path.getsize(path)
+        samples = batches * args.batch
+        print(f'recorded     {samples:,} samples x 3 channels ({args.minutes:g} min at {args.rate:g} Hz) '
+              f'in {write_elapsed:.2f} s')
+        print(f'file size    {size / 1e6:.1f} MB ({size / samples:.1f} bytes/sample)')
+        print(f'append us    p50 {percentile(timings, 50):.1f}  p99 {percentile(timings, 99):.1f}  '
+              f'max {timings[-1]:.1f}')
+
+        start = time.perf_counter()
+        recording = SessionRecording(path)
+        opened = time.perf_counter() - start
+        total = sum(len(t) for t, _ in recording.iter_blocks())
+        print(f'open         {opened * 1000:.1f} ms for {recording.block_count} blocks ({total:,} samples)')
+
+        queue = SpscQueue(3, 1 << 16)
+        worker = AcquisitionWorker(ReplaySource(path, speed=None, batch_size=4096), queue)
+        received = [0]
+
+        class Counter:
+            def append(self, timestamps, values):
+                received[0] += len(timestamps)
+
+        start = time.perf_counter()
+        worker.start()
+        while worker.is_running() or len(queue):
+            queue.drain_into(Counter())
+            time.sleep(0.001)
+        worker.stop()
+        elapsed = time.perf_counter() - start
+        print(f'replay (max) {received[0]:,} samples in {elapsed:.2f} s '
+              f'({received[0] / elapsed:,.0f} samples/s, {received[0] / elapsed / args.rate:,.0f}x real time)')
+        recording.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+# Offscreen render benchmark: paints one streaming plot widget with Qt's
+# software rasteriser (the offscreen platform, no OpenGL) under each render
+# setting and reports the update (setData and ranges) and paint time per tick.
+# "raw" rows hand pyqtgraph the whole session as the training windows once
+# did; "envelope" rows draw the screen-resolution history as they do now.
+# Then checks that RenderQuality steps a widget down when its paints go over
+# budget and back up once they fit again. Exits with status 1 if it does not.
+#
+#   python benchmarks/bench_render_quality.py [--ticks 300] [--rate 1000]
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from _app import percentile, qt_app
+import pyqtgraph as pg
+from babytrainer.decimation import MinMaxPyramid
+from babytrainer.plotting import LevelOfDetailCurve, RenderQuality, RenderStats, TimedPlotWidget
+from babytrainer.training_spec import RenderSpec
+
+WINDOW_SECONDS = 10.0
+
+# name: (draw the raw session, antialias, clip to view and downsample, fixed ranges, envelope resolution)
+CONFIGS = {
+    'raw, pyqtgraph defaults': (True, False, False, False, 1.0),
+    'raw, antialiased': (True, True, False, False, 1.0),
+    'raw, clip + downsample': (True, False, True, True, 1.0),
+    'envelope, auto-range': (False, False, True, False, 1.0),
+    'envelope, fixed ranges': (False, False, True, True, 1.0),
+    'envelope, antialiased': (False, True, True, True, 1.0),
+    'envelope, coarse': (False, False, True, True, 0.5),
+}
+
+
+def noisy_signal(n, rate, seed=1):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / rate
+    return t, (0.5 + 0.4 * np.sin(2 * np.pi * 0.5 * t) + rng.normal(0, 0.02, n)).astype(np.float32)
+
+
+def plot_widget(app, stats):
+    widget = TimedPlotWidget('bench', stats)
+    widget.resize(800, 400)
+    widget.show()
+    app.processEvents()
+    return widget
+
+
+def run(app, config, t, y, batch, ticks):
+    raw, antialias, clip, fixed, resolution = config
+    widget = plot_widget(app, RenderStats())
+    curve = widget.plot(pen='r', antialias=antialias)
+    curve.setClipToView(clip)
+    curve.setDownsampling(auto=clip, method='peak')
+    view_box = widget.getPlotItem().getViewBox()
+    history = MinMaxPyramid(1)
+    lod = LevelOfDetailCurve(widget, curve, history, 0, WINDOW_SECONDS, fixed_ranges=fixed)
+    lod.resolution = resolution
+    updates, paints = [], []
+    for tick in range(ticks):
+        stop = (tick + 1) * batch
+        start = time.perf_counter()
+        history.append(t[stop - batch:stop], y[None, stop - batch:stop])
+        if raw:
+            curve.setData(t[:stop], y[:stop])
+            if fixed:
+                view_box.setRange(xRange=(t[stop - 1] - WINDOW_SECONDS, t[stop - 1]), padding=0)
+        else:
+            lod.refresh()
+        updates.append((time.perf_counter() - start) * 1000)
+        painted = widget.paint_count
+        app.processEvents()
+        if widget.paint_count > painted:
+            paints.append(widget.last_paint * 1000)
+    widget.close()
+    return sorted(updates), sorted(paints)
+
+
+# Widget under a RenderQuality whose budget is first far too small, then ample
+def adaptation(app, t, y, batch):
+    widget = plot_widget(app, RenderStats())
+    curve = widget.plot(pen='r')
+    history = MinMaxPyramid(1)
+    lod = LevelOfDetailCurve(widget, curve, history, 0, WINDOW_SECONDS, fixed_ranges=True)
+    quality = RenderQuality(RenderSpec('antialiased'), interval=0.1, recover_ticks=20)
+    quality.add(widget, widget, lod)
+    modes = []
+    for tick in range(120):
+        quality.budget = 1e-6 if tick < 40 else 10.0
+        stop = (tick + 1) * batch
+        history.append(t[stop - batch:stop], y[None, stop - batch:stop])
+        lod.refresh()
+        app.processEvents()
+        quality.update()
+        modes.append(quality.modes()['bench'])
+    widget.close()
+    return modes[39], modes[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paint and update cost of the render settings, offscreen')
+    parser.add_argument('--ticks', type=int, default=300, help='ticks per setting')
+    parser.add_argument('--rate', type=float, default=1000.0, help='sample rate')
+    parser.add_argument('--interval', type=float, default=0.1, help='tick period in seconds')
+    args = parser.parse_args()
+
+    app = qt_app()
+    batch = int(args.rate * args.interval)
+    t, y = noisy_signal(batch * args.ticks, args.rate)
+    print(f'platform {app.platformName()}, OpenGL {"on" if pg.getConfigOption("useOpenGL") else "off"}, '
+          f'800x400 widget, {args.ticks} ticks of {batch} samples ({len(t):,} by the end)')
+    print(f'{"setting":<26} {"update p50":>10} {"p99":>7} {"paint p50":>10} {"p99":>7}   ms')
+    for name, config in CONFIGS.items():
+        updates, paints = run(app, config, t, y, batch, args.ticks)
+        print(f'{name:<26} {percentile(updates, 50):>10.2f} {percentile(updates, 99):>7.2f} '
+              f'{percentile(paints, 50):>10.2f} {percentile(paints, 99):>7.2f}')
+
+    over, recovered = adaptation(app, t, y, batch)
+    ok = over == 'coarse' and recovered == 'antialiased'
+    print(f'\nover budget: stepped down to {over}; back within budget: recovered to {recovered}')
+    print('all checks passed' if ok else 'FAILED')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Visible-tab render scheduling: drives the training windows offscreen with the
+# scheduler on and off and reports per-widget update (setData) and paint time.
+#
+#   python benchmarks/bench_render_scheduler.py [--ticks 300] [--rate 1000]
+import argparse
+import time
+
+from _app import load_app, qt_app
+from babytrainer.sources import SyntheticSource
+
+
+def run(window_class, module, app, ticks, rate, scheduled):
+    window = window_class('Bench Trainee', '0000', 'Benchmark', window_class.__name__)
+    window.render_scheduler.enabled = scheduled
+    window.resize(1000, 800)
+    window.show()
+    app.processEvents()
+    n = int(rate * module.PLOT_INTERVAL_MS / 1000)
+    source = SyntheticSource(rate, *window.source.waveforms, batch_size=n, realtime=False)
+    window.render_stats.reset()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        window.sample_queue.push(*source.read())
+        window.update_plots()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    # Visiting every tab shows the hidden ones were caught up
+    for index in range(window.tabs.count()):
+        window.tabs.setCurrentIndex(index)
+        app.processEvents()
+    stats = window.render_stats
+    window.close()
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Visible-tab scheduling vs. redrawing every widget')
+    parser.add_argument('--ticks', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=100.0, help='simulated sample rate')
+    parser.add_argument('--verbose', action='store_true', help='print the per-widget breakdown')
+    args = parser.parse_args()
+
+    app = qt_app()
+    module = load_app()
+    print(f'{"window":<9} {"mode":<10} {"ms/tick":>8} {"update ms":>10} {"paint ms":>9}')
+    for window_class in (module.Window2, module.Window3, module.Window4):
+        for scheduled in (False, True):
+            elapsed, stats = run(window_class, module, app, args.ticks, args.rate, scheduled)
+            mode = 'visible' if scheduled else 'all'
+            print(f'{window_class.__name__:<9} {mode:<10} {elapsed / args.ticks * 1000:>8.2f} '
+                  f'{stats.total_ms("update"):>10.1f} {stats.total_ms("paint"):>9.1f}')
+            if args.verbose:
+                print(stats.report())
+
+
+if __name__ == '__main__':
+    main()
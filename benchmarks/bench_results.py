@@ -0,0 +1,114 @@
+# Results database benchmark: fills a store with --sessions synthetic session
+# results, reports batched insert throughput, the latency of saving a single
+# session, and leaderboard/history query latency, and checks that every query
+# is answered from an index rather than a table scan. Also shows that the
+# per-batch cost of the incremental score does not grow with session length.
+# Exits with status 1 if a query plan scans a table.
+#
+#   python benchmarks/bench_results.py [--sessions 100000] [--trainees 10000]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from _app import percentile
+from babytrainer.alerts import AlertEngine, ThresholdRule
+from babytrainer.results import HISTORY, LEADERBOARD, LEVEL_HISTORY, ResultsStore
+from babytrainer.scoring import SessionResult, SessionScore, session_score
+from babytrainer.training_spec import DIFFICULTIES
+
+
+def random_result(rng, trainees, started):
+    duration = rng.uniform(60, 900)
+    over = rng.uniform(0, 0.3) * duration
+    violations = rng.randrange(0, 20)
+    return SessionResult(f'T{rng.randrange(trainees):06d}', 'Bench Trainee', 'Benchmark',
+                         rng.choice(list(DIFFICULTIES)), started, duration, rng.uniform(0.5, 2.0), over,
+                         rng.uniform(5, 60), violations, session_score(duration, over, violations))
+
+
+def timed(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)
+
+
+def score_cost(batches, batch=100):
+    spec = DIFFICULTIES['Advanced']
+    alerts = AlertEngine([ThresholdRule(c.channel, c.threshold, name=c.name) for c in spec.channels])
+    score = SessionScore(spec, alerts)
+    t = np.arange(batches * batch) / 1000.0
+    samples = np.vstack([0.5 + 0.4 * np.sin(t), 100 + 80 * np.cos(t), 0.5 + 0.4 * np.sin(t)])
+    timings = []
+    for i in range(0, len(t), batch):
+        start = time.perf_counter()
+        alerts.append(t[i:i + batch], samples[:, i:i + batch])
+        score.append(t[i:i + batch], samples[:, i:i + batch])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Insert and query latency of the results database')
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--trainees', type=int, default=10000)
+    parser.add_argument('--burst', type=int, default=1000, help='results added at once while filling')
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    failed = False
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultsStore(os.path.join(directory, 'results.sqlite'))
+        now = time.time()
+        bursts = []
+        start = time.perf_counter()
+        for first in range(0, args.sessions, args.burst):
+            rows = [random_result(rng, args.trainees, now - (args.sessions - i) * 60)
+                    for i in range(first, min(first + args.burst, args.sessions))]
+            burst_start = time.perf_counter()
+            store.add_many(rows)
+            store.flush()
+            bursts.append(time.perf_counter() - burst_start)
+        elapsed = time.perf_counter() - start
+        bursts.sort()
+        print(f'filled {store.count()} sessions in {elapsed:.1f} s ({args.sessions / elapsed:.0f} rows/s), '
+              f'{args.burst}-row burst p50 {percentile(bursts, 50) * 1000:.1f} ms '
+              f'p99 {percentile(bursts, 99) * 1000:.1f} ms')
+
+        single = timed(lambda: (store.add(random_result(rng, args.trainees, time.time())), store.flush()), 200)
+        print(f'save one session:  p50 {percentile(single, 50) * 1000:.2f} ms  p99 {percentile(single, 99) * 1000:.2f} ms')
+
+        levels = list(DIFFICULTIES)
+        queries = {
+            'leaderboard top 20': lambda: store.leaderboard(rng.choice(levels), 20),
+            'history, one level': lambda: store.history(f'T{rng.randrange(args.trainees):06d}', rng.choice(levels)),
+            'history, all levels': lambda: store.history(f'T{rng.randrange(args.trainees):06d}'),
+        }
+        for name, query in queries.items():
+            timings = timed(query, args.queries)
+            print(f'{name:<20} p50 {percentile(timings, 50) * 1000:.3f} ms  p99 {percentile(timings, 99) * 1000:.3f} ms')
+
+        for sql, parameters in ((LEADERBOARD, ('Easy', 20)), (HISTORY, ('T000001', 50)),
+                                (LEVEL_HISTORY, ('T000001', 'Easy', 50))):
+            plan = [row[-1] for row in store._reader.execute('EXPLAIN QUERY PLAN ' + sql, parameters)]
+            if any(step.startswith('SCAN') or 'TEMP B-TREE' in step for step in plan):
+                print(f'FAIL: query is not served by an index: {plan}')
+                failed = True
+        store.close()
+
+    short, long = score_cost(100), score_cost(10000)
+    print(f'score update per 100-sample batch: {np.median(short) * 1e6:.1f} us at the start, '
+          f'{np.median(long[-100:]) * 1e6:.1f} us after {len(long) * 100} samples (incl. alert rules)')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Append-throughput microbenchmark for babytrainer.ring_buffer.RingBuffer
+#
+#   python benchmarks/bench_ring_buffer.py [--seconds 60]
+import argparse
+import time
+
+import numpy as np
+
+import _app  # noqa: F401  (puts the repository root on sys.path)
+from babytrainer.ring_buffer import RingBuffer
+
+
+# Stream `seconds` of data at `rate` Hz through the buffer in batches of `batch` samples
+def run(rate, channels, batch, seconds, window_seconds):
+    buffer = RingBuffer(channels, rate, window_seconds)
+    total = int(rate * seconds)
+    timestamps = np.arange(batch, dtype=np.float64) / rate
+    samples = np.random.default_rng(0).standard_normal((channels, batch))
+    batches = total // batch
+    start = time.perf_counter()
+    for _ in range(batches):
+        buffer.append(timestamps, samples)
+    elapsed = time.perf_counter() - start
+    appended = batches * batch
+    return appended * channels / elapsed, appended / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RingBuffer append throughput')
+    parser.add_argument('--seconds', type=float, default=60.0, help='simulated session length per case')
+    parser.add_argument('--window', type=float, default=10.0, help='buffer window length in seconds')
+    args = parser.parse_args()
+
+    print(f'{"rate":>8} {"ch":>3} {"batch":>6} {"samples/s":>14} {"frames/s":>14} {"x realtime":>11}')
+    for rate in (1000, 10000):
+        # One sample per call, one 10 ms batch and one 100 ms (timer tick) batch
+        for batch in (1, rate // 100, rate // 10):
+            sample_rate, frame_rate = run(rate, 3, batch, args.seconds if batch > 1 else args.seconds / 10,
+                                          args.window)
+            print(f'{rate:>6}Hz {3:>3} {batch:>6} {sample_rate:>14,.0f} {frame_rate:>14,.0f} '
+                  f'{frame_rate / rate:>10,.0f}x')
+
+
+if __name__ == '__main__':
+    main()
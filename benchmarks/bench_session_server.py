@@ -0,0 +1,98 @@
+# Session server load benchmark: opens N simulated 1 kHz three-channel
+# sessions on the server, subscribes a client to every one of them and
+# doubles N until delivery latency, queue backlog or dropped samples show the
+# host can no longer keep up. Latency is measured from the start of the tick
+# that published a frame to the subscriber receiving it.
+#
+#   python benchmarks/bench_session_server.py [--workers 4] [--max-sessions 512] [--seconds 5]
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from _app import percentile
+from babytrainer.server import FRAME_HEADER, SessionClient, SessionServer, host_path
+
+
+async def subscriber(directory, session_id, points, until, latencies, warmup_until):
+    reader, writer = await asyncio.open_unix_connection(host_path(directory, session_id))
+    writer.write(json.dumps({'op': 'subscribe', 'id': session_id, 'points': points}).encode() + b'\n')
+    reply = json.loads(await reader.readline())
+    if not reply['ok']:
+        raise RuntimeError(reply['error'])
+    points_received = 0
+    try:
+        while time.monotonic() < until:
+            try:
+                header = await asyncio.wait_for(reader.readexactly(FRAME_HEADER.size), until - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+            stamp, _, rows, count = FRAME_HEADER.unpack(header)
+            await reader.readexactly(rows * count * 8)
+            now = time.monotonic()
+            if now > warmup_until:
+                latencies.append(now - stamp)
+                points_received += count
+    finally:
+        writer.close()
+    return points_received
+
+
+async def subscribe_all(directory, session_ids, points, seconds, warmup):
+    latencies = []
+    start = time.monotonic()
+    counts = await asyncio.gather(*(subscriber(directory, session_id, points, start + warmup + seconds,
+                                               latencies, start + warmup) for session_id in session_ids))
+    return sorted(latencies), sum(counts)
+
+
+def run(sessions, args):
+    with tempfile.TemporaryDirectory() as directory, SessionServer(directory, args.workers) as server:
+        client = SessionClient(directory)
+        session_ids = [f'station-{i}' for i in range(sessions)]
+        for session_id in session_ids:
+            client.open_session(session_id, 'Advanced', rate=args.rate)
+        latencies, points = asyncio.run(subscribe_all(directory, session_ids, args.points, args.seconds, 1.0))
+        stats = client.stats()
+        interval = server.interval
+    backlog = max(s['stages']['backlog']['p99'] for s in stats)
+    tick = max(s['stages']['tick']['p99'] for s in stats)
+    missed = sum(s['missed_ticks'] for s in stats)
+    dropped = sum(s['dropped_samples'] for s in stats)
+    p99 = percentile(latencies, 99)
+    degraded = (p99 > args.budget / 1000.0 or backlog > 2 * interval or dropped > 0
+                or points < 0.9 * sessions * args.points * args.seconds)
+    print(f'{sessions:>8} {percentile(latencies, 50) * 1000:>8.1f} {p99 * 1000:>8.1f} {tick * 1000:>8.1f} '
+          f'{backlog * 1000:>10.0f} {missed:>7} {dropped:>8} {points / args.seconds:>10.0f}  '
+          f'{"degraded" if degraded else "ok"}', flush=True)
+    return not degraded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='How many concurrent sessions one host sustains')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='server worker processes')
+    parser.add_argument('--rate', type=float, default=1000.0, help='sample rate of every session')
+    parser.add_argument('--points', type=float, default=200.0, help='points per second streamed per subscriber')
+    parser.add_argument('--seconds', type=float, default=5.0, help='measured time per load level')
+    parser.add_argument('--start-sessions', type=int, default=8)
+    parser.add_argument('--max-sessions', type=int, default=512)
+    parser.add_argument('--budget', type=float, default=50.0, help='p99 delivery latency budget in ms')
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers, {args.rate:g} Hz x 3 channels per session, {args.points:g} points/s streamed')
+    print(f'{"sessions":>8} {"p50 ms":>8} {"p99 ms":>8} {"tick ms":>8} {"backlog ms":>10} {"missed":>7} '
+          f'{"dropped":>8} {"points/s":>10}')
+    sustained = 0
+    sessions = args.start_sessions
+    while sessions <= args.max_sessions:
+        if not run(sessions, args):
+            break
+        sustained = sessions
+        sessions *= 2
+    print(f'sustained: {sustained} sessions' if sustained else 'sustained: none of the tested loads')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# Sustained ingest rate of each sensor backend, end to end through the
+# acquisition worker and queue, using the fake devices so no hardware is needed.
+#
+#   python benchmarks/bench_sources.py [--duration 5] [--rate 0] [--batch 1000]
+#
+# --rate 0 lets the fake devices send as fast as the reader keeps up; a positive
+# rate paces them like real hardware, so the report shows whether the backend
+# holds that rate without losing samples. "gaps" counts discontinuities seen by
+# the reader (e.g. lost UDP datagrams) and "dropped" counts samples rejected by a
+# full queue, which only happens when a flat-out source outruns the consumer.
+import argparse
+import socket
+import time
+
+from _app import ContinuityChecker, counting_sensor
+from babytrainer.acquisition import AcquisitionWorker, SpscQueue
+from babytrainer.ring_buffer import RingBuffer
+from babytrainer.sources import FakeSerialDevice, FakeStreamServer, SerialSource, StreamSource
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+# Returns (device or None, source) for one backend
+def make_backend(name, rate, batch):
+    realtime = rate > 0
+    nominal = rate if realtime else 1000.0  # Timestamps only, when running flat out
+    device_source = counting_sensor(nominal, batch_size=batch, realtime=realtime)
+    if name == 'synthetic':
+        return None, device_source
+    if name == 'tcp':
+        device = FakeStreamServer(device_source, protocol='tcp')
+        return device, StreamSource('127.0.0.1', device.port, nominal, protocol='tcp')
+    if name == 'udp':
+        port = free_udp_port()
+        return FakeStreamServer(device_source, port, protocol='udp'), StreamSource('127.0.0.1', port, nominal,
+                                                                                   protocol='udp')
+    device = FakeSerialDevice(device_source)
+    return device, SerialSource(device.port, nominal)
+
+
+def run(name, rate, batch, duration):
+    device, source = make_backend(name, rate, batch)
+    queue = SpscQueue(source.channels, 1 << 20)
+    checker = ContinuityChecker(RingBuffer(source.channels, 1000.0, 10.0))
+    worker = AcquisitionWorker(source, queue)
+    if device is not None:
+        worker.start()
+        time.sleep(0.2)  # Let the reader connect or bind before the device starts talking
+        device.start()
+    start = time.perf_counter()
+    if device is None:
+        worker.start()
+    while time.perf_counter() - start < duration:
+        queue.drain_into(checker)
+        time.sleep(0.01)
+    if device is not None:
+        device.stop()
+    worker.stop()
+    elapsed = time.perf_counter() - start
+    queue.drain_into(checker)
+    return checker.received / elapsed, checker.errors, queue.dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sustained ingest rate per sensor backend')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=0.0, help='device rate in Hz, 0 for unthrottled')
+    parser.add_argument('--batch', type=int, default=1000, help='samples per device write')
+    args = parser.parse_args()
+
+    print(f'{"backend":<10} {"frames/s":>14} {"samples/s":>14} {"gaps":>5} {"dropped":>8}')
+    for name in ('synthetic', 'tcp', 'udp', 'serial'):
+        frame_rate, gaps, dropped = run(name, args.rate, args.batch, args.duration)
+        print(f'{name:<10} {frame_rate:>14,.0f} {frame_rate * 3:>14,.0f} {gaps:>5} {dropped:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# Cold-start benchmark: time to the first shown window and to the first rendered
+# plot, measured in fresh interpreters under the offscreen platform, with a
+# breakdown of the slowest imports from `python -X importtime`. The clock
+# starts when the interpreter is launched, so start-up of Python itself counts.
+#
+#   python benchmarks/bench_startup.py [--runs 5] [--top 12]
+#
+# Only os and sys are imported at module level: anything else the benchmark
+# needs would land in the measured child's import breakdown.
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SHOWN_MARKER = '--- first window shown ---'
+
+
+# Launch the measured child with `env`, returns its result dict and its stderr
+def run_child(env, importtime=False):
+    import json
+    import subprocess
+    import time
+    options = ['-X', 'importtime'] if importtime else []
+    env = dict(env, BENCH_LAUNCHED=repr(time.time()))
+    process = subprocess.run([sys.executable, *options, os.path.join(HERE, 'bench_startup.py'), '--child'],
+                             capture_output=True, text=True, env=env, check=True)
+    return json.loads(process.stdout.strip().splitlines()[-1]), process.stderr
+
+
+# Runs inside the measured interpreter
+def child():
+    import time
+    start = float(os.environ.get('BENCH_LAUNCHED', time.time()))  # Wall clock, shared with the parent
+    sys.path.insert(0, HERE)
+    from _app import load_app, qt_app
+    module = load_app()
+    app = qt_app()
+    window = module.MainWindow1()
+    window.show()
+    app.processEvents()
+    shown = time.time() - start
+    print(SHOWN_MARKER, file=sys.stderr, flush=True)
+
+    window.toggle_window1()
+    form = window.window1
+    app.processEvents()
+    form.fullname_input.setText('Bench Trainee')
+    form.personal_id_input.setText('0000')
+    form.difficulty_combo.setCurrentText('Advanced')
+    form_ready = time.time() - start
+    # The trainee takes a while to fill in the form; background pre-warming happens meanwhile
+    think_until = time.perf_counter() + float(os.environ.get('BENCH_THINK_SECONDS', '0'))
+    while time.perf_counter() < think_until:
+        app.processEvents()
+        time.sleep(0.01)
+    clicked = time.perf_counter()
+    form.start_training()
+    training = form.window4
+    app.processEvents()
+    training.sample_queue.push(*training.source.read(0))  # One batch of simulated samples, no waiting
+    training.update_plots()
+    training.tabs.currentWidget().grab()  # Whatever tab the trainee sees first
+    first_plot = time.perf_counter()
+    training.close()
+    # Written by hand rather than with json, which would otherwise be imported here (float reprs are valid JSON)
+    print(f'{{"shown": {shown!r}, "form": {form_ready!r}, "click_to_plot": {first_plot - clicked!r}}}')
+
+
+def parse_importtime(stderr, top):
+    before, after = [], []
+    target = before
+    for line in stderr.splitlines():
+        if line.startswith(SHOWN_MARKER):
+            target = after
+            continue
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, _, cumulative_us, name = line.replace('import time:', '|').split('|')
+        if len(name) - len(name.lstrip()) == 1:  # Nested imports are indented further
+            target.append((int(cumulative_us), name.strip()))
+    return sorted(before, reverse=True)[:top], sorted(after, reverse=True)[:top], before, after
+
+
+def main():
+    if '--child' in sys.argv:
+        child()
+        return
+    import argparse
+    import statistics
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Cold start of the Baby Trainer app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12, help='top-level imports to list')
+    parser.add_argument('--think', type=float, default=2.0, help='seconds spent filling in the form')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as recordings:
+        env = dict(os.environ, QT_QPA_PLATFORM='offscreen', BABY_TRAINER_RECORDINGS=recordings)
+        stderr = ''
+        # Clicking straight away shows the cold path, a realistic pause shows the pre-warmed one
+        for think in (0.0, args.think):
+            env['BENCH_THINK_SECONDS'] = str(think)
+            results = []
+            for _ in range(args.runs):
+                result, child_stderr = run_child(env, importtime=True)
+                results.append(result)
+                if think == 0.0:
+                    stderr = child_stderr
+            print(f'form filled in for {think:g} s:')
+            for key, label in (('shown', 'first window shown'), ('form', 'training form ready'),
+                               ('click_to_plot', 'click to first plot')):
+                values = [result[key] * 1000 for result in results]
+                print(f'  {label:<22} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms')
+
+    top_before, top_after, before, after = parse_importtime(stderr, args.top)
+    print('\n(import breakdown from a run without a pause)')
+    print(f'imports before the first window: {sum(c for c, _ in before) / 1000:.1f} ms cumulative (top level)')
+    for cumulative, name in top_before:
+        print(f'  {cumulative / 1000:8.1f} ms  {name}')
+    print(f'imports after the first window:  {sum(c for c, _ in after) / 1000:.1f} ms cumulative (top level)')
+    for cumulative, name in top_after:
+        print(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Tick-cost benchmark: drives each training window's update_plots headlessly and
+# shows that per-tick latency and the number of scene items stay flat over time.
+#
+#   python benchmarks/bench_tick_cost.py [--ticks 10000] [--chunk 1000]
+import argparse
+import time
+
+
+from _app import load_app, percentile, qt_app
+from babytrainer.sources import SyntheticSource
+
+
+# Count the items held by every plot in the window (curves, threshold lines, ...)
+def count_plot_items(window):
+    import pyqtgraph as pg
+    return sum(len(w.getPlotItem().items) for w in window.findChildren(pg.PlotWidget))
+
+
+# Push one timer interval of samples from a non-realtime copy of the window's
+# simulated source straight into its queue, so the benchmark is deterministic
+# and does not depend on the acquisition thread
+def feeder(window, module):
+    n = int(window.source.sample_rate) * module.PLOT_INTERVAL_MS // 1000
+    source = SyntheticSource(window.source.sample_rate, *window.source.waveforms, batch_size=n, realtime=False)
+    return lambda: window.sample_queue.push(*source.read())
+
+
+def run(window_class, module, ticks, chunk, app):
+    window = window_class('Bench Trainee', '0000', 'Benchmark', window_class.__name__)
+    window.show()
+    app.processEvents()
+    print(f'{window_class.__name__}: {count_plot_items(window)} plot items before the first tick')
+    print(f'  {"ticks":>11} {"mean ms":>9} {"p50 ms":>9} {"p99 ms":>9} {"items":>6}')
+    feed = feeder(window, module)
+    timings = []
+    for tick in range(1, ticks + 1):
+        feed()
+        start = time.perf_counter()
+        window.update_plots()
+        app.processEvents()  # Let the scene repaint as it would under the real timer
+        timings.append((time.perf_counter() - start) * 1000.0)
+        if tick % chunk == 0:
+            ordered = sorted(timings)
+            mean = sum(ordered) / len(ordered)
+            print(f'  {tick - chunk + 1:>5}-{tick:<5} {mean:9.3f} {percentile(ordered, 50):9.3f} '
+                  f'{percentile(ordered, 99):9.3f} {count_plot_items(window):6d}')
+            timings = []
+    window.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-tick cost of the training windows')
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--chunk', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = qt_app()
+    module = load_app()
+    for window_class in (module.Window2, module.Window3, module.Window4):
+        run(window_class, module, args.ticks, args.chunk, app)
+
+
+if __name__ == '__main__':
+    main()
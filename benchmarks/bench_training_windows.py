@@ -0,0 +1,82 @@
+# Training-window wiring check: builds a window for every difficulty level,
+# feeds each channel its own recognisable signal and checks that every curve
+# (per-channel tab and combined view) shows exactly its own channel. Also
+# reports the tick cost per level. Exits with status 1 on any mismatch.
+#
+#   python benchmarks/bench_training_windows.py [--ticks 100] [--rate 100]
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from _app import qt_app
+from babytrainer.sources import CHANNELS
+from babytrainer.training_spec import DIFFICULTIES
+from babytrainer.training_windows import TrainingWindow
+
+
+OFFSET = 1e6  # Channel i carries (i + 1) * OFFSET + sample index, so any cross-wiring is obvious
+
+
+def batch(start, n):
+    index = np.arange(start, start + n, dtype=float)
+    samples = np.vstack([(i + 1) * OFFSET + index for i in range(len(CHANNELS))])
+    return index / 1000.0, samples
+
+
+def check(spec, app, ticks, rate):
+    window = TrainingWindow('Bench Trainee', '0000', 'Benchmark', spec.name, spec=spec)
+    window.resize(1000, 800)
+    window.show()
+    app.processEvents()
+    n = int(rate * spec.plot_interval_ms / 1000)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        window.sample_queue.push(*batch(tick * n, n))
+        window.update_plots()
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    total = ticks * n
+    for index in range(window.tabs.count()):  # Hidden tabs catch up when shown
+        window.tabs.setCurrentIndex(index)
+        app.processEvents()
+
+    errors = []
+    curves = [(f'{c.name} tab', c.channel, window.curves[c.channel]) for c in spec.channels]
+    curves += [(f'combined {c.name}', c.channel, window.combined_curves[c.channel])
+               for c in spec.channels if spec.combined_view]
+    for label, channel, curve in curves:
+        x, y = curve.getData()
+        if x is None or not len(x):
+            errors.append(f'{label}: nothing drawn')
+        # Narrow widgets draw min/max envelopes, so only the value range is exact
+        elif not np.all((y >= (channel + 1) * OFFSET) & (y < (channel + 1) * OFFSET + total)):
+            errors.append(f'{label}: does not show {CHANNELS[channel]}')
+    window.close()
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check every training window draws the right channel in the right widget')
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--rate', type=float, default=100.0, help='fed sample rate')
+    args = parser.parse_args()
+
+    app = qt_app()
+    failed = False
+    print(f'{"level":<13} {"tabs":>4} {"curves":>6} {"ms/tick":>8}  result')
+    for spec in DIFFICULTIES.values():
+        elapsed, errors = check(spec, app, args.ticks, args.rate)
+        curves = len(spec.channels) * (2 if spec.combined_view else 1)
+        tabs = len(spec.channels) + spec.combined_view
+        print(f'{spec.name:<13} {tabs:>4} {curves:>6} {elapsed / args.ticks * 1000:>8.2f}  '
+              f'{"ok" if not errors else "FAIL"}')
+        for error in errors:
+            print(f'  {error}')
+        failed = failed or bool(errors)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
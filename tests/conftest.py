@@ -0,0 +1,49 @@
+# Fixtures for the headless GUI tests: the windows run under the offscreen
+# platform, and record and score their sessions into a temporary folder
+# rather than the user's.
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import _app  # noqa: E402  (also puts the repository root on sys.path)
+
+
+def pytest_addoption(parser):
+    parser.addoption('--perf', action='store_true', help='also run the tests marked perf (slow, machine specific)')
+    parser.addoption('--update-baseline', action='store_true',
+                     help="record this machine's GUI performance baseline instead of checking against it")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "perf: performance gate against this machine's baseline, needs --perf")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--perf') or config.getoption('--update-baseline'):
+        return
+    skip = pytest.mark.skip(reason='performance gate, run with --perf')
+    for item in items:
+        if 'perf' in item.keywords:
+            item.add_marker(skip)
+
+
+# "Main Application.py" reads its folders from the environment when it is loaded
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    folder = tmp_path_factory.mktemp('recordings')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('BABY_TRAINER_RECORDINGS', str(folder))
+        patch.setenv('BABY_TRAINER_RESULTS', str(folder / 'results.sqlite'))
+        patch.setenv('BABY_TRAINER_PREWARM', '0')
+        module = _app.load_app()
+    assert module.RECORDINGS_DIR == str(folder), '"Main Application.py" was loaded before the fixture'
+    return module
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    return _app.qt_app()
@@ -0,0 +1,23 @@
+# Performance gate of the training windows: tick time, memory growth and cold
+# start against this machine's baseline (see benchmarks/bench_gui_regression.py).
+# Only runs with --perf; --update-baseline records the baseline instead. A
+# missing baseline fails the gate rather than passing unchecked.
+import pytest
+
+import bench_gui_regression as bench
+
+
+@pytest.mark.perf
+def test_gui_performance_within_baseline(qapp, app_module, request):
+    if request.config.getoption('--update-baseline'):
+        figures = bench.measure(qapp, app_module, bench.SETTINGS, bench.STARTUP_RUNS)
+        bench.write_baseline(bench.BASELINE, bench.SETTINGS, figures)
+        print(bench.report(figures, {}, []))
+        return
+    try:
+        baseline = bench.read_baseline(bench.BASELINE, bench.SETTINGS)
+    except ValueError as error:
+        pytest.fail(str(error))
+    figures = bench.measure(qapp, app_module, bench.SETTINGS, bench.STARTUP_RUNS)
+    slower = bench.regressions(figures, baseline, bench.TOLERANCE)
+    assert not slower, '\n' + bench.report(figures, baseline, slower)
@@ -0,0 +1,230 @@
+# Headless regression tests of the whole trainee flow: the start-up page, the
+# training form and Window2 to Window4, driven through their buttons. The plot
+# timer is advanced by hand with deterministic samples (see _app.HandFedSession),
+# so the curves, the plot items of every widget and the indicator light can be
+# checked exactly after each phase. Timings are not tested here; see
+# benchmarks/bench_gui_regression.py.
+import itertools
+import socket
+import threading
+import time
+
+import pytest
+
+from babytrainer.sources import SensorSource, StreamSource
+
+from _app import WINDOWS, HandFedSession, open_training_window, scene_items
+
+LEVELS = list(WINDOWS)
+HIGH, LOW = 0.9, 0.1  # Force fed above and below its threshold (0.5); the other channels stay at rest
+SETTLE_TICKS = 20  # Ticks for the low-pass to settle on a new level
+LONG_TICKS = 300  # Ticks over which the scene must not grow
+_trainees = itertools.count()
+
+
+class Training:
+    # A training window opened from the start-up page, with its form and the hand-fed session
+    def __init__(self, app, module, difficulty):
+        self.app = app
+        self.difficulty = difficulty
+        self.personal_id = f'gui-{difficulty.lower()}-{next(_trainees)}'
+        self.form, self.window = open_training_window(app, module, difficulty, self.personal_id)
+        self.session = HandFedSession(app, self.window) if self.window is not None else None
+
+    def close(self):
+        if self.window is not None:
+            self.window.close()
+        if self.form is not None:
+            if self.form.results is not None:
+                self.form.results.close()
+            self.form.close()
+        self.app.processEvents()
+
+
+@pytest.fixture(params=LEVELS)
+def training(request, qapp, app_module):
+    training = Training(qapp, app_module, request.param)
+    yield training
+    training.close()
+
+
+# The force curve shows `level` and the others rest, each ending at the newest
+# sample and spanning no more than the level's window
+def assert_curves(window, newest_sample, level):
+    spec = window.spec
+    newest = newest_sample / spec.sample_rate
+    force = spec.channels[0].channel
+    pages = [('tab', window.plot_widgets, window.curves)]
+    if spec.combined_view:
+        pages.append(('combined', window.combined_plot_widgets, window.combined_curves))
+    for page, widget_of, curve_of in pages:
+        for channel in spec.channels:
+            x, y = curve_of[channel.channel].getData()
+            label = f'{channel.name} ({page})'
+            assert x is not None and len(x), f'{label}: nothing drawn'
+            # Envelope points sit at the start of their pixel column
+            slack = 2 * spec.window_seconds / max(1, widget_of[channel.channel].width()) + 1.5 / spec.sample_rate
+            assert x[-1] == pytest.approx(newest, abs=slack), f'{label}: does not end at the newest sample'
+            assert x[-1] - x[0] <= spec.window_seconds + slack, f'{label}: spans more than the window'
+            expected = level if channel.channel == force else 0.0
+            assert y[-1] == pytest.approx(expected, abs=1e-3), f'{label}: does not show the fed level'
+
+
+# Visit every tab so hidden ones catch up; the light is red while the force is
+# over its threshold on the force tab and the combined view, green elsewhere
+def assert_all_tabs(app, window, newest_sample, level):
+    force = window.spec.channels[0].channel
+    for index in range(window.tabs.count()):
+        window.tabs.setCurrentIndex(index)
+        app.processEvents()
+        channel = window.indicator_channels.get(window.tabs.currentWidget())
+        expected = 'red' if level > window.spec.channels[0].threshold and channel in (None, force) else 'green'
+        label = window.tabs.tabText(index)
+        assert window.indicator_colour == expected, f'indicator on "{label}"'
+        assert f'background-color: {expected}' in window.light_indicator.styleSheet(), f'indicator on "{label}"'
+    window.tabs.setCurrentIndex(0)
+    app.processEvents()
+    assert_curves(window, newest_sample, level)
+
+
+def test_start_training_opens_the_level_window(training):
+    assert training.form is not None, 'the Start button did not open the training form'
+    assert training.window is not None, f'Start Training did not open {WINDOWS[training.difficulty]}'
+    assert training.window.spec.name == training.difficulty
+    assert not training.window.plot_timer.isActive()
+    assert not training.window.engine.is_running()
+
+
+def test_every_plot_widget_has_one_curve_and_its_threshold_line(training):
+    window = training.window
+    training.session.run(SETTLE_TICKS, HIGH)
+    items = scene_items(window)
+    assert len(items) == len(window.spec.channels) * (2 if window.spec.combined_view else 1)
+    for name, (plot_items, _, curves) in items.items():
+        assert (curves, plot_items) == (1, 2), name
+
+    # Nothing is added per tick, on any tab
+    training.session.run(LONG_TICKS, LOW)
+    assert_all_tabs(training.app, window, training.session.fed - 1, LOW)
+    assert scene_items(window) == items
+
+
+def test_curves_and_indicator_follow_the_fed_level(training):
+    for level in (HIGH, LOW, HIGH):
+        training.session.run(SETTLE_TICKS, level)
+        assert_all_tabs(training.app, training.window, training.session.fed - 1, level)
+
+
+def test_start_and_stop_buttons(training):
+    window = training.window
+    window.start_button.click()
+    training.app.processEvents()
+    assert window.plot_timer.isActive()
+    assert window.engine.is_running()
+    window.stop_button.click()
+    training.app.processEvents()
+    assert not window.plot_timer.isActive()
+    assert not window.engine.is_running()
+
+
+def test_closing_the_window_saves_the_score(training):
+    training.session.run(SETTLE_TICKS, HIGH)
+    results = training.form.results
+    training.window.close()
+    training.app.processEvents()
+    results.flush()
+    assert len(results.history(training.personal_id, training.difficulty)) == 1
+
+
+# A finished session's recording replays through the same window, and ends up
+# showing what the live session showed
+@pytest.mark.parametrize('difficulty', LEVELS)
+def test_replay_shows_the_recorded_session(qapp, app_module, monkeypatch, difficulty):
+    recorded = Training(qapp, app_module, difficulty)
+    try:
+        recorded.session.run(SETTLE_TICKS, HIGH)
+        recorded.session.run(SETTLE_TICKS, LOW)
+        path = recorded.window.engine.recorder.path
+        fed = recorded.session.fed
+    finally:
+        recorded.close()
+
+    form = recorded.form
+    monkeypatch.setattr(app_module.QFileDialog, 'getOpenFileName', lambda *args: (path, ''))
+    form.replay_speed_combo.setCurrentText('Max')
+    form.show()
+    form.replay_button.click()
+    qapp.processEvents()
+    window = getattr(form, WINDOWS[difficulty])
+    try:
+        assert window.isVisible() and window.source.recording.sample_count == fed
+        assert not window.engine.is_running(), 'the replay started before Start was clicked'
+        window.start_button.click()
+        deadline = time.monotonic() + 30.0
+        while window.engine.score.sample_count < fed and time.monotonic() < deadline:
+            window.plot_timer.timeout.emit()
+            qapp.processEvents()
+            time.sleep(0.01)
+        assert window.engine.score.sample_count == fed
+        assert window.engine.recorder is None, 'a replay must not record itself again'
+        assert_all_tabs(qapp, window, fed - 1, LOW)
+    finally:
+        window.close()
+        form.close()
+        qapp.processEvents()
+
+
+# Source whose open() hangs, like a connection to an unreachable trainer
+class HangingSource(SensorSource):
+    def __init__(self):
+        super().__init__(1000.0)
+        self.release = threading.Event()
+
+    def open(self):
+        self.release.wait(10)
+
+    def read(self, timeout=0.1):
+        time.sleep(timeout)
+
+
+def _level_window(qapp, app_module, source):
+    form = app_module.Window1()
+    form.open_training_window('Regression Trainee', 'gui-source', 'Midwife', 'Easy', source)
+    qapp.processEvents()
+    return form, form.window2
+
+
+def test_trainer_that_refuses_the_connection_is_reported(qapp, app_module):
+    with socket.socket() as listener:  # A port nothing listens on once this is closed
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]
+    form, window = _level_window(qapp, app_module, StreamSource('127.0.0.1', port, 1000.0))
+    try:
+        window.start_button.click()
+        deadline = time.monotonic() + 10.0
+        while window.plot_timer.isActive() and time.monotonic() < deadline:
+            window.plot_timer.timeout.emit()
+            qapp.processEvents()
+            time.sleep(0.01)
+        assert not window.plot_timer.isActive(), 'the window kept running without its trainer'
+        assert isinstance(window.engine.error, ConnectionRefusedError)
+        assert window.status_label.text().startswith('Sensor stopped:')
+    finally:
+        window.close()
+        form.close()
+
+
+def test_stop_does_not_wait_for_a_hanging_trainer(qapp, app_module):
+    source = HangingSource()
+    form, window = _level_window(qapp, app_module, source)
+    try:
+        window.start_button.click()
+        qapp.processEvents()
+        started = time.monotonic()
+        window.stop_button.click()
+        assert time.monotonic() - started < 2.0
+        assert not window.engine.is_running()
+    finally:
+        source.release.set()
+        window.close()
+        form.close()